@@ -0,0 +1,246 @@
+"""
+ALERTAS INCREMENTAIS (EM SEGUNDO PLANO)
+Avaliados quando dados novos chegam (um snapshot novo de fundamentos), não
+a cada rerun de cada sessão. Só entram na conta os tickers cujas métricas
+mudaram desde a última avaliação; um alerta dispara quando o ticker cruza
+o limiar (não estava na condição e passou a estar) e fica registrado:
+
+    alerts/state.json     últimos valores por ticker + tickers ativos por regra
+    alerts/fired.jsonl    alertas disparados (append-only)
+
+A entrega passa por sinks plugáveis (qualquer objeto com deliver(alerts)):
+arquivo (sempre) e webhook (BDR_ALERT_WEBHOOK; o stand-in de provedores
+aceita POST /webhook). Falhas de sinks e da avaliação em segundo plano vão
+para os contadores de erro da instrumentação ("ℹ️ Estatísticas", /metrics).
+
+Uso:
+    python alerts.py show
+    python alerts.py replay --start 2025-01-01     # reprocessa o histórico
+"""
+
+import os
+import json
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from screens import OPERATORS
+
+ALERTS_DIR = os.environ.get("BDR_ALERTS_DIR", "alerts")
+ALERT_WEBHOOK_URL = os.environ.get("BDR_ALERT_WEBHOOK", "")
+
+# Regras padrão (mesmos limiares padrão dos alertas do dashboard)
+DEFAULT_RULES = [
+    {'id': 'score_80', 'metric': 'score', 'op': '>=', 'value': 80, 'titulo': '🚨 Score ≥ 80'},
+    {'id': 'roe_25', 'metric': 'roe', 'op': '>=', 'value': 25, 'titulo': '💎 ROE ≥ 25%'},
+]
+
+# ============================================================
+# SINKS
+# ============================================================
+
+class FileSink:
+    """Acrescenta um JSON por alerta em fired.jsonl"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def deliver(self, alerts):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+class WebhookSink:
+    """POST {'alerts': [...]} para uma URL (um POST por lote)"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, alerts):
+        import requests
+
+        try:
+            requests.post(self.url, json={'alerts': alerts}, timeout=self.timeout).raise_for_status()
+        except requests.RequestException as e:
+            METRICS.observe_error('alerts.webhook', e)
+
+# ============================================================
+# MOTOR
+# ============================================================
+
+class AlertEngine:
+    def __init__(self, root=ALERTS_DIR, rules=None, sinks=None):
+        self.root = root
+        self.rules = rules or DEFAULT_RULES
+        self.metrics = list(dict.fromkeys(rule['metric'] for rule in self.rules))
+        self.log_path = os.path.join(root, "fired.jsonl")
+        if sinks is None:
+            sinks = [FileSink(self.log_path)]
+            if ALERT_WEBHOOK_URL:
+                sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+        self.sinks = sinks
+        self.lock = threading.Lock()
+        self._state = None
+        self._queue = None
+
+    # --------------------------------------------------------
+    # Estado
+    # --------------------------------------------------------
+
+    def _state_path(self):
+        return os.path.join(self.root, "state.json")
+
+    def state(self):
+        if self._state is None:
+            try:
+                with open(self._state_path(), encoding="utf-8") as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {'values': {}, 'active': {}}
+        return self._state
+
+    def _save_state(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._state_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self._state_path())
+
+    # --------------------------------------------------------
+    # Avaliação
+    # --------------------------------------------------------
+
+    def evaluate(self, frame, when=None):
+        """
+        Compara o frame (índice = ticker) com os últimos valores conhecidos e
+        entrega os alertas disparados; devolve a lista entregue
+        Tickers ausentes do frame não mudam de estado (cada coleta é um recorte)
+        """
+        if frame is None or frame.empty:
+            return []
+        when = (when or datetime.now()).replace(microsecond=0).isoformat()
+        columns = [m for m in self.metrics if m in frame.columns]
+        current = frame[columns].astype('float64')
+
+        with self.lock:
+            state = self.state()
+            known = {t: state['values'][t] for t in current.index if t in state['values']}
+            previous = pd.DataFrame.from_dict(known, orient='index')\
+                           .reindex(index=current.index, columns=columns).astype('float64')
+            # Só as linhas que mudaram (ou são novas) seguem adiante
+            same = (current.to_numpy() == previous.to_numpy()) | \
+                (np.isnan(current.to_numpy()) & np.isnan(previous.to_numpy()))
+            changed = current[~same.all(axis=1)]
+            if changed.empty:
+                return []
+
+            fired = []
+            for rule in self.rules:
+                if rule['metric'] not in changed.columns:
+                    continue
+                values = changed[rule['metric']].to_numpy()
+                with np.errstate(invalid='ignore'):
+                    now = OPERATORS[rule['op']](values, rule['value'])
+                active = set(state['active'].get(rule['id'], []))
+                was = np.fromiter((t in active for t in changed.index), dtype=bool, count=len(changed))
+                for ticker, value in zip(changed.index[now & ~was], values[now & ~was]):
+                    fired.append({'quando': when, 'regra': rule['id'], 'titulo': rule.get('titulo', rule['id']),
+                                  'ticker': ticker, 'metrica': rule['metric'], 'valor': round(float(value), 2),
+                                  'limiar': rule['value']})
+                active |= set(changed.index[now & ~was])
+                active -= set(changed.index[~now & was])
+                state['active'][rule['id']] = sorted(active)
+
+            for ticker, row in zip(changed.index, changed.to_numpy()):
+                state['values'][ticker] = {m: None if np.isnan(v) else float(v) for m, v in zip(columns, row)}
+            self._save_state()
+
+        if fired:
+            for sink in self.sinks:
+                try:
+                    sink.deliver(fired)
+                except Exception as e:
+                    METRICS.observe_error(f'alerts.{type(sink).__name__}', e)
+        return fired
+
+    # --------------------------------------------------------
+    # Segundo plano
+    # --------------------------------------------------------
+
+    def submit(self, frame, when=None):
+        """Enfileira a avaliação para a thread do motor (não bloqueia a sessão)"""
+        with self.lock:
+            if self._queue is None:
+                self._queue = queue.Queue()
+                threading.Thread(target=self._worker, daemon=True, name="alert-engine").start()
+        self._queue.put((frame, when))
+
+    def _worker(self):
+        while True:
+            frame, when = self._queue.get()
+            try:
+                self.evaluate(frame, when)
+            except Exception as e:
+                METRICS.observe_error('alerts', e)
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """Espera a fila esvaziar (CLI e testes)"""
+        if self._queue is not None:
+            self._queue.join()
+
+    # --------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------
+
+    def recent(self, limit=20, block=64 * 1024):
+        """Últimos alertas disparados (mais recente primeiro); lê só o fim do log"""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - block))
+                data = f.read()
+        except OSError:
+            return []
+        lines = data.splitlines()
+        if size > block:
+            lines = lines[1:]  # primeira linha possivelmente cortada
+        return [json.loads(line) for line in reversed(lines[-limit:]) if line.strip()]
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import date
+
+    parser = argparse.ArgumentParser(description="Alertas incrementais")
+    parser.add_argument("--root", default=ALERTS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Últimos alertas disparados")
+    show.add_argument("--limit", type=int, default=20)
+    replay = sub.add_parser("replay", help="Avalia os snapshots do histórico em ordem")
+    replay.add_argument("--start", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    engine = AlertEngine(args.root)
+    if args.command == "show":
+        for alert in engine.recent(args.limit):
+            print(f"{alert['quando']}  {alert['titulo']:<16} {alert['ticker']:<8} "
+                  f"{alert['metrica']}={alert['valor']}")
+    else:
+        import history
+
+        store = history.HistoryStore()
+        total = 0
+        for day in store.days():
+            if args.start and day < args.start:
+                continue
+            snapshot = store.read(columns=engine.metrics, start=day, end=day).set_index('ticker')
+            total += len(engine.evaluate(snapshot, datetime.combine(day, datetime.min.time())))
+        print(f"✅ {total} alertas disparados")
@@ -0,0 +1,259 @@
+"""
+API JSON SOMENTE LEITURA
+Serve o snapshot pré-calculado (snapshot.py) para outras ferramentas.
+Nenhuma requisição dispara busca upstream: os dados ficam em memória
+e as respostas são cacheadas por versão do snapshot.
+
+Uso:
+    python snapshot.py                      # gera snapshots/latest.json
+    python api.py --port 8502               # serve o snapshot
+    python api.py --refresh 3600            # serve e regera a cada hora
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+import snapshot as snap
+
+RESPONSE_CACHE_SIZE = 512
+RELOAD_CHECK_SECONDS = 1.0
+
+# Dados de uma versão do snapshot, lidos juntos sob o lock do store
+SnapshotView = namedtuple('SnapshotView', 'version generated_at df_fund df_news recommendations')
+
+# ============================================================
+# STORE EM MEMÓRIA
+# ============================================================
+
+class SnapshotStore:
+    """Mantém o snapshot carregado e recarrega quando o arquivo muda"""
+
+    def __init__(self, path=snap.SNAPSHOT_PATH):
+        self.path = path
+        self.version = 0
+        self.generated_at = None
+        self.df_fund = pd.DataFrame()
+        self.df_news = pd.DataFrame()
+        self.recommendations = []
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.maybe_reload(force=True)
+
+    def load(self, snapshot):
+        """Troca o snapshot em memória (chamado também pelo refresher)"""
+        df_fund = pd.DataFrame(snapshot.get('fundamentals', []))
+        df_news = pd.DataFrame(snapshot.get('news', []))
+        with self._lock:
+            self.df_fund = df_fund
+            self.df_news = df_news
+            self.recommendations = snapshot.get('recommendations', [])
+            self.generated_at = snapshot.get('generated_at')
+            self.version += 1
+            self._cache.clear()
+
+    def maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < RELOAD_CHECK_SECONDS:
+            return
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            data = snap.load_snapshot(self.path)
+            if data is not None:
+                self._mtime = mtime
+                self.load(data)
+
+    def view(self):
+        """Versão e dados correntes, consistentes entre si"""
+        with self._lock:
+            return SnapshotView(self.version, self.generated_at, self.df_fund, self.df_news,
+                                self.recommendations)
+
+    def get_cached(self, key):
+        with self._lock:
+            body = self._cache.get((self.version, key))
+            if body is not None:
+                self._cache.move_to_end((self.version, key))
+            return body
+
+    def put_cached(self, version, key, body):
+        """Guarda o corpo sob a versão de onde saiu; versões já trocadas são descartadas"""
+        with self._lock:
+            if version != self.version:
+                return
+            self._cache[(version, key)] = body
+            if len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+# ============================================================
+# FILTROS
+# ============================================================
+
+def _param(query, name, cast=str):
+    values = query.get(name)
+    if not values or values[0] == "":
+        return None
+    return cast(values[0])
+
+def _finish(df, query, default_sort):
+    sort = _param(query, 'sort') or default_sort
+    if sort in df.columns:
+        df = df.sort_values(sort, ascending=bool(_param(query, 'asc', int)))
+    limit = _param(query, 'limit', int)
+    if limit is not None:
+        df = df.head(limit)
+    return df
+
+def filter_fundamentals(df, query):
+    """Aplica os filtros de /fundamentals sobre o DataFrame do snapshot"""
+    if df.empty:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    tickers = _param(query, 'tickers')
+    if tickers:
+        mask &= df['ticker'].isin([t.strip().upper() for t in tickers.split(',')])
+    for name, column in (('setor', 'setor'), ('status', 'status')):
+        value = _param(query, name)
+        if value:
+            mask &= df[column] == value
+    for name, column in (('min_score', 'score'), ('min_roe', 'roe'),
+                         ('min_pe', 'pe'), ('min_div_yield', 'div_yield'),
+                         ('min_market_cap', 'market_cap')):
+        value = _param(query, name, float)
+        if value is not None:
+            mask &= df[column] >= value
+    for name, column in (('max_roe', 'roe'), ('max_pe', 'pe')):
+        value = _param(query, name, float)
+        if value is not None:
+            mask &= df[column] <= value
+
+    return _finish(df[mask], query, 'score')
+
+def filter_news(df, query):
+    """Aplica os filtros de /news-opportunities"""
+    if df.empty:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    priority = _param(query, 'priority')
+    if priority:
+        mask &= df['priority'] == priority
+    min_score = _param(query, 'min_score', float)
+    if min_score is not None:
+        mask &= df['score'] >= min_score
+    tickers = _param(query, 'tickers')
+    if tickers:
+        mask &= df['ticker'].isin([t.strip().upper() for t in tickers.split(',')])
+
+    return _finish(df[mask], query, 'score')
+
+def filter_recommendations(recommendations, query):
+    tipo = _param(query, 'tipo')
+    if tipo:
+        return [r for r in recommendations if tipo.lower() in r['tipo'].lower()]
+    return recommendations
+
+# ============================================================
+# HTTP
+# ============================================================
+
+def _envelope(view, data):
+    return {'generated_at': view.generated_at, 'count': len(data), 'data': data}
+
+def render(view, path, query):
+    """Monta o corpo JSON (bytes) de um endpoint a partir de store.view(); None se não existe"""
+    if path == '/health':
+        return json.dumps({'status': 'ok', 'generated_at': view.generated_at,
+                           'version': view.version}).encode('utf-8')
+
+    if path == '/fundamentals':
+        df = filter_fundamentals(view.df_fund, query)
+    elif path == '/news-opportunities':
+        df = filter_news(view.df_news, query)
+    elif path == '/recommendations':
+        data = filter_recommendations(view.recommendations, query)
+        return json.dumps(_envelope(view, data), ensure_ascii=False).encode('utf-8')
+    else:
+        return None
+
+    # to_json converte NaN em null
+    records = df.to_json(orient='records', force_ascii=False) if not df.empty else "[]"
+    return ('{"generated_at": %s, "count": %d, "data": %s}' % (
+        json.dumps(view.generated_at), len(df), records)).encode('utf-8')
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            store.maybe_reload()
+            parsed = urlparse(self.path)
+            key = (parsed.path, parsed.query)
+
+            body = store.get_cached(key)
+            if body is None:
+                view = store.view()
+                try:
+                    body = render(view, parsed.path, parse_qs(parsed.query))
+                except (ValueError, KeyError) as e:
+                    self._send(400, json.dumps({'error': str(e)}).encode('utf-8'))
+                    return
+                if body is None:
+                    self._send(404, b'{"error": "not found"}')
+                    return
+                if parsed.path != '/health':
+                    store.put_cached(view.version, key, body)
+
+            self._send(200, body)
+
+        def _send(self, code, body):
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "max-age=60")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(host="127.0.0.1", port=8502, path=snap.SNAPSHOT_PATH, refresh=None):
+    store = SnapshotStore(path)
+    if refresh:
+        snap.SnapshotRefresher(interval=refresh, path=path, on_refresh=store.load).start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    print(f"🚀 API em http://{host}:{port} (snapshot: {path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API JSON do snapshot de BDRs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--snapshot", default=snap.SNAPSHOT_PATH)
+    parser.add_argument("--refresh", type=int, help="Regerar o snapshot a cada N segundos")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.snapshot, args.refresh)
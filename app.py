@@ -4,36 +4,42 @@ Com mapeamento correto de tickers e filtros de validação
 """
 
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import requests
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.figure_factory as ff
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 import time
+import uuid
 import warnings
-import json
-from io import BytesIO
+
+# yfinance e plotly são importados apenas nas views que os usam
+
+import exports
+import instrumentation
+import scheduler
+import scoring
+import screening
+from instrumentation import METRICS, count_calls, count_misses, stage
+from screening import (
+    KNOWN_VALID_TICKERS, get_news_opportunity, get_recommendations,
+    fundamentals_frame, filter_fundamentals
+)
 
 warnings.filterwarnings('ignore')
 
 # ============================================================
 # CONFIGURAÇÃO DA PÁGINA
 # ============================================================
-st.set_page_config(
-    page_title="Dashboard BDRs Completo | Todas as BDRs da B3",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
 
-# ============================================================
-# CSS (mesmo de antes)
-# ============================================================
-st.markdown("""
+def configure_page():
+    """Página, CSS e chaves de API (primeiros comandos de cada execução)"""
+    st.set_page_config(
+        page_title="Dashboard BDRs Completo | Todas as BDRs da B3",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # CSS (mesmo de antes)
+    st.markdown("""
 <style>
     .main-header {
         font-size: 2.8rem;
@@ -68,326 +74,223 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+    # API Keys (sobrescrevem os padrões do screening)
+    try:
+        screening.FINNHUB_API_KEY = st.secrets["FINNHUB_API_KEY"]
+        screening.BRAPI_API_TOKEN = st.secrets["BRAPI_API_TOKEN"]
+    except:
+        pass
+
 # ============================================================
-# MAPEAMENTO CORRETO DE BDRs
+# FUNÇÕES DE CACHE
 # ============================================================
 
-# Mapeamento manual dos principais BDRs com códigos especiais
-TICKER_CORRECTIONS = {
-    'GOGL': 'GOOGL',  # Google
-    'AMZO': 'AMZN',   # Amazon
-    'M1TA': 'META',   # Meta
-    'NVDC': 'NVDA',   # Nvidia
-    'MSCD': 'MSFT',   # Microsoft (alternativo)
-    'T1SL': 'TSLA',   # Tesla (alternativo)
-    'NTFL': 'NFLX',   # Netflix (alternativo)
-    'APPL': 'AAPL',   # Apple (alternativo)
-}
+# Funções de busca vivem em screening.py (também usadas pela API)
+@st.cache_resource
+def get_universe_loader():
+    """Loader compartilhado do universo BRAPI (roda em background)"""
+    return screening.UniverseLoader(ttl=86400)
 
-# Tickers conhecidos e válidos (lista curada)
-KNOWN_VALID_TICKERS = [
-    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', 'TSLA', 'NFLX',
-    'AVGO', 'ASML', 'INTC', 'QCOM', 'ADBE', 'CSCO', 'ORCL', 'CRM',
-    'V', 'MA', 'PYPL', 'JPM', 'BAC', 'GS', 'C', 'WFC', 'MS',
-    'BABA', 'MELI', 'SHOP', 'DIS', 'SPOT', 'UBER', 'LYFT',
-    'PFE', 'ABBV', 'JNJ', 'AMGN', 'MRNA', 'LLY', 'BMY',
-    'NKE', 'SBUX', 'KO', 'PEP', 'WMT', 'COST', 'TGT', 'HD',
-    'XOM', 'CVX', 'BP', 'SHEL', 'T', 'VZ', 'CMCSA',
-    'BA', 'CAT', 'DE', 'HON', 'MMM', 'GE', 'LMT',
-    'COIN', 'SQ', 'ABNB', 'DASH', 'SNOW', 'ZM', 'DOCU',
-    'AMD', 'MU', 'LRCX', 'AMAT', 'KLAC', 'SNPS', 'CDNS',
-    'NXPI', 'TXN', 'MRVL', 'QRVO', 'SWKS',
-    'NOW', 'WDAY', 'PANW', 'CRWD', 'ZS', 'DDOG',
-    'UNH', 'CVS', 'CI', 'HUM', 'ANTM', 'MCK', 'ABC',
-    'AXP', 'BLK', 'SCHW', 'CME', 'ICE', 'SPGI', 'MCO',
-    'NEE', 'DUK', 'SO', 'D', 'EXC', 'SRE', 'AEP',
-    'UPS', 'FDX', 'NSC', 'UNP', 'CSX', 'JBHT',
-    'MCD', 'CMG', 'YUM', 'QSR', 'DPZ', 'SBUX',
-    'PG', 'UL', 'CL', 'KMB', 'CLX', 'CHD',
-    'PM', 'MO', 'BTI',
-    'MDLZ', 'KHC', 'GIS', 'K', 'CPB',
-    'LOW', 'DHI', 'LEN', 'NVR', 'PHM',
-    'F', 'GM', 'RIVN', 'LCID',
-    'AAL', 'DAL', 'UAL', 'LUV', 'ALK',
-    'MAR', 'HLT', 'IHG', 'H', 'WH',
-    'BKNG', 'EXPE', 'TCOM', 'TRIP',
-]
-
-# API Keys
-try:
-    FINNHUB_API_KEY = st.secrets["FINNHUB_API_KEY"]
-    BRAPI_API_TOKEN = st.secrets["BRAPI_API_TOKEN"]
-except:
-    FINNHUB_API_KEY = "d4uouchr01qnm7pnasq0d4uouchr01qnm7pnasqg"
-    BRAPI_API_TOKEN = "iExnKM1xcbQcYL3cNPhPQ3"
+# count_calls/count_misses alimentam o hit ratio do "ℹ️ Estatísticas"
+get_news_data = count_calls('news', st.cache_data(ttl=1800)(
+    count_misses('news', screening.get_news_data)))
+get_polymarket_data = count_calls('polymarket', st.cache_data(ttl=3600)(
+    count_misses('polymarket', screening.get_polymarket_data)))
 
-# ============================================================
-# FUNÇÃO MELHORADA PARA BUSCAR BDRs
-# ============================================================
+@st.cache_resource
+def get_fetch_scheduler():
+    """Fila de prioridade de fundamentos, comum às sessões (threads em segundo plano)"""
+    return scheduler.FetchScheduler(screening.get_fundamental_data, name='fundamentals')
+
+def fetch_fundamentals(tickers):
+    """(ticker, dados) na ordem em que ficam prontos, com prioridade máxima"""
+    return get_fetch_scheduler().wait(tickers)
 
-@st.cache_data(ttl=86400)
-def get_all_bdrs_from_brapi():
+def prioritize_fetches(visible):
     """
-    Busca BDRs da B3 e valida tickers
+    Declara o que a sessão está vendo: primeiro os visíveis, depois o Top 100
+    e (com BDR_FETCH_UNIVERSE=1) o resto do universo. Chamado só nas views
+    que usam fundamentos, depois da sidebar: a primeira pintura não busca nada
     """
-    try:
-        url = f"https://brapi.dev/api/quote/list?token={BRAPI_API_TOKEN}"
-        response = requests.get(url, timeout=30)
-        
-        if response.status_code != 200:
-            # Fallback para lista conhecida
-            return KNOWN_VALID_TICKERS, {}, []
-        
-        data = response.json()
-        stocks = data.get('stocks', [])
-        
-        bdrs = []
-        mapping = {}
-        us_tickers = []
-        
-        for stock in stocks:
-            ticker_br = stock.get('stock', '')
-            name = stock.get('name', '')
-            
-            if ticker_br.endswith('34') or ticker_br.endswith('35'):
-                # Extrair ticker base
-                ticker_base = ticker_br[:-2]
-                
-                # Aplicar correções conhecidas
-                ticker_us = TICKER_CORRECTIONS.get(ticker_base, ticker_base)
-                
-                # Validar se ticker parece válido (formato US)
-                # Tickers US geralmente são 1-5 letras maiúsculas
-                if (len(ticker_us) >= 1 and 
-                    len(ticker_us) <= 5 and 
-                    ticker_us.isalpha() and 
-                    ticker_us.isupper()):
-                    
-                    # Se não está na lista conhecida, apenas adicionar se for comum
-                    if ticker_us in KNOWN_VALID_TICKERS or len(ticker_us) <= 4:
-                        bdrs.append({
-                            'ticker_br': ticker_br,
-                            'ticker_us': ticker_us,
-                            'name': name,
-                            'type': stock.get('type', 'stock')
-                        })
-                        
-                        mapping[ticker_us] = ticker_br
-                        us_tickers.append(ticker_us)
-        
-        # Remover duplicatas e ordenar
-        us_tickers = sorted(list(set(us_tickers)))
-        
-        # Se encontrou poucos, usar lista conhecida
-        if len(us_tickers) < 50:
-            us_tickers = KNOWN_VALID_TICKERS
-            mapping = {t: f"{t}34" for t in us_tickers}
-        
-        return us_tickers, mapping, bdrs
-    
-    except Exception as e:
-        # Em caso de erro, usar lista conhecida
-        return KNOWN_VALID_TICKERS, {t: f"{t}34" for t in KNOWN_VALID_TICKERS}, []
+    if 'fetch_session' not in st.session_state:
+        st.session_state.fetch_session = uuid.uuid4().hex
+    get_fetch_scheduler().prioritize(st.session_state.fetch_session, [
+        list(visible),
+        ALL_US_TICKERS[:100],
+        ALL_US_TICKERS if scheduler.FETCH_UNIVERSE else [],
+    ])
 
-# ============================================================
-# FUNÇÕES DE CACHE (Atualizadas)
-# ============================================================
+def get_bdr_quotes(symbols):
+    """Cotações das BDRs em lote (cache por símbolo no cliente, comum às sessões)"""
+    import quotes
+    return quotes.get_quotes(list(symbols))
 
-@st.cache_data(ttl=1800)
-def get_news_data(ticker):
-    """Busca notícias via Finnhub"""
-    from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-    to_date = datetime.now().strftime('%Y-%m-%d')
-    url = f'https://finnhub.io/api/v1/company-news?symbol={ticker}&from={from_date}&to={to_date}&token={FINNHUB_API_KEY}'
-    
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        pass
-    return []
+SEARCH_LIMIT = 15
+SEARCH_BROWSE = 50
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_search_index(universe, n_named, _mapping, _bdrs_info):
+    """Índice de busca do universo; só é remontado quando o universo muda"""
+    import search
+    return search.build(list(universe), _mapping, _bdrs_info)
+
+# O ranking muda pouco ao longo do pregão: TTL próprio, bem maior que o das
+# cotações, para não trocar a seleção (e refazer a coleta) a cada minuto
+LIQUIDITY_TTL = 1800
+
+@st.cache_data(ttl=LIQUIDITY_TTL, show_spinner=False)
+def get_liquidity_ranking(br_symbols):
+    """BDRs com cotação, da maior para a menor liquidez"""
+    table = get_bdr_quotes(br_symbols)
+    if table.empty:
+        return []
+    return table['liquidity'].dropna().sort_values(ascending=False, kind='stable').index.tolist()
 
-@st.cache_data(ttl=3600)
-def get_fundamental_data(ticker):
-    """Busca dados fundamentalistas com validação rigorosa"""
+def top_by_liquidity(n):
+    """
+    Top N por volume financeiro na B3, em ordem alfabética; fixado na sessão
+    até o "🔄 Atualizar" para a seleção não mudar entre interações
+    """
+    pinned = st.session_state.get('liquidity_tickers')
+    if pinned is not None and pinned[0] == (n, len(ALL_US_TICKERS)):
+        return pinned[1]
+    by_br = {br: us for us, br in TICKER_MAPPING.items()}
+    ranking = get_liquidity_ranking(tuple(by_br))
+    if not ranking:
+        # Sem cotações: não guarda o vazio, tenta de novo na próxima interação
+        get_liquidity_ranking.clear()
+        return ALL_US_TICKERS[:n]
+    selection = sorted(by_br[t] for t in ranking[:n])
+    st.session_state.liquidity_tickers = ((n, len(ALL_US_TICKERS)), selection)
+    return selection
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_usd_brl():
+    import premium
+    return premium.fetch_usd_brl()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_price_metrics():
+    """Métricas de preço do armazém local (prices.py update), sem rede"""
     try:
-        acao = yf.Ticker(ticker)
-        info = acao.get_info()
-        
-        # Validação inicial
-        if not info or len(info) < 5:
-            return None
-        
-        market_cap = info.get('marketCap', 0)
-        if not market_cap or market_cap <= 0:
-            return None
-        
-        pe_ratio = info.get('forwardPE') or info.get('trailingPE')
-        pb_ratio = info.get('priceToBook')
-        div_yield = info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
-        
-        # ROE
-        roe_medio = np.nan
-        try:
-            dre = acao.financials.T
-            balanco = acao.balance_sheet.T
-            
-            if dre.empty or balanco.empty:
-                return None
-            
-            roe_values = []
-            for idx in range(min(3, len(dre))):
-                try:
-                    lucro = dre.iloc[idx].get('Net Income', np.nan)
-                    pl = balanco.iloc[idx].get('Stockholders Equity', np.nan)
-                    
-                    if pd.notna(lucro) and pd.notna(pl) and pl != 0:
-                        roe = (lucro / pl) * 100
-                        if -100 < roe < 500:
-                            roe_values.append(roe)
-                except:
-                    pass
-            
-            if roe_values:
-                roe_medio = np.mean(roe_values)
-            else:
-                return None
-        except:
-            return None
-        
-        # Classificação
-        if roe_medio >= 30:
-            status, score = "🟢 Excelente", 95
-        elif roe_medio >= 20:
-            status, score = "🟢 Excelente", 85
-        elif roe_medio >= 15:
-            status, score = "🟡 Bom", 70
-        elif roe_medio >= 10:
-            status, score = "🟠 Atenção", 55
-        else:
-            status, score = "🔴 Fraco", 40
-        
-        if div_yield > 4:
-            score += 5
-        if pd.notna(pe_ratio) and pe_ratio > 50:
-            score -= 5
-        
-        return {
-            'ticker': ticker,
-            'market_cap': market_cap / 1e9,
-            'pe': pe_ratio if pd.notna(pe_ratio) else np.nan,
-            'pb': pb_ratio if pd.notna(pb_ratio) else np.nan,
-            'div_yield': div_yield,
-            'roe': roe_medio,
-            'status': status,
-            'score': max(0, min(100, score)),
-            'setor': info.get('sector', 'N/A'),
-            'price': info.get('currentPrice', 0)
-        }
-    except Exception as e:
+        import prices
+        return prices.metrics()
+    except Exception:
         return None
 
-@st.cache_data(ttl=3600)
-def get_polymarket_data():
-    """Busca dados do Polymarket"""
-    try:
-        response = requests.get(
-            "https://clob.polymarket.com/markets",
-            params={"limit": 2000, "closed": "false"},
-            timeout=15
-        )
-        data = response.json().get("data", [])
-        return pd.DataFrame(data)
-    except:
-        return pd.DataFrame()
+@st.cache_resource
+def get_history_store():
+    """Histórico em disco compartilhado por todas as sessões"""
+    import history
+    return history.HistoryStore()
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def share_fundamentals(content_hash, _frame):
+    """Uma instância por conteúdo: sessões com os mesmos dados dividem o frame"""
+    return _frame
+
+@st.cache_resource
+def get_sector_index():
+    """Percentis/z-scores por setor de todos os tickers já coletados (do processo)"""
+    import sectors
+    return sectors.SectorIndex()
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_scored_fundamentals(content_hash, model, models_version, sectors_version, _frame):
+    """
+    Posições no setor (pct_/z_) + colunas score_<modelo> de todos os modelos;
+    `model` define score/status
+    """
+    frame = _frame.join(get_sector_index().frame(_frame.index.tolist()))
+    return scoring.get_models().apply(frame, primary=model)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_filtered_fundamentals(content_hash, filters, _frame):
+    """Recorte filtrado compartilhado (somente leitura); sem cópia se nada sai"""
+    mask = filter_fundamentals(_frame, *filters)
+    return _frame if mask.all() else _frame[mask]
+
+@st.cache_resource
+def get_alert_engine():
+    """Motor de alertas do processo (avalia em segundo plano quando chegam dados)"""
+    import alerts
+    return alerts.AlertEngine()
+
+@st.cache_resource
+def get_metrics_server():
+    """Endpoint Prometheus local (BDR_METRICS_PORT, 0 desativa)"""
+    return instrumentation.start_metrics_server()
 
 # ============================================================
 # FUNÇÕES DE UTILIDADE
 # ============================================================
 
-def save_to_history(data_type, data):
-    """Salva no histórico"""
-    try:
-        if 'history' not in st.session_state:
-            st.session_state.history = []
-        
-        st.session_state.history.append({
-            'timestamp': datetime.now().isoformat(),
-            'type': data_type,
-            'data': data
-        })
-        
-        if len(st.session_state.history) > 100:
-            st.session_state.history = st.session_state.history[-100:]
-        
-        return True
-    except:
-        return False
-
-def get_recommendations(df):
-    """Gera recomendações"""
-    recommendations = []
-    
-    # Value
-    good_value = df[(df['roe'] > 20) & (df['pe'] < 20)]
-    if not good_value.empty:
-        recommendations.append({
-            'tipo': '💎 Value',
-            'tickers': good_value.nlargest(3, 'roe')['ticker'].tolist(),
-            'razao': 'Alto ROE com P/E atrativo',
-            'cor': 'success'
-        })
-    
-    # Dividendos
-    high_div = df[df['div_yield'] > 4].nlargest(3, 'div_yield')
-    if not high_div.empty:
-        recommendations.append({
-            'tipo': '💰 Dividendos',
-            'tickers': high_div['ticker'].tolist(),
-            'razao': 'Dividend Yield > 4%',
-            'cor': 'info'
-        })
-    
-    # Growth
-    growth = df[(df['roe'] > 25) & (df['pe'] > 30)]
-    if not growth.empty:
-        recommendations.append({
-            'tipo': '🚀 Growth',
-            'tickers': growth.nlargest(3, 'roe')['ticker'].tolist(),
-            'razao': 'Alto crescimento',
-            'cor': 'warning'
-        })
-    
-    return recommendations
-
-def create_excel_download(dfs_dict):
-    """Cria Excel"""
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        for sheet_name, df in dfs_dict.items():
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-    return buffer.getvalue()
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_csv_export(content_hash, _df):
+    """CSV memorizado pelo hash do conteúdo"""
+    return exports.build_csv(_df)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_table_export(kind, fmt, content_hash, _df):
+    """Parquet/Arrow (schema estável) memorizado pelo hash do conteúdo"""
+    if fmt == 'parquet':
+        return exports.build_parquet(_df, kind)
+    return exports.build_arrow(_df, kind)
+
+def columnar_download_buttons(label, df, kind, prefix):
+    """Botões Parquet + Arrow IPC (gerados só no clique)"""
+    stamp = datetime.now().strftime('%Y%m%d')
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        f"{label} (Parquet)",
+        lambda: get_table_export(kind, 'parquet', exports.frame_hash(df), df),
+        f"{prefix}_{stamp}.parquet",
+        "application/vnd.apache.parquet",
+        key=f"dl_{kind}_parquet"
+    )
+    col2.download_button(
+        f"{label} (Arrow)",
+        lambda: get_table_export(kind, 'arrow', exports.frame_hash(df), df),
+        f"{prefix}_{stamp}.arrow",
+        "application/vnd.apache.arrow.file",
+        key=f"dl_{kind}_arrow"
+    )
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_excel_export(content_hash, _news, _fund, total_bdrs, n_selected):
+    """Excel completo memorizado pelo hash do conteúdo"""
+    return exports.build_excel({
+        'Notícias': _news,
+        'Fundamentos': _fund,
+        'Resumo': pd.DataFrame([{
+            'Total_BDRs': total_bdrs,
+            'Analisadas': n_selected,
+            'Fundamentos': len(_fund),
+            'ROE_Medio': _fund['roe'].mean(),
+            'Data': datetime.now().strftime('%Y-%m-%d %H:%M')
+        }])
+    })
 
 def create_correlation_heatmap(df):
     """Cria heatmap"""
     numeric_cols = ['roe', 'pe', 'pb', 'div_yield', 'market_cap', 'score']
     df_numeric = df[numeric_cols].dropna()
-    
+
     if len(df_numeric) < 2:
         return None
-    
+
+    import plotly.express as px
+
     corr_matrix = df_numeric.corr()
-    
-    fig = ff.create_annotated_heatmap(
-        z=corr_matrix.values,
-        x=list(corr_matrix.columns),
-        y=list(corr_matrix.index),
-        annotation_text=corr_matrix.round(2).values,
-        colorscale='RdYlGn',
-        showscale=True
+
+    # figure_factory.create_annotated_heatmap foi removido no plotly 7
+    fig = px.imshow(
+        corr_matrix.round(2),
+        text_auto=True,
+        color_continuous_scale='RdYlGn',
+        aspect='auto'
     )
-    
+
     fig.update_layout(title='Matriz de Correlação', height=500)
     return fig
 
@@ -395,271 +298,123 @@ def create_correlation_heatmap(df):
 # BUSCAR BDRs
 # ============================================================
 
-ALL_US_TICKERS, TICKER_MAPPING, ALL_BDRS_INFO = get_all_bdrs_from_brapi()
 
-# ============================================================
-# SIDEBAR
-# ============================================================
-
-st.sidebar.markdown("## ⚙️ Configurações")
-
-if ALL_US_TICKERS:
-    st.sidebar.success(f"📊 **{len(ALL_US_TICKERS)} BDRs** validadas")
-else:
-    st.sidebar.warning("⚠️ Usando lista padrão")
-
-# Tipo de análise
-analysis_type = st.sidebar.radio(
-    "Tipo de Análise",
-    ["📊 Dashboard Completo", "📰 Notícias", "💼 Fundamentos", 
-     "🎯 Polymarket", "🔍 Comparador", "📋 Lista BDRs"],
-    key="analysis_type"
-)
-
-# Seleção
-st.sidebar.markdown("### 📋 Seleção")
-
-if ALL_US_TICKERS:
-    selection_mode = st.sidebar.radio(
-        "Modo",
-        ["🎯 Top 50", "📊 Top 100", "✏️ Personalizado"],
-        key="selection_mode"
-    )
-    
-    if selection_mode == "🎯 Top 50":
-        selected_tickers = ALL_US_TICKERS[:50]
-    elif selection_mode == "📊 Top 100":
-        selected_tickers = ALL_US_TICKERS[:100]
-    else:
-        selected_tickers = st.sidebar.multiselect(
-            "Selecione",
-            ALL_US_TICKERS,
-            default=ALL_US_TICKERS[:20],
-            key="custom_tickers"
-        )
-else:
-    selected_tickers = KNOWN_VALID_TICKERS[:50]
-
-# Filtros
-st.sidebar.markdown("### 🎛️ Filtros")
-
-with st.sidebar.expander("💼 Fundamentais"):
-    roe_range = st.slider("ROE (%)", 0.0, 200.0, (0.0, 200.0))
-    pe_range = st.slider("P/E", 0.0, 100.0, (0.0, 100.0))
-    div_yield_min = st.slider("Div Yield Mín (%)", 0.0, 10.0, 0.0)
-    market_cap_min = st.number_input("Market Cap Mín (B)", 0.0, 5000.0, 0.0)
-
-with st.sidebar.expander("📊 Análise"):
-    min_score = st.slider("Score Mínimo", 0, 100, 20)
-
-# Alertas
-st.sidebar.markdown("### 🔔 Alertas")
-with st.sidebar.expander("Configurar"):
-    alert_score = st.slider("Alerta Score ≥", 0, 100, 80)
-    alert_roe = st.slider("Alerta ROE ≥ (%)", 0, 100, 25)
-
-# Visual
-st.sidebar.markdown("### 🎨 Visual")
-with st.sidebar.expander("Layout"):
-    show_charts = st.checkbox("Gráficos", True)
-
-# Botões
-st.sidebar.markdown("---")
-col1, col2 = st.sidebar.columns(2)
-with col1:
-    if st.button("🔄 Atualizar", type="primary"):
-        st.cache_data.clear()
-        st.rerun()
-
-# Info
-st.sidebar.markdown("---")
-st.sidebar.markdown(f"**Ativos:** {len(selected_tickers)}")
-st.sidebar.markdown(f"_{datetime.now().strftime('%d/%m/%Y %H:%M')}_")
+@st.fragment(run_every=2)
+def wait_for_universe():
+    """Recarrega a página quando o universo em background fica pronto"""
+    if universe_loader.ready:
+        st.rerun(scope="app")
+    st.caption("⏳ Carregando BDRs da B3...")
 
 # ============================================================
-# HEADER
+# SEÇÕES DO DASHBOARD (FRAGMENTS)
 # ============================================================
+# Cada seção com widgets próprios é um st.fragment: mudar um slider de
+# alerta ou o checkbox de gráficos reexecuta só aquela seção.
 
-st.markdown('<h1 class="main-header">📊 Dashboard Completo de BDRs</h1>', 
-            unsafe_allow_html=True)
-
-if ALL_US_TICKERS:
-    st.info(f"""
-    🎉 **{len(selected_tickers)} de {len(ALL_US_TICKERS)} BDRs validadas** | 
-    Dados em tempo real via Yahoo Finance, Finnhub e Polymarket
-    """)
-
-# ============================================================
-# LISTA DE BDRs
-# ============================================================
-
-if analysis_type == "📋 Lista BDRs":
-    st.subheader("📋 Lista de BDRs Validadas")
-    
-    if ALL_BDRS_INFO:
-        df_bdrs = pd.DataFrame(ALL_BDRS_INFO)
-        
-        col1, col2 = st.columns(2)
-        col1.metric("Total", len(df_bdrs))
-        col2.metric("Nível 1 (34)", len(df_bdrs[df_bdrs['ticker_br'].str.endswith('34')]))
-        
-        st.dataframe(df_bdrs, width=None, hide_index=True)
-        
-        csv = df_bdrs.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            "📥 Download Lista (CSV)",
-            csv,
-            f"bdrs_{datetime.now().strftime('%Y%m%d')}.csv",
-            "text/csv"
-        )
-    elif KNOWN_VALID_TICKERS:
-        st.success(f"✅ Usando lista curada de {len(KNOWN_VALID_TICKERS)} BDRs conhecidas")
-        
-        df_known = pd.DataFrame({
-            'ticker_us': KNOWN_VALID_TICKERS,
-            'ticker_br': [f"{t}34" for t in KNOWN_VALID_TICKERS]
-        })
-        
-        st.dataframe(df_known, width=None, hide_index=True)
-
-# ============================================================
-# DASHBOARD COMPLETO
-# ============================================================
+def acquire_dashboard_data(tickers):
+    """
+    Busca notícias + fundamentos (sem filtros) para a seleção
+    Memorizado na sessão: o laço só roda de novo quando a seleção muda
+    """
+    key = tuple(tickers)
+    cached = st.session_state.get('dashboard_data')
+    if cached is not None and cached['key'] == key:
+        return cached
 
-elif analysis_type == "📊 Dashboard Completo":
-    
-    if not selected_tickers:
-        st.warning("⚠️ Selecione tickers no sidebar")
-        st.stop()
-    
     # Progress
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
+
     # Notícias
-    status_text.text(f"📰 Analisando notícias de {len(selected_tickers)} BDRs...")
+    status_text.text(f"📰 Analisando notícias de {len(tickers)} BDRs...")
     progress_bar.progress(10)
-    
+
     news_opps = []
-    news_limit = min(30, len(selected_tickers))  # Reduzido para evitar timeout
-    
-    for i, ticker in enumerate(selected_tickers[:news_limit]):
-        news = get_news_data(ticker)
-        
-        if news:
-            try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
-                
-                score = 50
-                events = []
-                priority = "🟡 Média"
-                
-                # Earnings
-                try:
-                    calendar = stock.calendar
-                    if calendar is not None and 'Earnings Date' in calendar:
-                        earnings_date = calendar['Earnings Date']
-                        if isinstance(earnings_date, list) and len(earnings_date) > 0:
-                            date_obj = earnings_date[0]
-                            days_until = (datetime(date_obj.year, date_obj.month, date_obj.day) - datetime.now()).days
-                            
-                            if 0 < days_until <= 3:
-                                score += 40
-                                events.append(f"⚡ Earnings em {days_until} dias")
-                                priority = "🔴 Urgente"
-                            elif days_until <= 7:
-                                score += 30
-                                events.append(f"Earnings em {days_until} dias")
-                                priority = "🔴 Urgente"
-                            elif days_until <= 14:
-                                score += 20
-                                events.append(f"Earnings em {days_until} dias")
-                                priority = "🟠 Alta"
-                except:
-                    pass
-                
-                # Dividendos
-                if info.get('dividendYield') and info.get('dividendYield') > 0:
-                    div_yield = info.get('dividendYield') * 100
-                    score += 15
-                    events.append(f"Div: {div_yield:.2f}%")
-                
-                if len(news) > 5:
-                    score += 10
-                    events.append(f"{len(news)} notícias")
-                
-                if events or score > 60:
-                    news_opps.append({
-                        'ticker': ticker,
-                        'bdr': TICKER_MAPPING.get(ticker, f"{ticker}34"),
-                        'score': score,
-                        'priority': priority,
-                        'events': ', '.join(events) if events else 'Notícias'
-                    })
-            except:
-                pass
-        
-        time.sleep(0.1)
-        progress_bar.progress(10 + int((i / news_limit) * 30))
-    
+    news_limit = min(screening.NEWS_LIMIT, len(tickers))  # Reduzido para evitar timeout
+
+    with stage('news'):
+        for i, ticker in enumerate(tickers[:news_limit]):
+            news = get_news_data(ticker)
+            opp = get_news_opportunity(ticker, news, TICKER_MAPPING)
+            if opp:
+                news_opps.append(opp)
+
+            time.sleep(0.1)
+            progress_bar.progress(10 + int((i / news_limit) * 30))
+
     # Fundamentos
-    status_text.text(f"💼 Analisando fundamentos...")
+    status_text.text("💼 Analisando fundamentos...")
     progress_bar.progress(45)
-    
-    fund_data = []
-    fund_limit = min(50, len(selected_tickers))  # Reduzido
-    
-    total_tentativas = sem_dados = filtrados = 0
-    
-    for i, ticker in enumerate(selected_tickers[:fund_limit]):
-        total_tentativas += 1
-        data = get_fundamental_data(ticker)
-        
-        if data:
-            if (roe_range[0] <= data.get('roe', 0) <= roe_range[1] and
-                pe_range[0] <= data.get('pe', 0) <= pe_range[1] and
-                data.get('div_yield', 0) >= div_yield_min and
-                data.get('market_cap', 0) >= market_cap_min):
-                fund_data.append(data)
-            else:
-                filtrados += 1
-        else:
-            sem_dados += 1
-        
-        time.sleep(0.05)
-        progress_bar.progress(45 + int((i / fund_limit) * 45))
-    
+
+    fund_limit = min(screening.FUND_LIMIT, len(tickers))  # Reduzido
+
+    total_tentativas = sem_dados = 0
+
+    # Busca pelo agendador: estes tickers passam na frente da fila; a
+    # tabela sai na ordem da seleção, não na de chegada
+    with stage('fundamentals'):
+        arrived = {}
+        for i, (ticker, data) in enumerate(fetch_fundamentals(tickers[:fund_limit])):
+            total_tentativas += 1
+            arrived[ticker] = data
+            if not data:
+                sem_dados += 1
+            progress_bar.progress(45 + int(((i + 1) / fund_limit) * 45))
+        fund_raw = [arrived[t] for t in dict.fromkeys(tickers[:fund_limit]) if arrived.get(t)]
+
     # Polymarket
     status_text.text("🎯 Polymarket...")
-    poly_markets = get_polymarket_data()
-    
+    with stage('polymarket'):
+        get_polymarket_data()
+
     progress_bar.progress(100)
     status_text.text("✅ Concluído!")
     time.sleep(0.3)
     progress_bar.empty()
     status_text.empty()
-    
-    # Stats debug
-    with st.expander("ℹ️ Estatísticas"):
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Tentativas", total_tentativas)
-        col2.metric("Com Dados", total_tentativas - sem_dados)
-        col3.metric("Filtrados", filtrados)
-        col4.metric("Final", len(fund_data))
-    
-    # Métricas
+
+    # Snapshot do dia no histórico (a sessão guarda só o caminho do part)
+    try:
+        history_part = get_history_store().append(fund_raw)
+    except Exception:
+        history_part = None
+
+    # Tabela canônica (compartilhada); os dicts não ficam na sessão
+    frame = fundamentals_frame(fund_raw, get_price_metrics())
+    frame_key = exports.frame_hash(frame)
+
+    # Dados novos: alertas avaliados uma vez, fora da sessão (só os deltas)
+    if history_part:
+        get_alert_engine().submit(frame)
+    # Índice setorial: recalcula só os setores com tickers alterados
+    get_sector_index().refresh(frame)
+
+    result = {
+        'key': key,
+        'news_opps': news_opps,
+        'fundamentals': share_fundamentals(frame_key, frame),
+        'fundamentals_key': frame_key,
+        'total_tentativas': total_tentativas,
+        'sem_dados': sem_dados,
+        'history_part': history_part,
+    }
+    st.session_state.dashboard_data = result
+    return result
+
+def render_metric_cards(n_selected, news_opps, df_fund, excelentes):
+    """Cards de métricas do topo"""
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='margin:0; font-size:0.9rem;'>📊 Analisadas</h3>
-            <h1 style='margin:10px 0; font-size:2.5rem;'>{len(selected_tickers)}</h1>
+            <h1 style='margin:10px 0; font-size:2.5rem;'>{n_selected}</h1>
             <p style='margin:0; font-size:0.8rem; opacity:0.9;'>BDRs</p>
         </div>
         """, unsafe_allow_html=True)
-    
+
     with col2:
         st.markdown(f"""
         <div class='metric-card'>
@@ -668,19 +423,18 @@ elif analysis_type == "📊 Dashboard Completo":
             <p style='margin:0; font-size:0.8rem; opacity:0.9;'>oportunidades</p>
         </div>
         """, unsafe_allow_html=True)
-    
+
     with col3:
-        excelentes = len([f for f in fund_data if f['status'] == '🟢 Excelente']) if fund_data else 0
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='margin:0; font-size:0.9rem;'>💼 Fundamentos</h3>
-            <h1 style='margin:10px 0; font-size:2.5rem;'>{len(fund_data)}</h1>
+            <h1 style='margin:10px 0; font-size:2.5rem;'>{len(df_fund)}</h1>
             <p style='margin:0; font-size:0.8rem; opacity:0.9;'>{excelentes} excelentes</p>
         </div>
         """, unsafe_allow_html=True)
-    
+
     with col4:
-        avg_roe = np.mean([f['roe'] for f in fund_data if pd.notna(f.get('roe'))]) if fund_data else 0
+        avg_roe = df_fund['roe'].mean() if len(df_fund) else 0
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='margin:0; font-size:0.9rem;'>📊 ROE Médio</h3>
@@ -688,115 +442,137 @@ elif analysis_type == "📊 Dashboard Completo":
             <p style='margin:0; font-size:0.8rem; opacity:0.9;'>retorno/capital</p>
         </div>
         """, unsafe_allow_html=True)
-    
+
     st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Alertas
-    if fund_data:
-        df_fund = pd.DataFrame(fund_data)
-        
-        high_score = df_fund[df_fund['score'] >= alert_score]
-        if not high_score.empty:
-            tickers_list = ', '.join(high_score['ticker'].tolist()[:8])
-            if len(high_score) > 8:
-                tickers_list += f" +{len(high_score)-8}"
-            
-            st.markdown(f"""
-            <div class='alert-box alert-danger'>
-                <strong>🚨 {len(high_score)} ALERTAS!</strong><br>
-                Score ≥ {alert_score}: {tickers_list}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        high_roe = df_fund[df_fund['roe'] >= alert_roe]
-        if not high_roe.empty:
-            tickers_list = ', '.join(high_roe['ticker'].tolist()[:8])
-            if len(high_roe) > 8:
-                tickers_list += f" +{len(high_roe)-8}"
-            
-            st.markdown(f"""
-            <div class='alert-box alert-info'>
-                <strong>💎 {len(high_roe)} ROE Excepcional!</strong><br>
-                ROE ≥ {alert_roe}%: {tickers_list}
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Recomendações
-    if fund_data:
-        st.markdown("### 🤖 Recomendações")
-        
+
+@st.fragment
+def render_alerts(df_fund):
+    """Alertas de score/ROE (limiares configurados dentro do fragment)"""
+    with st.expander("🔔 Configurar Alertas"):
+        col1, col2 = st.columns(2)
+        alert_score = col1.slider("Alerta Score ≥", 0, 100, 80, key="alert_score")
+        alert_roe = col2.slider("Alerta ROE ≥ (%)", 0, 100, 25, key="alert_roe")
+
+    high_score = df_fund[df_fund['score'] >= alert_score]
+    if not high_score.empty:
+        tickers_list = ', '.join(high_score.index[:8])
+        if len(high_score) > 8:
+            tickers_list += f" +{len(high_score)-8}"
+
+        st.markdown(f"""
+        <div class='alert-box alert-danger'>
+            <strong>🚨 {len(high_score)} ALERTAS!</strong><br>
+            Score ≥ {alert_score}: {tickers_list}
+        </div>
+        """, unsafe_allow_html=True)
+
+    high_roe = df_fund[df_fund['roe'] >= alert_roe]
+    if not high_roe.empty:
+        tickers_list = ', '.join(high_roe.index[:8])
+        if len(high_roe) > 8:
+            tickers_list += f" +{len(high_roe)-8}"
+
+        st.markdown(f"""
+        <div class='alert-box alert-info'>
+            <strong>💎 {len(high_roe)} ROE Excepcional!</strong><br>
+            ROE ≥ {alert_roe}%: {tickers_list}
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Disparos persistidos pelo motor (cruzamentos de limiar entre coletas)
+    fired = get_alert_engine().recent(10)
+    if fired:
+        with st.expander(f"📬 Últimos alertas disparados ({len(fired)})"):
+            for alert in fired:
+                st.markdown(f"`{alert['quando'][:16].replace('T', ' ')}` {alert['titulo']} — "
+                            f"**{alert['ticker']}** ({alert['metrica']} = {alert['valor']})")
+
+def render_recommendations(df_fund):
+    """Cards de recomendações"""
+    st.markdown("### 🤖 Recomendações")
+
+    with stage('scoring'):
         recommendations = get_recommendations(df_fund)
-        
-        if recommendations:
-            cols = st.columns(min(len(recommendations), 4))
-            
-            for i, rec in enumerate(recommendations[:4]):
-                with cols[i]:
-                    tickers_str = ', '.join(rec['tickers'][:3])
-                    if len(rec['tickers']) > 3:
-                        tickers_str += f" +{len(rec['tickers'])-3}"
-                    
-                    st.markdown(f"""
-                    <div style='background: #f8f9fa; padding: 1rem; border-radius: 10px; 
-                                border-left: 4px solid {"#27ae60" if rec["cor"] == "success" else "#3498db"};'>
-                        <h4 style='margin: 0 0 0.5rem 0;'>{rec['tipo']}</h4>
-                        <p style='margin: 0; font-size: 0.9rem;'><strong>{tickers_str}</strong></p>
-                        <p style='margin: 0.5rem 0 0 0; font-size: 0.85rem; color: #666;'>{rec['razao']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📰 Notícias", "💼 Fundamentos", "📊 Gráficos", "📥 Exportar"])
-    
-    with tab1:
-        st.subheader(f"📰 {len(news_opps)} Oportunidades")
-        
-        if news_opps:
-            df_news = pd.DataFrame(news_opps).sort_values('score', ascending=False)
-            
-            if 'priority' in df_news.columns:
-                col1, col2, col3 = st.columns(3)
-                urgentes = len(df_news[df_news['priority'] == '🔴 Urgente'])
-                altas = len(df_news[df_news['priority'] == '🟠 Alta'])
-                medias = len(df_news[df_news['priority'] == '🟡 Média'])
-                
-                col1.metric("🔴 Urgentes", urgentes)
-                col2.metric("🟠 Altas", altas)
-                col3.metric("🟡 Médias", medias)
-            
-            st.dataframe(df_news, width=None, hide_index=True)
-        else:
-            st.info("📭 Nenhuma notícia relevante")
-    
-    with tab2:
-        st.subheader(f"💼 {len(fund_data)} Empresas")
-        
-        if fund_data:
-            col1, col2, col3, col4 = st.columns(4)
-            col1.metric("ROE Médio", f"{df_fund['roe'].mean():.1f}%")
-            col2.metric("P/E Médio", f"{df_fund['pe'].mean():.1f}")
-            col3.metric("Div Yield", f"{df_fund['div_yield'].mean():.2f}%")
-            col4.metric("Excelentes", excelentes)
-            
-            st.dataframe(
-                df_fund.sort_values('score', ascending=False),
-                width=None,
-                hide_index=True
-            )
+
+    # Uma linha de até 4 cards por vez (as telas vêm de screens.json)
+    for start in range(0, len(recommendations), 4):
+        row = recommendations[start:start + 4]
+        cols = st.columns(min(len(recommendations), 4))
+
+        for i, rec in enumerate(row):
+            with cols[i]:
+                tickers_str = ', '.join(rec['tickers'][:3])
+                if len(rec['tickers']) > 3:
+                    tickers_str += f" +{len(rec['tickers'])-3}"
+
+                st.markdown(f"""
+                <div style='background: #f8f9fa; padding: 1rem; border-radius: 10px; 
+                            border-left: 4px solid {"#27ae60" if rec["cor"] == "success" else "#3498db"};'>
+                    <h4 style='margin: 0 0 0.5rem 0;'>{rec['tipo']}</h4>
+                    <p style='margin: 0; font-size: 0.9rem;'><strong>{tickers_str}</strong></p>
+                    <p style='margin: 0.5rem 0 0 0; font-size: 0.85rem; color: #666;'>{rec['razao']}</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+@st.fragment
+def render_news_table(news_opps):
+    """Tabela de oportunidades de notícias"""
+    st.subheader(f"📰 {len(news_opps)} Oportunidades")
+
+    if news_opps:
+        df_news = pd.DataFrame(news_opps).sort_values('score', ascending=False)
+
+        if 'priority' in df_news.columns:
+            col1, col2, col3 = st.columns(3)
+            urgentes = len(df_news[df_news['priority'] == '🔴 Urgente'])
+            altas = len(df_news[df_news['priority'] == '🟠 Alta'])
+            medias = len(df_news[df_news['priority'] == '🟡 Média'])
+
+            col1.metric("🔴 Urgentes", urgentes)
+            col2.metric("🟠 Altas", altas)
+            col3.metric("🟡 Médias", medias)
+
+        st.dataframe(df_news, hide_index=True)
+    else:
+        st.info("📭 Nenhuma notícia relevante")
+
+@st.fragment
+def render_fundamentals_table(df_fund, excelentes):
+    """Tabela de fundamentos"""
+    st.subheader(f"💼 {0 if df_fund is None else len(df_fund)} Empresas")
+
+    if df_fund is not None:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("ROE Médio", f"{df_fund['roe'].mean():.1f}%")
+        col2.metric("P/E Médio", f"{df_fund['pe'].mean():.1f}")
+        col3.metric("Div Yield", f"{df_fund['div_yield'].mean():.2f}%")
+        col4.metric("Excelentes", excelentes)
+
+        # Já ordenado por score; o índice é o ticker. Posições no setor sob demanda
+        if st.toggle("🏷️ Posição no setor", key="sector_toggle",
+                     help="Percentil (pct_) e z-score (z_) de cada métrica entre os pares do setor"):
+            st.dataframe(df_fund)
         else:
-            st.info("📊 Sem dados")
-    
-    with tab3:
-        if show_charts and fund_data:
+            st.dataframe(df_fund.drop(columns=[c for c in df_fund.columns if c.startswith(('pct_', 'z_'))]))
+    else:
+        st.info("📊 Sem dados")
+
+@st.fragment
+def render_charts(df_fund):
+    """Gráficos (checkbox dentro do fragment)"""
+    show_charts = st.checkbox("Gráficos", True, key="show_charts")
+
+    if show_charts and df_fund is not None:
+        with stage('charts'):
+            import plotly.express as px
+
             # Top 15
             fig1 = px.bar(
-                df_fund.nlargest(15, 'score'),
+                df_fund.head(15).reset_index(),
                 x='ticker',
                 y='score',
                 color='status',
-                title=f'Top 15 por Score',
+                title='Top 15 por Score',
                 color_discrete_map={
                     '🟢 Excelente': '#27ae60',
                     '🟡 Bom': '#f39c12',
@@ -804,8 +580,8 @@ elif analysis_type == "📊 Dashboard Completo":
                     '🔴 Fraco': '#e74c3c'
                 }
             )
-            st.plotly_chart(fig1, use_container_width=True)
-            
+            st.plotly_chart(fig1, width="stretch")
+
             # ROE vs P/E
             fig2 = px.scatter(
                 df_fund,
@@ -813,58 +589,531 @@ elif analysis_type == "📊 Dashboard Completo":
                 y='roe',
                 size='market_cap',
                 color='status',
-                hover_data=['ticker'],
+                hover_name=df_fund.index,
                 title='ROE vs P/E'
             )
-            st.plotly_chart(fig2, use_container_width=True)
-            
+            st.plotly_chart(fig2, width="stretch")
+
             # Heatmap
             corr_fig = create_correlation_heatmap(df_fund)
             if corr_fig:
-                st.plotly_chart(corr_fig, use_container_width=True)
-    
-    with tab4:
-        st.subheader("📥 Exportar")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if fund_data:
-                csv = df_fund.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    "💼 Fundamentos (CSV)",
-                    csv,
-                    f"fundamentos_{datetime.now().strftime('%Y%m%d')}.csv",
-                    "text/csv"
-                )
-        
-        with col2:
-            if news_opps and fund_data:
-                excel = create_excel_download({
-                    'Notícias': pd.DataFrame(news_opps),
-                    'Fundamentos': df_fund,
-                    'Resumo': pd.DataFrame([{
-                        'Total_BDRs': len(ALL_US_TICKERS),
-                        'Analisadas': len(selected_tickers),
-                        'Fundamentos': len(fund_data),
-                        'ROE_Medio': df_fund['roe'].mean(),
-                        'Data': datetime.now().strftime('%Y-%m-%d %H:%M')
-                    }])
-                })
-                
-                st.download_button(
-                    "📊 Completo (Excel)",
-                    excel,
-                    f"analise_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                    "application/vnd.ms-excel"
+                st.plotly_chart(corr_fig, width="stretch")
+
+@st.fragment
+def render_history(tickers):
+    """Métrica ao longo do tempo (lida do histórico em disco)"""
+    import history
+
+    store = get_history_store()
+    days = store.days()
+    if not days or not tickers:
+        st.info("📭 Histórico vazio: os snapshots diários aparecem a partir da próxima coleta")
+        return
+
+    col1, col2 = st.columns(2)
+    ticker = col1.selectbox("Ticker", tickers, key="history_ticker")
+    metric = col2.selectbox("Métrica", history.METRICS, index=history.METRICS.index('roe'),
+                            key="history_metric")
+
+    series = store.metric(ticker, metric)
+    st.caption(f"{len(days)} dias no histórico ({days[0]:%d/%m/%Y} a {days[-1]:%d/%m/%Y})")
+    if series.empty:
+        st.info(f"📭 Sem histórico para {ticker}")
+    else:
+        st.line_chart(series)
+
+@st.fragment
+def render_premium(mapping):
+    """Prêmio/desconto de cada BDR sobre o ativo-objeto (em BRL)"""
+    import premium
+
+    st.subheader("💱 Prêmio / Desconto")
+    if not st.toggle("Cotar BDRs na B3", key="premium_toggle",
+                     help="Cotações em lote na BRAPI + USD/BRL; cache de 1 a 5 min"):
+        return
+
+    pairs = pd.DataFrame({'ticker_us': list(mapping), 'ticker_br': list(mapping.values())})
+    with st.spinner("Cotando BDRs..."):
+        quotes = get_bdr_quotes(tuple(pairs['ticker_br']))
+        usd_brl = get_usd_brl()
+
+    # Preço US: armazém local (prices.py); senão, o da última coleta de fundamentos
+    dashboard = st.session_state.get('dashboard_data')
+    fallback = dashboard['fundamentals']['price'].astype('float64') if dashboard else None
+    table = premium.compute(pairs, quotes, premium.us_prices(pairs['ticker_us'], fallback), usd_brl)
+    quoted = table.dropna(subset=['valor_justo'])
+    priced = quoted.dropna(subset=['premio_pct'])
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("USD/BRL", f"{usd_brl:.4f}" if pd.notna(usd_brl) else "—")
+    col2.metric("Cotadas", f"{len(quoted)} / {len(table)}")
+    col3.metric("Prêmio Mediano", f"{priced['premio_pct'].median():.2f}%" if len(priced) else "—")
+    col4.metric("Razões Estimadas", int((quoted['razao_fonte'] == 'estimado').sum()))
+
+    st.dataframe(quoted.sort_values('premio_pct'))
+    if (quoted['razao_fonte'] == 'estimado').any():
+        st.caption("Razões 'estimado' são o padrão de BDR mais próximo da razão implícita: "
+                   "o valor justo é só indicativo e a linha fica sem prêmio e fora do z-score. "
+                   "Informe as razões conhecidas em bdr_ratios.csv.")
+
+# Tickers lado a lado no Comparador
+COMPARE_MAX = 6
+COMPARE_METRICS = [('roe', 'ROE (%)'), ('pe', 'P/E'), ('pb', 'P/VP'), ('div_yield', 'DY (%)'),
+                   ('market_cap', 'Mkt Cap (B)')]
+DUPONT_LABELS = {
+    'ano': 'Exercício', 'roe': 'ROE (%)', 'roe_medio': 'ROE 3a (%)',
+    'roe_avg_equity': 'ROE s/ PL Médio (%)', 'margin': 'Margem (%)', 'turnover': 'Giro',
+    'leverage': 'Alavancagem', 'revenue_growth': 'Cresc. Receita (%)',
+    'earnings_growth': 'Cresc. Lucro (%)', 'revenue_cagr': 'CAGR Receita 3a (%)',
+}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_statements_summary(tickers):
+    """DuPont / crescimento do último exercício (payloads em disco ou da rede)"""
+    import statements
+    summary = statements.summary(statements.load_universe(list(tickers)))
+    return summary.astype({'ano': 'Int64'})
+
+def get_compare_frame(tickers, score_model):
+    """
+    Linhas da tabela compartilhada da sessão; tickers fora dela vêm do cache
+    de fundamentos (rede só se o cache estiver frio). Pontuada pelo modelo
+    escolhido e com as posições no setor
+    """
+    data = st.session_state.get('dashboard_data')
+    base = data['fundamentals'] if data else None
+    have = [t for t in tickers if base is not None and t in base.index]
+    missing = [t for t in tickers if t not in have]
+
+    parts = [base.loc[have]] if have else []
+    if missing:
+        records = [d for _, d in fetch_fundamentals(missing) if d]
+        if records:
+            extra = fundamentals_frame(records, get_price_metrics())
+            get_sector_index().refresh(extra)
+            parts.append(extra)
+    if not parts:
+        return None
+    frame = pd.concat(parts) if len(parts) > 1 else parts[0]
+    frame = frame.reindex([t for t in tickers if t in frame.index])
+    frame = frame.join(get_sector_index().frame(frame.index.tolist()))
+    return scoring.get_models().apply(frame, primary=score_model).reindex(frame.index)
+
+def render_comparador(options, default, score_model):
+    """Até COMPARE_MAX tickers lado a lado + medianas dos setores"""
+    import plotly.graph_objects as go
+
+    st.subheader("🔍 Comparador de Tickers")
+    tickers = st.multiselect(f"Selecione até {COMPARE_MAX} tickers", options, default=default,
+                             max_selections=COMPARE_MAX, key="compare_tickers")
+    if not tickers:
+        st.info("Selecione tickers para comparar")
+        return
+
+    df_comp = get_compare_frame(tickers, score_model)
+    if df_comp is None or df_comp.empty:
+        st.warning("⚠️ Sem fundamentos para os tickers selecionados")
+        return
+
+    index = get_sector_index()
+    medians = {sector: index.medians(sector) for sector in df_comp['setor'].astype(object).unique()}
+
+    # Cards lado a lado; deltas contra a mediana do setor
+    cols = st.columns(len(df_comp))
+    for col, (ticker, row) in zip(cols, df_comp.iterrows()):
+        median = medians.get(row['setor']) or {}
+        with col:
+            st.markdown(f"### {ticker}")
+            st.caption(f"{row['setor']} · {median.get('pares', 0)} pares")
+            st.metric("Status", row['status'])
+            st.metric("Score", f"{row['score']:.0f}")
+            for metric, label in COMPARE_METRICS[:4]:
+                value, ref = row[metric], median.get(metric)
+                delta = f"{value - ref:+.1f} vs setor" if pd.notna(value) and pd.notna(ref) else None
+                st.metric(label, f"{value:.1f}" if pd.notna(value) else "N/A", delta,
+                          delta_color="inverse" if metric in ('pe', 'pb') else "normal")
+
+    st.markdown("---")
+
+    # Tabela: tickers + uma linha de mediana por setor presente
+    metric_cols = [m for m, _ in COMPARE_METRICS]
+    table = df_comp[['setor', 'status', 'score', *metric_cols]].astype({'setor': object, 'status': object})
+    median_rows = pd.DataFrame.from_dict(
+        {f"Mediana {sector}": {'setor': sector, **{m: (values or {}).get(m) for m in metric_cols}}
+         for sector, values in medians.items()}, orient='index')
+    st.dataframe(pd.concat([table, median_rows]).round(2))
+
+    pct_cols = [f'pct_{m}' for m in metric_cols if f'pct_{m}' in df_comp.columns]
+    if pct_cols:
+        st.caption("Percentil no setor (0-100)")
+        st.dataframe(df_comp[pct_cols].rename(columns=lambda c: dict(COMPARE_METRICS)[c[4:]]).round(0))
+
+    # go.Bar direto: plotly.express custa ~80 ms por figura, go ~10 ms
+    labels = dict(COMPARE_METRICS)
+    chart = pd.concat([table, median_rows])[['roe', 'div_yield', 'pe']]
+    fig = go.Figure([go.Bar(name=name, x=[labels[m] for m in chart.columns], y=row.to_numpy())
+                     for name, row in chart.iterrows()])
+    fig.update_layout(barmode='group', height=380, margin=dict(t=20))
+    st.plotly_chart(fig, width="stretch")
+
+    if st.toggle("🧮 DuPont e crescimento", key="dupont_toggle",
+                 help="Demonstrativos anuais: ROE = margem × giro × alavancagem, crescimento e CAGR"):
+        with st.spinner("Lendo demonstrativos..."):
+            dupont = get_statements_summary(tuple(df_comp.index))
+        st.dataframe(dupont.rename(columns=DUPONT_LABELS).round(2))
+
+@st.fragment
+def render_exports(news_opps, df_fund, n_selected):
+    """
+    Downloads CSV/Excel
+    Os arquivos só são gerados no clique (data=callable) e ficam
+    memorizados pelo hash do conteúdo
+    """
+    st.subheader("📥 Exportar")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        if df_fund is not None:
+            st.download_button(
+                "💼 Fundamentos (CSV)",
+                lambda: get_csv_export(exports.frame_hash(df_fund), df_fund),
+                f"fundamentos_{datetime.now().strftime('%Y%m%d')}.csv",
+                "text/csv"
+            )
+
+    with col2:
+        if news_opps and df_fund is not None:
+            total_bdrs = len(ALL_US_TICKERS)
+
+            def excel_payload():
+                df_news = pd.DataFrame(news_opps)
+                return get_excel_export(
+                    exports.frame_hash(df_news, df_fund), df_news, df_fund,
+                    total_bdrs, n_selected
                 )
 
+            st.download_button(
+                "📊 Completo (Excel)",
+                excel_payload,
+                f"analise_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                "application/vnd.ms-excel"
+            )
+
+    # Formatos colunares: preservam tipos (NaN, floats) e podem ser memory-mapped
+    st.markdown("#### 🗃️ Parquet / Arrow")
+    if df_fund is not None:
+        columnar_download_buttons("💼 Fundamentos", df_fund, 'fundamentals', 'fundamentos')
+    if news_opps:
+        columnar_download_buttons("📰 Notícias", pd.DataFrame(news_opps), 'news', 'noticias')
+
+def render_profile(profile):
+    """Resultado do perfil da execução + downloads (pstats / speedscope)"""
+    with st.expander(f"🧪 Perfil: {profile['seconds']:.2f}s", expanded=True):
+        tab_hot, tab_cum, tab_pd, tab_net = st.tabs(
+            ["🔥 Tempo próprio", "📚 Acumulado", "🐼 Pandas", "🌐 Esperas bloqueantes"])
+        with tab_hot:
+            st.dataframe(pd.DataFrame(profile['hot']), hide_index=True)
+        with tab_cum:
+            st.dataframe(pd.DataFrame(profile['cumulative']), hide_index=True)
+        with tab_pd:
+            st.dataframe(pd.DataFrame(profile['pandas']), hide_index=True)
+        with tab_net:
+            st.dataframe(pd.DataFrame(profile['blocking']), hide_index=True)
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 pstats", profile['pstats'], f"perfil_{stamp}.pstats",
+                             "application/octet-stream", key="dl_pstats")
+        col2.download_button("📥 speedscope", profile['speedscope'], f"perfil_{stamp}.speedscope.json",
+                             "application/json", key="dl_speedscope")
+
+def render_instrumentation():
+    """Latência/chamadas por provedor, caches e etapas (processo inteiro)"""
+    st.markdown("**🌐 Provedores**")
+    st.dataframe(pd.DataFrame(METRICS.provider_summary()), hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🗄️ Caches**")
+        st.dataframe(pd.DataFrame(METRICS.cache_summary()), hide_index=True)
+    with col2:
+        st.markdown("**⏱️ Etapas**")
+        st.dataframe(pd.DataFrame(METRICS.stage_summary()), hide_index=True)
+
+    errors = METRICS.error_summary()
+    if errors:
+        st.markdown("**⚠️ Erros em segundo plano**")
+        st.dataframe(pd.DataFrame(errors), hide_index=True)
+
+    fetch = get_fetch_scheduler().status()
+    st.caption(f"🗂️ Agendador: {fetch['prontos']} prontos, {fetch['fila']} na fila "
+               f"({fetch['fila_visiveis']} visíveis), {fetch['em_andamento']} em andamento, "
+               f"{fetch['sessoes']} sessões")
+
+    if metrics_server is not None:
+        host, port = metrics_server.server_address[:2]
+        st.caption(f"Prometheus: http://{host}:{port}/metrics")
+
 # ============================================================
-# FOOTER
+# PÁGINA
 # ============================================================
 
-st.markdown("---")
-st.markdown(f"""
+def main():
+    """Uma execução da página (sidebar, view escolhida e rodapé)"""
+    # Usados pelas funções de carga e pelas seções acima
+    global metrics_server, universe_loader, ALL_US_TICKERS, TICKER_MAPPING, ALL_BDRS_INFO
+
+    # Início da execução (etapa "render" do ℹ️ Estatísticas)
+    run_started = time.perf_counter()
+    configure_page()
+
+    metrics_server = get_metrics_server()
+
+    # Não bloqueia: até a BRAPI responder, usa a lista curada
+    universe_loader = get_universe_loader()
+    ALL_US_TICKERS, TICKER_MAPPING, ALL_BDRS_INFO = universe_loader.result()
+
+    # ============================================================
+    # SIDEBAR
+    # ============================================================
+
+    st.sidebar.markdown("## ⚙️ Configurações")
+
+    if not universe_loader.ready:
+        st.sidebar.warning("⚠️ Usando lista padrão")
+        with st.sidebar:
+            wait_for_universe()
+    elif ALL_US_TICKERS:
+        st.sidebar.success(f"📊 **{len(ALL_US_TICKERS)} BDRs** validadas")
+    else:
+        st.sidebar.warning("⚠️ Usando lista padrão")
+
+    # Tipo de análise
+    analysis_type = st.sidebar.radio(
+        "Tipo de Análise",
+        ["📊 Dashboard Completo", "📰 Notícias", "💼 Fundamentos", 
+         "🎯 Polymarket", "🔍 Comparador", "📋 Lista BDRs"],
+        key="analysis_type"
+    )
+
+    # Seleção
+    st.sidebar.markdown("### 📋 Seleção")
+
+    if ALL_US_TICKERS:
+        selection_mode = st.sidebar.radio(
+            "Modo",
+            ["🎯 Top 50", "📊 Top 100", "💧 Top 50 Liquidez", "✏️ Personalizado"],
+            key="selection_mode"
+        )
+
+        if selection_mode == "🎯 Top 50":
+            selected_tickers = ALL_US_TICKERS[:50]
+        elif selection_mode == "📊 Top 100":
+            selected_tickers = ALL_US_TICKERS[:100]
+        elif selection_mode == "💧 Top 50 Liquidez":
+            selected_tickers = top_by_liquidity(50)
+        else:
+            index = get_search_index(tuple(ALL_US_TICKERS), len(ALL_BDRS_INFO), TICKER_MAPPING, ALL_BDRS_INFO)
+            query = st.sidebar.text_input("🔎 Buscar (ticker ou nome)", key="ticker_search",
+                                          placeholder="ex.: apple, coca cola, KO34")
+            if "custom_tickers" not in st.session_state:
+                st.session_state.custom_tickers = ALL_US_TICKERS[:20]
+            # Opções curtas: seleção atual + melhores resultados (sem busca, o início do universo)
+            matches = [t for t, _ in index.search(query, limit=SEARCH_LIMIT)] if query \
+                else ALL_US_TICKERS[:SEARCH_BROWSE]
+            selected_tickers = st.sidebar.multiselect(
+                "Selecione",
+                list(dict.fromkeys([*st.session_state.custom_tickers, *matches])),
+                format_func=index.label,
+                key="custom_tickers"
+            )
+    else:
+        selected_tickers = KNOWN_VALID_TICKERS[:50]
+
+    # Filtros
+    st.sidebar.markdown("### 🎛️ Filtros")
+
+    with st.sidebar.expander("💼 Fundamentais"):
+        roe_range = st.slider("ROE (%)", 0.0, 200.0, (0.0, 200.0))
+        pe_range = st.slider("P/E", 0.0, 100.0, (0.0, 100.0))
+        div_yield_min = st.slider("Div Yield Mín (%)", 0.0, 10.0, 0.0)
+        market_cap_min = st.number_input("Market Cap Mín (B)", 0.0, 5000.0, 0.0)
+
+    with st.sidebar.expander("📈 Preço"):
+        max_volatility = st.slider("Volatilidade Máx (% a.a.)", 0, 150, 150,
+                                   help="Volatilidade anualizada de 3 meses; 150 = sem filtro")
+        min_momentum = st.slider("Momentum 12-1 Mín (%)", -100, 100, -100,
+                                 help="Retorno de 12 meses excluindo o último; -100 = sem filtro")
+
+    with st.sidebar.expander("📊 Análise"):
+        st.slider("Score Mínimo", 0, 100, 20)
+        score_models = scoring.get_models()
+        score_model = st.selectbox("Modelo de score", score_models.names, key="score_model",
+                                   help="Modelos de scoring_models.json; trocar não refaz a coleta")
+
+    # Botões
+    st.sidebar.markdown("---")
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        if st.button("🔄 Atualizar", type="primary"):
+            st.cache_data.clear()
+            get_fetch_scheduler().invalidate()
+            st.session_state.pop('dashboard_data', None)
+            st.session_state.pop('liquidity_tickers', None)
+            universe_loader.reload()
+            st.rerun()
+    with col2:
+        st.toggle("🧪 Perfilar", key="profile_toggle",
+                  help="Perfila cada execução completa enquanto ligado (cProfile + amostragem)")
+
+    # Info
+    st.sidebar.markdown("---")
+    st.sidebar.markdown(f"**Ativos:** {len(selected_tickers)}")
+    st.sidebar.markdown(f"_{datetime.now().strftime('%d/%m/%Y %H:%M')}_")
+
+    # ============================================================
+    # HEADER
+    # ============================================================
+
+    st.markdown('<h1 class="main-header">📊 Dashboard Completo de BDRs</h1>', 
+                unsafe_allow_html=True)
+
+    if ALL_US_TICKERS:
+        st.info(f"""
+    🎉 **{len(selected_tickers)} de {len(ALL_US_TICKERS)} BDRs validadas** | 
+    Dados em tempo real via Yahoo Finance, Finnhub e Polymarket
+    """)
+
+    # ============================================================
+    # LISTA DE BDRs
+    # ============================================================
+
+    if analysis_type == "📋 Lista BDRs":
+        st.subheader("📋 Lista de BDRs Validadas")
+
+        if ALL_BDRS_INFO:
+            df_bdrs = pd.DataFrame(ALL_BDRS_INFO)
+
+            col1, col2 = st.columns(2)
+            col1.metric("Total", len(df_bdrs))
+            col2.metric("Nível 1 (34)", len(df_bdrs[df_bdrs['ticker_br'].str.endswith('34')]))
+
+            st.dataframe(df_bdrs, hide_index=True)
+
+            st.download_button(
+                "📥 Download Lista (CSV)",
+                lambda: get_csv_export(exports.frame_hash(df_bdrs), df_bdrs),
+                f"bdrs_{datetime.now().strftime('%Y%m%d')}.csv",
+                "text/csv"
+            )
+            columnar_download_buttons("📥 Lista", df_bdrs, 'bdrs', 'bdrs')
+
+            st.markdown("---")
+            render_premium(TICKER_MAPPING)
+        elif KNOWN_VALID_TICKERS:
+            st.success(f"✅ Usando lista curada de {len(KNOWN_VALID_TICKERS)} BDRs conhecidas")
+
+            df_known = pd.DataFrame({
+                'ticker_us': KNOWN_VALID_TICKERS,
+                'ticker_br': [f"{t}34" for t in KNOWN_VALID_TICKERS]
+            })
+
+            st.dataframe(df_known, hide_index=True)
+
+    # ============================================================
+    # DASHBOARD COMPLETO
+    # ============================================================
+
+    elif analysis_type == "📊 Dashboard Completo":
+
+        if not selected_tickers:
+            st.warning("⚠️ Selecione tickers no sidebar")
+            st.stop()
+
+        # Aquisição (memorizada por seleção) + filtros do sidebar; a cada
+        # interação a seleção volta para a frente da fila do agendador
+        prioritize_fetches(selected_tickers[:screening.FUND_LIMIT])
+        data = acquire_dashboard_data(selected_tickers)
+        news_opps = data['news_opps']
+        filters = (roe_range, pe_range, div_yield_min, market_cap_min,
+                   max_volatility if max_volatility < 150 else None,
+                   min_momentum if min_momentum > -100 else None)
+        scored = get_scored_fundamentals(data['fundamentals_key'], score_model, score_models.version,
+                                         get_sector_index().version, data['fundamentals'])
+        df_fund = get_filtered_fundamentals(
+            f"{data['fundamentals_key']}:{score_model}:{score_models.version}:{get_sector_index().version}",
+            filters, scored)
+        total_tentativas = data['total_tentativas']
+        sem_dados = data['sem_dados']
+        filtrados = len(data['fundamentals']) - len(df_fund)
+
+        # Stats debug
+        with st.expander("ℹ️ Estatísticas"):
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Tentativas", total_tentativas)
+            col2.metric("Com Dados", total_tentativas - sem_dados)
+            col3.metric("Filtrados", filtrados)
+            col4.metric("Final", len(df_fund))
+            render_instrumentation()
+
+        excelentes = int((df_fund['status'] == '🟢 Excelente').sum())
+
+        render_metric_cards(len(selected_tickers), news_opps, df_fund, excelentes)
+
+        # Sem linhas após os filtros: tabelas e gráficos mostram "sem dados"
+        if df_fund.empty:
+            df_fund = None
+
+        # Alertas
+        if df_fund is not None:
+            render_alerts(df_fund)
+
+        # Recomendações
+        if df_fund is not None:
+            render_recommendations(df_fund)
+
+        st.markdown("---")
+
+        # Tabs
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📰 Notícias", "💼 Fundamentos", "📊 Gráficos",
+                                                "📈 Histórico", "📥 Exportar"])
+
+        with tab1:
+            render_news_table(news_opps)
+
+        with tab2:
+            render_fundamentals_table(df_fund, excelentes)
+
+        with tab3:
+            render_charts(df_fund)
+
+        with tab4:
+            render_history(sorted(data['fundamentals'].index))
+
+        with tab5:
+            render_exports(news_opps, df_fund, len(selected_tickers))
+
+    # ============================================================
+    # COMPARADOR
+    # ============================================================
+
+    elif analysis_type == "🔍 Comparador":
+        data = st.session_state.get('dashboard_data')
+        options = ALL_US_TICKERS or KNOWN_VALID_TICKERS
+        default = [t for t in (list(data['fundamentals'].index) if data else KNOWN_VALID_TICKERS)
+                   if t in options][:3]
+        prioritize_fetches([*st.session_state.get('compare_tickers', default),
+                            *selected_tickers[:screening.FUND_LIMIT]])
+        with stage('compare'):
+            render_comparador(options, default, score_model)
+
+    # ============================================================
+    # FOOTER
+    # ============================================================
+
+    st.markdown("---")
+    st.markdown(f"""
 <div style='text-align: center; color: #666; padding: 1rem 0;'>
     <p style='font-size: 0.85rem; margin: 0;'>
         <strong>Dashboard BDRs da B3</strong> | 
@@ -879,3 +1128,30 @@ st.markdown(f"""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+    METRICS.observe_stage('render', time.perf_counter() - run_started)
+
+
+# ============================================================
+# EXECUÇÃO (COM PERFIL SOB DEMANDA)
+# ============================================================
+
+# Perfil sob demanda (toggle na sidebar ou ?profile=1); desligado = sem custo
+_profiler = None
+if st.session_state.get("profile_toggle") or st.query_params.get("profile") == "1":
+    import profiling
+    _profiler = profiling.RunProfiler(f"app.py {datetime.now().strftime('%H:%M:%S')}").start()
+
+# st.stop(), st.rerun() (StopException / RerunException) e exceções também
+# encerram o perfil, sem deixar a amostragem e o cProfile ligados
+_profile = None
+try:
+    main()
+    if _profiler is not None:
+        _profile = _profiler.stop()
+finally:
+    if _profiler is not None and _profile is None:
+        _profiler.abort()
+
+if _profile is not None:
+    render_profile(_profile)
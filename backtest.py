@@ -0,0 +1,361 @@
+"""
+BACKTEST DO SCORE E DAS RECOMENDAÇÕES
+Reproduz os snapshots de fundamentos (history.py) sobre o histórico de
+preços (prices.py): em cada data de rebalanceamento monta as carteiras de
+cada estratégia com os fundamentos conhecidos naquele dia e mede o retorno
+até o rebalanceamento seguinte.
+
+As estratégias são as telas de screens.json, compiladas pelo mesmo
+screens.ScreenSet do dashboard (backtest e recomendações não divergem),
+mais duas referências: 'score' (top-N do score) e 'universo' (carteira
+igual-ponderada de tudo que tem fundamentos).
+
+Tudo é matricial (datas × tickers): um painel por métrica, seleção top-N
+de todas as datas de uma vez (argpartition) e retornos/turnover por
+operações de array. As estratégias rodam em paralelo em processos que
+leem o painel via shared_memory.
+
+Métricas por estratégia: retorno total, CAGR, volatilidade, Sharpe,
+drawdown máximo, excesso médio sobre o universo, hit rate (fração das
+escolhas que bateu o universo no período) e turnover médio.
+
+Uso:
+    python backtest.py
+    python backtest.py --freq Q --top 5 --workers 4 --start 2020-01-01
+    python backtest.py --list                # nomes das estratégias
+"""
+
+import os
+import re
+import time
+import unicodedata
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from screens import OPERATORS, get_screen_set
+
+# Carteira do 'score' (as telas usam o "top" de cada uma, salvo --top)
+TOP_N = 10
+# Snapshot mais antigo que isso não vale para a data de rebalanceamento
+MAX_STALENESS_DAYS = 120
+PERIODS_PER_YEAR = {'W': 52, 'M': 12, 'Q': 4, 'Y': 1}
+# Abaixo disso (datas × tickers) o custo de subir processos supera o ganho
+POOL_MIN_CELLS = 500_000
+
+# ============================================================
+# ESTRATÉGIAS (A PARTIR DAS TELAS)
+# ============================================================
+
+def _slug(text):
+    """'💎 Value' -> 'value', '📉 P/E mais baixos' -> 'p_e_mais_baixos'"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_')
+
+def strategies_from_screens(screen_set=None):
+    """
+    {nome: spec} com filtros (métrica, operador, valor), métrica de ranking,
+    ordem e top de cada tela, na ordem do arquivo, entre 'score' e 'universo'
+    """
+    screen_set = screen_set or get_screen_set()
+    strategies = {'score': {'titulo': 'Score', 'rank': 'score'}}
+    for i, screen in enumerate(screen_set.screens):
+        strategies[_slug(screen['tipo'])] = {
+            'titulo': screen['tipo'],
+            'filters': screen_set.filters(i),
+            'rank': screen.get('rank', 'score'),
+            'ascending': bool(screen.get('ascending', False)),
+            'top': screen.get('top', 3),
+        }
+    strategies['universo'] = {'titulo': 'Universo', 'rank': None}
+    return strategies
+
+def panel_metrics(strategies):
+    """Métricas do histórico usadas pelas estratégias (o score sempre entra)"""
+    import history
+
+    used = ['score']
+    for spec in strategies.values():
+        used += [column for column, _, _ in spec.get('filters', [])]
+        used.append(spec.get('rank'))
+    return tuple(m for m in dict.fromkeys(used) if m in history.METRICS)
+
+# ============================================================
+# PAINEL (DATAS DE REBALANCEAMENTO × TICKERS)
+# ============================================================
+
+class Panel:
+    """
+    fields: {métrica: (R × N)} fundamentos vigentes em cada rebalanceamento
+    close:  (R × N) fechamento no rebalanceamento
+    forward: (R-1 × N) retorno até o rebalanceamento seguinte
+    """
+
+    def __init__(self, dates, tickers, fields, close, freq='M'):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.fields = fields
+        self.close = close
+        self.freq = freq
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.forward = close[1:] / close[:-1] - 1
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+def _as_of(snapshots, metric, dates, tickers, max_staleness):
+    """Valor vigente de `metric` em cada data (último snapshot dentro do prazo)"""
+    pivot = snapshots.pivot(index='date', columns='ticker', values=metric)\
+                     .reindex(columns=tickers).astype('float64')
+    stamps = pd.DataFrame(np.where(pivot.notna(), pivot.index.values[:, None], np.datetime64('NaT')),
+                          index=pivot.index, columns=tickers).ffill()
+    values = pivot.ffill().to_numpy()
+    stamps = stamps.to_numpy(dtype='datetime64[ns]')
+
+    row = np.searchsorted(pivot.index.values, dates.values, side='right') - 1
+    valid = row >= 0
+    out = np.full((len(dates), len(tickers)), np.nan)
+    out[valid] = values[row[valid]]
+    age = dates.values[valid][:, None] - stamps[row[valid]]
+    stale = np.isnat(age) | (age > np.timedelta64(max_staleness, 'D'))
+    out[valid] = np.where(stale, np.nan, out[valid])
+    return out
+
+def build_panel(history_store=None, price_store=None, freq='M', start=None, end=None,
+                max_staleness=MAX_STALENESS_DAYS, metrics=None):
+    """Alinha snapshots de fundamentos e preços nas datas de rebalanceamento"""
+    import history
+    import prices
+
+    metrics = tuple(metrics or panel_metrics(strategies_from_screens()))
+    history_store = history_store or history.HistoryStore()
+    price_store = price_store or prices.PriceStore()
+
+    # Snapshots um pouco antes do início ainda valem na primeira data
+    read_start = start - timedelta(days=max_staleness) if start else None
+    snapshots = history_store.read(columns=metrics, start=read_start, end=end)
+    if snapshots.empty or not price_store.tickers:
+        return None
+    snapshots['date'] = pd.to_datetime(snapshots['date'])
+
+    tickers = sorted(set(snapshots['ticker']) & set(price_store.tickers))
+    if not tickers:
+        return None
+    columns = [price_store.tickers.index(t) for t in tickers]
+    price_dates = price_store.dates()
+    close = prices._ffill(np.asarray(price_store.field('close')[:, columns], dtype=np.float64))
+
+    # Último pregão de cada período, a partir do primeiro snapshot
+    in_range = price_dates >= snapshots['date'].min()
+    if start:
+        in_range &= price_dates >= pd.Timestamp(start)
+    if end:
+        in_range &= price_dates <= pd.Timestamp(end)
+    periods = price_dates.to_period(freq)
+    last_of_period = ~pd.Series(periods).duplicated(keep='last').to_numpy()
+    rows = np.flatnonzero(in_range & last_of_period)
+    if len(rows) < 2:
+        return None
+
+    dates = price_dates[rows]
+    fields = {m: _as_of(snapshots, m, dates, tickers, max_staleness) for m in metrics}
+    return Panel(dates, tickers, fields, close[rows], freq)
+
+# ============================================================
+# ESTRATÉGIAS (VETORIZADAS EM TODAS AS DATAS)
+# ============================================================
+
+def weights(fields, close, spec, top_n=TOP_N):
+    """
+    Pesos iguais (R × N) das escolhas de uma estratégia em cada data
+    Como no ScreenSet, métrica fora do painel (ou condição não numérica)
+    não passa
+    """
+    eligible = ~np.isnan(close)
+    for metric, op, value in spec.get('filters', []):
+        if metric not in fields or op not in OPERATORS:
+            eligible[:] = False
+            continue
+        with np.errstate(invalid='ignore'):
+            eligible &= OPERATORS[op](fields[metric], value)
+
+    rank = spec.get('rank')
+    if rank is None:
+        picks = eligible & ~np.isnan(fields['score'])
+    elif rank not in fields:
+        picks = np.zeros_like(eligible)
+    else:
+        values = -fields[rank] if spec.get('ascending') else fields[rank]
+        key = np.where(eligible & ~np.isnan(values), values, -np.inf)
+        k = min(top_n, key.shape[1])
+        top = np.argpartition(-key, k - 1, axis=1)[:, :k]
+        picks = np.zeros_like(eligible)
+        np.put_along_axis(picks, top, True, axis=1)
+        picks &= np.isfinite(key)
+
+    count = picks.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(picks, 1.0 / count, 0.0)
+
+def evaluate(fields, close, forward, spec, top_n=TOP_N):
+    """Retorno, hit rate, turnover e nº de escolhas por período"""
+    w = weights(fields, close, spec, top_n)[:-1]  # o último rebalanceamento não tem retorno
+    held = (w > 0) & ~np.isnan(forward)
+
+    # Universo igual-ponderado como referência do hit rate
+    universe = ~np.isnan(fields['score'][:-1]) & ~np.isnan(forward)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        benchmark = np.where(universe, forward, 0).sum(axis=1) / universe.sum(axis=1)
+        # Sem retorno no período (ticker sumiu), o peso vai para o resto da carteira
+        held_w = np.where(held, w, 0)
+        returns = (held_w * np.where(held, forward, 0)).sum(axis=1) / held_w.sum(axis=1)
+        hits = (held & (forward > benchmark[:, None])).sum(axis=1) / held.sum(axis=1)
+
+    turnover = np.full(len(w), np.nan)
+    turnover[1:] = 0.5 * np.abs(np.diff(w, axis=0)).sum(axis=1)
+    return {
+        'retorno': np.nan_to_num(returns),  # carteira vazia fica em caixa
+        'benchmark': benchmark,
+        'hit_rate': hits,
+        'turnover': turnover,
+        'n': held.sum(axis=1),
+    }
+
+def summarize(result, periods_per_year):
+    returns = result['retorno']
+    equity = np.cumprod(1 + returns)
+    years = len(returns) / periods_per_year
+    vol = returns.std(ddof=1) * np.sqrt(periods_per_year) if len(returns) > 1 else np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'periodos': len(returns),
+            'retorno_total': (equity[-1] - 1) * 100,
+            'cagr': (equity[-1] ** (1 / years) - 1) * 100,
+            'volatilidade': vol * 100,
+            'sharpe': returns.mean() * periods_per_year / vol if vol else np.nan,
+            'max_drawdown': (equity / np.maximum.accumulate(np.maximum(equity, 1)) - 1).min() * 100,
+            'excesso_medio': np.nanmean(returns - result['benchmark']) * 100,
+            'hit_rate': np.nanmean(result['hit_rate']) * 100,
+            'turnover': np.nanmean(result['turnover']) * 100,
+            'escolhas': result['n'].mean(),
+        }
+
+# ============================================================
+# EXECUÇÃO (PARALELA POR ESTRATÉGIA)
+# ============================================================
+
+def _run_strategy(shm_name, shape, metric_names, spec, top_n):
+    """Worker: lê o painel compartilhado e avalia uma estratégia"""
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        fields = {m: block[i] for i, m in enumerate(metric_names)}
+        close = block[len(metric_names)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            forward = close[1:] / close[:-1] - 1
+        result = evaluate(fields, close, forward, spec, top_n)
+        del block, fields, close
+    finally:
+        shm.close()
+    return result
+
+class BacktestResult:
+    def __init__(self, dates, results, periods_per_year):
+        self.dates = dates
+        self.results = results
+        self.periods_per_year = periods_per_year
+
+    def summary(self):
+        """Uma linha por estratégia"""
+        return pd.DataFrame({name: summarize(r, self.periods_per_year)
+                             for name, r in self.results.items()}).T
+
+    def series(self, key='retorno'):
+        """Série por período (índice = data de formação da carteira) × estratégia"""
+        return pd.DataFrame({name: r[key] for name, r in self.results.items()},
+                            index=self.dates[:-1])
+
+    def equity(self):
+        return (1 + self.series()).cumprod()
+
+def run(panel, strategies=None, top_n=None, workers=None):
+    """
+    Avalia as estratégias sobre o painel; com workers > 1 (padrão: nº de
+    CPUs) e painel grande, cada estratégia roda num processo
+    top_n, se dado, vale para todas; senão cada tela usa o seu "top"
+    """
+    strategies = strategies or strategies_from_screens()
+    tops = {name: top_n or spec.get('top') or TOP_N for name, spec in strategies.items()}
+    workers = workers or os.cpu_count() or 1
+    periods_per_year = PERIODS_PER_YEAR.get(panel.freq, 12)
+
+    if workers <= 1 or len(strategies) < 2 or np.prod(panel.shape) < POOL_MIN_CELLS:
+        results = {name: evaluate(panel.fields, panel.close, panel.forward, spec, tops[name])
+                   for name, spec in strategies.items()}
+        return BacktestResult(panel.dates, results, periods_per_year)
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    names = list(panel.fields)
+    shape = (len(names) + 1, *panel.shape)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, m in enumerate(names):
+            block[i] = panel.fields[m]
+        block[len(names)] = panel.close
+        del block
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(strategies))) as pool:
+            futures = {name: pool.submit(_run_strategy, shm.name, shape, names, spec, tops[name])
+                       for name, spec in strategies.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        return BacktestResult(panel.dates, results, periods_per_year)
+    finally:
+        shm.close()
+        shm.unlink()
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import date
+
+    parser = argparse.ArgumentParser(description="Backtest do score e das recomendações")
+    parser.add_argument("--freq", default="M", choices=sorted(PERIODS_PER_YEAR))
+    parser.add_argument("--top", type=int, help="Carteira de todas as estratégias (padrão: top de cada tela)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--strategies", help="Lista separada por vírgula (padrão: todas)")
+    parser.add_argument("--list", action="store_true", help="Lista as estratégias e sai")
+    args = parser.parse_args()
+
+    strategies = strategies_from_screens()
+    if args.list:
+        for name, spec in strategies.items():
+            filters = " e ".join(f"{c} {op} {v}" for c, op, v in spec.get('filters', [])) or "-"
+            print(f"  {name:<20} {spec['titulo']:<22} {filters}; ranking {spec.get('rank')}")
+        raise SystemExit(0)
+    chosen = strategies
+    if args.strategies:
+        unknown = [n for n in args.strategies.split(",") if n not in strategies]
+        if unknown:
+            raise SystemExit(f"❌ Estratégias desconhecidas: {', '.join(unknown)} (veja --list)")
+        chosen = {n: strategies[n] for n in args.strategies.split(",")}
+
+    t0 = time.perf_counter()
+    panel = build_panel(freq=args.freq, start=args.start, end=args.end, metrics=panel_metrics(chosen))
+    if panel is None:
+        raise SystemExit("❌ Sem dados: grave snapshots (history.py) e preços (prices.py update)")
+    t1 = time.perf_counter()
+    result = run(panel, chosen, args.top, args.workers)
+    t2 = time.perf_counter()
+
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(result.summary().astype('float64').round(2).to_string())
+    print(f"\n✅ {panel.shape[0]} rebalanceamentos × {panel.shape[1]} tickers; "
+          f"painel {t1 - t0:.2f}s, estratégias {t2 - t1:.2f}s")
@@ -0,0 +1,191 @@
+"""
+BENCHMARK DO PIPELINE (OFFLINE)
+Reproduz respostas gravadas (ou sintéticas) dos provedores e cronometra
+cada etapa: universo, notícias, fundamentos, scoring e renderização,
+para universos de 50/200/500 tickers, com cache frio e quente. As etapas
+seguem o caminho do app.py: fundamentos pelo agendador compartilhado
+(scheduler.FetchScheduler.wait), scoring com as métricas de preço, o
+índice setorial e os modelos de score.
+
+Uso:
+    python benchmarks/bench_pipeline.py                          # fixtures sintéticas
+    python benchmarks/bench_pipeline.py --fixtures benchmarks/fixtures.json.gz
+    python benchmarks/bench_pipeline.py --out atual.json --compare base.json
+
+Com --compare, sai com código 1 se alguma etapa ficar mais lenta que
+base * (1 + tolerância).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import streamlit as st
+
+import scheduler
+import scoring
+import screening
+import sectors
+import fixtures as fx
+
+STAGES = ('universe', 'news', 'fundamentals', 'scoring', 'rendering')
+DEFAULT_FILTERS = ((0.0, 200.0), (0.0, 100.0), 0.0, 0.0)
+
+# Mesmos wrappers de cache do app.py; os fundamentos vêm do agendador
+# (um por universo, como o cache_resource do app: frio ao criar, quente depois)
+cached_universe = st.cache_data(ttl=86400)(screening.get_all_bdrs_from_brapi)
+cached_news = st.cache_data(ttl=1800)(screening.get_news_data)
+
+# ============================================================
+# ETAPAS
+# ============================================================
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+def stage_universe():
+    return cached_universe()
+
+def stage_news(tickers, mapping):
+    opps = []
+    for ticker in tickers:
+        opp = screening.get_news_opportunity(ticker, cached_news(ticker), mapping)
+        if opp:
+            opps.append(opp)
+    return opps
+
+def stage_fundamentals(fetcher, tickers):
+    """Como acquire_dashboard_data: na ordem de chegada, devolvidos na da seleção"""
+    arrived = dict(fetcher.wait(tickers))
+    return [arrived[t] for t in dict.fromkeys(tickers) if arrived.get(t)]
+
+def stage_scoring(fund_raw, sector_index):
+    """fundamentals_frame + índice setorial + modelos de score + filtros + telas"""
+    import prices
+
+    try:
+        price_metrics = prices.metrics()
+    except Exception:
+        price_metrics = None
+    frame = screening.fundamentals_frame(fund_raw, price_metrics)
+    sector_index.refresh(frame)
+    frame = frame.join(sector_index.frame(frame.index.tolist()))
+    scored = scoring.get_models().apply(frame)
+    df_fund = scored[screening.filter_fundamentals(scored, *DEFAULT_FILTERS)]
+    if df_fund.empty:
+        return []
+    return screening.get_recommendations(df_fund)
+
+def stage_rendering():
+    """Uma sessão nova do app.py (Top 50) até o fim do script"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    at.session_state["analysis_type"] = "📊 Dashboard Completo"
+    at.run()
+    return [str(e.value) for e in at.exception]
+
+def run_pipeline(tickers, fetcher, sector_index):
+    timings = {}
+    timings['universe'], (_, mapping, _) = _timed(stage_universe)
+    timings['news'], news = _timed(stage_news, tickers, mapping)
+    timings['fundamentals'], fund_raw = _timed(stage_fundamentals, fetcher, tickers)
+    timings['scoring'], _ = _timed(stage_scoring, fund_raw, sector_index)
+    timings['rendering'], exceptions = _timed(stage_rendering)
+    return timings, {'news': len(news), 'fundamentals': len(fund_raw), 'exceptions': exceptions}
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def run(sizes=(50, 200, 500), fixtures_path=None, latency_ms=0.0):
+    results = []
+    recorded = fx.load_fixtures(fixtures_path) if fixtures_path else None
+
+    for n in sizes:
+        fixtures = recorded or fx.synthetic_fixtures(n)
+        tickers = fx.synthetic_tickers(n) if recorded is None else \
+            (sorted(recorded['yahoo']) + fx.synthetic_tickers(n))[:n]
+        replayer = fx.Replayer(fixtures, latency_ms=latency_ms)
+
+        fetcher = scheduler.FetchScheduler(screening.get_fundamental_data)
+        sector_index = sectors.SectorIndex()
+
+        with replayer.active():
+            # Cold: caches limpos
+            st.cache_data.clear()
+            cold, counts = run_pipeline(tickers, fetcher, sector_index)
+            # Warm: mesma carga com os caches preenchidos
+            warm, _ = run_pipeline(tickers, fetcher, sector_index)
+
+        for mode, timings in (('cold', cold), ('warm', warm)):
+            results.append({
+                'universe_size': n,
+                'mode': mode,
+                'stages': {k: round(v, 6) for k, v in timings.items()},
+                'total': round(sum(timings.values()), 6),
+                'rows': counts,
+            })
+            print(f"[{n:>4} {mode:<4}] " + "  ".join(f"{k}={v:.3f}s" for k, v in timings.items()),
+                  file=sys.stderr)
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'fixtures': fixtures_path or 'synthetic',
+        'latency_ms': latency_ms,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'results': results,
+    }
+
+def compare(current, baseline, tolerance=0.2):
+    """Lista de regressões (etapas mais lentas que a base além da tolerância)"""
+    base = {(r['universe_size'], r['mode']): r['stages'] for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        ref = base.get((r['universe_size'], r['mode']))
+        if not ref:
+            continue
+        for stage, seconds in r['stages'].items():
+            before = ref.get(stage)
+            # Ignora ruído de etapas abaixo de 5 ms
+            if before is not None and seconds > max(before * (1 + tolerance), before + 0.005):
+                regressions.append(f"{r['universe_size']}/{r['mode']}/{stage}: {before:.3f}s -> {seconds:.3f}s")
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline do dashboard")
+    parser.add_argument("--sizes", default="50,200,500")
+    parser.add_argument("--fixtures", help="Fixtures gravadas (.json.gz); padrão: sintéticas")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência simulada por chamada")
+    parser.add_argument("--out", help="Arquivo JSON de saída")
+    parser.add_argument("--compare", help="JSON de referência para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    report = run([int(s) for s in args.sizes.split(",")], args.fixtures, args.latency_ms)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    sys.exit(1 if report.get('regressions') else 0)
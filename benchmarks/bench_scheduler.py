@@ -0,0 +1,67 @@
+"""
+BENCHMARK DO AGENDADOR DE BUSCAS
+Tempo até os tickers "visíveis" ficarem prontos enquanto o universo
+inteiro está sendo atualizado: fila em ordem de lista (o antigo laço) vs
+scheduler.FetchScheduler com os visíveis declarados no meio da
+atualização. A busca é simulada (sleep de --fetch-ms), sem rede.
+
+Uso:
+    python benchmarks/bench_scheduler.py --universe 500 --visible 5 --fetch-ms 50
+"""
+
+import os
+import sys
+import json
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scheduler
+
+def fake_fetch(delay):
+    def fetch(ticker):
+        time.sleep(delay)
+        return {'ticker': ticker}
+    return fetch
+
+def in_list_order(universe, visible, delay, workers):
+    """Referência: a posição na lista decide; o tempo é estimado sem buscar"""
+    last = max(universe.index(t) for t in visible)
+    return (last // workers + 1) * (delay + scheduler.FETCH_PAUSE)
+
+def with_scheduler(universe, visible, delay, workers, head_start=0.5):
+    fetcher = scheduler.FetchScheduler(fake_fetch(delay), workers=workers)
+    fetcher.prioritize('bench', [[], universe[:100], universe])
+    time.sleep(head_start)  # atualização do universo já em curso
+    t0 = time.perf_counter()
+    fetcher.prioritize('bench', [visible, universe[:100], universe])
+    ready = [ticker for ticker, _ in fetcher.wait(visible)]
+    elapsed = time.perf_counter() - t0
+    return elapsed, len(ready), fetcher.status()
+
+def run(n=500, n_visible=5, fetch_ms=50, workers=scheduler.FETCH_WORKERS):
+    universe = [f"T{i:04d}" for i in range(n)]
+    visible = universe[-n_visible:]  # pior caso: fim da cauda
+    delay = fetch_ms / 1000
+    t_list = in_list_order(universe, visible, delay, workers)
+    t_sched, ready, status = with_scheduler(universe, visible, delay, workers)
+    print(f"[{n} tickers, {n_visible} visíveis, {fetch_ms} ms/busca] ordem da lista ~{t_list * 1000:.0f} ms, "
+          f"agendador {t_sched * 1000:.0f} ms ({status['fila']} ainda na fila)", file=sys.stderr)
+    return {'universe': n, 'visible': n_visible, 'fetch_ms': fetch_ms, 'workers': workers,
+            'list_order_ms': round(t_list * 1000), 'scheduler_ms': round(t_sched * 1000),
+            'ready': ready, 'queued_after': status['fila']}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tempo até os visíveis: ordem da lista vs agendador")
+    parser.add_argument("--universe", type=int, default=500)
+    parser.add_argument("--visible", type=int, default=5)
+    parser.add_argument("--fetch-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=scheduler.FETCH_WORKERS)
+    args = parser.parse_args()
+
+    report = run(args.universe, args.visible, args.fetch_ms, args.workers)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['ready'] == args.visible else 1)
@@ -0,0 +1,110 @@
+"""
+BENCHMARK DAS TELAS (SCREENS)
+Compara o motor compilado (screens.ScreenSet) com a avaliação tela a tela
+(um filtro pandas + nlargest/nsmallest por tela, como o antigo
+get_recommendations) e confere que as escolhas são idênticas.
+
+Uso:
+    python benchmarks/bench_screens.py --tickers 500 --screens 1,3,50
+"""
+
+import os
+import sys
+import json
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import screens
+import screening
+import fixtures as fx
+
+METRIC_GRID = {
+    'roe': (10, 15, 20, 25),
+    'pe': (10, 15, 20, 30),
+    'div_yield': (2, 3, 4),
+    'pb': (1, 3, 5),
+    'score': (55, 70, 85),
+}
+
+def synthetic_frame(n, seed=7):
+    rng = np.random.default_rng(seed)
+    records = [{
+        'ticker': t, 'nome': t, 'setor': str(rng.choice(fx.SECTORS)),
+        'market_cap': float(rng.uniform(5e9, 3e12)), 'pe': float(rng.uniform(5, 60)),
+        'pb': float(rng.uniform(0.5, 20)), 'div_yield': float(rng.choice([0.0, rng.uniform(0.1, 7)])),
+        'roe': float(np.round(rng.normal(18, 12), 1)), 'score': float(rng.choice([40, 55, 70, 85, 95])),
+        'price': float(rng.uniform(5, 900)), 'status': '🟡 Bom',
+    } for t in fx.synthetic_tickers(n)]
+    return screening.fundamentals_frame(records)
+
+def synthetic_screens(count, seed=11):
+    """Telas aleatórias sobre uma grade de limites (condições se repetem, como na prática)"""
+    if count <= len(screens.DEFAULT_SCREENS):
+        return screens.DEFAULT_SCREENS[:count]
+    rng = np.random.default_rng(seed)
+    metrics = list(METRIC_GRID)
+    out = list(screens.DEFAULT_SCREENS)
+    while len(out) < count:
+        filters = []
+        for metric in rng.choice(metrics, size=int(rng.integers(1, 4)), replace=False):
+            filters.append([str(metric), str(rng.choice(['>', '<'])), float(rng.choice(METRIC_GRID[metric]))])
+        out.append({'tipo': f"Tela {len(out)}", 'filters': filters,
+                    'rank': str(rng.choice(metrics)), 'ascending': bool(rng.random() < 0.3),
+                    'top': int(rng.choice([3, 5, 10]))})
+    return out
+
+def one_by_one(df, screen_list):
+    """Referência: uma varredura booleana + nlargest/nsmallest por tela"""
+    results = []
+    for screen in screen_list:
+        mask = np.ones(len(df), dtype=bool)
+        for column, op, value in screen.get('filters', []):
+            mask &= screens.OPERATORS[op](df[column].to_numpy(dtype=np.float64), value)
+        rank, top = screen.get('rank', 'score'), screen.get('top', 3)
+        matched = df[mask].dropna(subset=[rank])
+        picked = matched.nsmallest(top, rank) if screen.get('ascending') else matched.nlargest(top, rank)
+        if not picked.empty:
+            results.append({'tipo': screen['tipo'], 'tickers': picked.index.tolist(),
+                            'razao': screen.get('razao', ''), 'cor': screen.get('cor', 'info')})
+    return results
+
+def _best(fn, *args, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def run(n=500, counts=(1, 3, 50)):
+    df = synthetic_frame(n)
+    results = []
+    for count in counts:
+        screen_list = synthetic_screens(count)
+        screen_set = screens.ScreenSet(screen_list)
+        t_loop, expected = _best(one_by_one, df, screen_list)
+        t_set, got = _best(screen_set.evaluate, df)
+        same = got == expected
+        results.append({'screens': count, 'conditions': len(screen_set.conditions),
+                        'one_by_one_ms': round(t_loop * 1000, 3), 'compiled_ms': round(t_set * 1000, 3),
+                        'identical': same})
+        print(f"[{count:>3} telas, {n} tickers] tela a tela {t_loop * 1000:.2f} ms, "
+              f"compilado {t_set * 1000:.2f} ms {'ok' if same else 'DIVERGENTE'}", file=sys.stderr)
+    return {'tickers': n, 'results': results}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Telas compiladas vs tela a tela")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--screens", default="1,3,50")
+    args = parser.parse_args()
+
+    report = run(args.tickers, [int(c) for c in args.screens.split(",")])
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(r['identical'] for r in report['results']) else 1)
@@ -0,0 +1,107 @@
+"""
+BENCHMARK DE INICIALIZAÇÃO
+Mede o tempo de import do app e o tempo até a primeira pintura
+(sidebar renderizada) com a BRAPI simulando um cold start lento.
+Compara com startup_budget.json e sai com código 1 se estourar
+(exceções de renderização são apenas reportadas).
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat 3] [--out startup.json]
+"""
+
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# Imports de topo do app.py (o que toda execução paga)
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import streamlit, pandas, numpy, screening
+print(time.perf_counter() - t0)
+"""
+
+# Primeira pintura: BRAPI demora 30 s, a sidebar não pode esperar por ela
+FIRST_PAINT_SNIPPET = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+import screening
+screening.get_all_bdrs_from_brapi = lambda: (time.sleep(30), screening.fallback_universe())[1]
+
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.session_state["analysis_type"] = "📋 Lista BDRs"
+t0 = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "seconds": elapsed,
+    "sidebar_elements": len(at.sidebar),
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+def _run(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "falha")
+    return out.stdout.strip().splitlines()[-1]
+
+def measure_import():
+    return float(_run(IMPORT_SNIPPET))
+
+def measure_first_paint(lazy_modules):
+    code = FIRST_PAINT_SNIPPET.format(
+        root=ROOT, app=os.path.join(ROOT, "app.py"), lazy=list(lazy_modules)
+    )
+    return json.loads(_run(code))
+
+def run(repeat=3):
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        budget = json.load(f)
+
+    imports = [measure_import() for _ in range(repeat)]
+    paints = [measure_first_paint(budget["lazy_modules"]) for _ in range(repeat)]
+
+    result = {
+        "import_seconds": statistics.median(imports),
+        "first_paint_seconds": statistics.median(p["seconds"] for p in paints),
+        "sidebar_elements": paints[-1]["sidebar_elements"],
+        "exceptions": paints[-1]["exceptions"],
+        "eagerly_loaded": sorted({m for p in paints for m in p["loaded"]}),
+        "budget": budget,
+    }
+
+    failures = []
+    if result["import_seconds"] > budget["import_seconds"]:
+        failures.append(f"import {result['import_seconds']:.2f}s > {budget['import_seconds']}s")
+    if result["first_paint_seconds"] > budget["first_paint_seconds"]:
+        failures.append(f"primeira pintura {result['first_paint_seconds']:.2f}s > {budget['first_paint_seconds']}s")
+    if result["eagerly_loaded"]:
+        failures.append(f"módulos pesados carregados no startup: {', '.join(result['eagerly_loaded'])}")
+    result["failures"] = failures
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de startup do dashboard")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    sys.exit(1 if result["failures"] else 0)
@@ -0,0 +1,58 @@
+"""
+BENCHMARK DO PARSE DE DEMONSTRATIVOS
+Compara o parse serial com o pool de processos (shared_memory) sobre
+payloads sintéticos, e confere que os cubos resultantes são idênticos.
+
+Uso:
+    python benchmarks/bench_statements.py --sizes 500,2000 --workers 1,2,4
+"""
+
+import os
+import sys
+import json
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import statements
+import fixtures as fx
+
+def run(sizes=(500, 2000), workers=(1, 2, 4)):
+    results = []
+    for n in sizes:
+        yahoo = fx.synthetic_fixtures(n)['yahoo']
+        # Bytes como chegam do provedor (o parse do JSON também vai para o worker)
+        payloads = {t: (json.dumps(p['financials']).encode(), json.dumps(p['balance_sheet']).encode())
+                    for t, p in yahoo.items()}
+        reference = None
+        for w in workers:
+            t0 = time.perf_counter()
+            cube = statements.parse_universe(payloads, workers=w)
+            seconds = time.perf_counter() - t0
+            if reference is None:
+                reference = cube
+            same = (np.array_equal(cube.values, reference.values, equal_nan=True)
+                    and np.array_equal(cube.years, reference.years))
+            # O pool é limitado ao nº de CPUs (e não sobe abaixo de POOL_MIN_TICKERS)
+            effective = min(w, os.cpu_count() or 1) if n >= statements.POOL_MIN_TICKERS else 1
+            results.append({'tickers': n, 'workers': w, 'effective_workers': effective,
+                            'seconds': round(seconds, 4), 'identical': same})
+            print(f"[{n:>5} tickers, {w} workers ({effective} efetivos)] {seconds:.3f}s "
+                  f"{'ok' if same else 'DIVERGENTE'}", file=sys.stderr)
+    return {'cpus': os.cpu_count(), 'results': results}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse serial vs pool de processos")
+    parser.add_argument("--sizes", default="500,2000")
+    parser.add_argument("--workers", default="1,2,4")
+    args = parser.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(",")], [int(w) for w in args.workers.split(",")])
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(r['identical'] for r in report['results']) else 1)
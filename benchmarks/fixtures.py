@@ -0,0 +1,353 @@
+"""
+FIXTURES DOS PROVEDORES (GRAVAÇÃO E REPLAY)
+Grava respostas reais de Yahoo (yf.Ticker), Finnhub, BRAPI e Polymarket
+num único .json.gz e as reproduz sem rede, para benchmarks reprodutíveis.
+
+Formato:
+    {
+      "brapi_list": {...},                 # resposta de quote/list
+      "polymarket": {...},                 # resposta de /markets
+      "finnhub": {"AAPL": [...], ...},     # company-news por ticker
+      "yahoo": {"AAPL": {"info": {...}, "financials": split, "balance_sheet": split,
+                         "calendar": {...}}, ...}
+    }
+"""
+
+import gzip
+import json
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import urlparse, parse_qs
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# SERIALIZAÇÃO
+# ============================================================
+
+def _frame_to_json(df):
+    if df is None or df.empty:
+        return None
+    out = df.copy()
+    out.columns = [c.strftime('%Y-%m-%d') if hasattr(c, 'strftime') else str(c) for c in out.columns]
+    return json.loads(out.to_json(orient='split'))
+
+def _frame_from_json(data):
+    if not data:
+        return pd.DataFrame()
+    df = pd.DataFrame(data['data'], index=data['index'], columns=pd.to_datetime(data['columns']))
+    return df.astype('float64')
+
+def _calendar_to_json(calendar):
+    if not isinstance(calendar, dict):
+        return {}
+    out = {}
+    for key, value in calendar.items():
+        if isinstance(value, list):
+            out[key] = [v.isoformat() if hasattr(v, 'isoformat') else v for v in value]
+        elif hasattr(value, 'isoformat'):
+            out[key] = value.isoformat()
+        else:
+            out[key] = value
+    return out
+
+def _calendar_from_json(data):
+    calendar = dict(data or {})
+    if 'Earnings Date' in calendar:
+        calendar['Earnings Date'] = [date.fromisoformat(d) for d in calendar['Earnings Date']]
+    return calendar
+
+def save_fixtures(fixtures, path):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixtures, f)
+
+def load_fixtures(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+# ============================================================
+# GRAVAÇÃO (REDE REAL)
+# ============================================================
+
+def record_fixtures(tickers, path):
+    """Chama os provedores reais uma vez e grava as respostas"""
+    import requests
+    import yfinance as yf
+    import screening
+
+    fixtures = {'finnhub': {}, 'yahoo': {}}
+
+    response = requests.get(f"https://brapi.dev/api/quote/list?token={screening.BRAPI_API_TOKEN}", timeout=30)
+    fixtures['brapi_list'] = response.json()
+
+    response = requests.get("https://clob.polymarket.com/markets",
+                            params={"limit": 2000, "closed": "false"}, timeout=15)
+    fixtures['polymarket'] = response.json()
+
+    for ticker in tickers:
+        fixtures['finnhub'][ticker] = screening.get_news_data(ticker)
+        acao = yf.Ticker(ticker)
+        try:
+            fixtures['yahoo'][ticker] = {
+                'info': json.loads(json.dumps(acao.get_info(), default=str)),
+                'financials': _frame_to_json(acao.financials),
+                'balance_sheet': _frame_to_json(acao.balance_sheet),
+                'calendar': _calendar_to_json(acao.calendar),
+            }
+        except Exception as e:
+            print(f"[fixtures] {ticker}: {e}")
+        time.sleep(0.2)
+
+    save_fixtures(fixtures, path)
+    return fixtures
+
+# ============================================================
+# FIXTURES SINTÉTICAS (MESMO FORMATO DAS GRAVADAS)
+# ============================================================
+
+SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Consumer Cyclical',
+           'Consumer Defensive', 'Energy', 'Industrials', 'Communication Services']
+
+def synthetic_tickers(n):
+    """Lista curada + códigos sintéticos de 4 letras (aceitos pela validação BRAPI)"""
+    import screening
+
+    tickers = list(dict.fromkeys(screening.KNOWN_VALID_TICKERS))[:n]
+    i = 0
+    while len(tickers) < n:
+        code = 'Z' + ''.join(chr(65 + (i // 26 ** k) % 26) for k in (2, 1, 0))
+        tickers.append(code)
+        i += 1
+    return tickers
+
+def synthetic_fixtures(n, seed=42):
+    """Gera fixtures determinísticas para um universo de n tickers"""
+    rng = np.random.default_rng(seed)
+    tickers = synthetic_tickers(n)
+    years = [f"{y}-12-31" for y in range(2025, 2021, -1)]
+    today = date.today()
+
+    fixtures = {
+        'brapi_list': {'stocks': [
+            {'stock': f"{t}34", 'name': f"{t} Corp DRN", 'type': 'bdr'} for t in tickers
+        ]},
+        'polymarket': {'data': [
+            {'question': f"Mercado {i}", 'active': True, 'closed': False} for i in range(200)
+        ]},
+        'finnhub': {},
+        'yahoo': {},
+    }
+
+    for t in tickers:
+        equity = rng.uniform(5e9, 2e11, size=len(years))
+        income = equity * rng.uniform(-0.05, 0.45, size=len(years))
+        revenue = income / rng.uniform(0.05, 0.3, size=len(years))
+        assets = equity * rng.uniform(1.5, 6.0, size=len(years))
+        fixtures['yahoo'][t] = {
+            'info': {
+                'symbol': t,
+                'marketCap': float(rng.uniform(5e9, 3e12)),
+                'forwardPE': float(rng.uniform(5, 80)),
+                'trailingPE': float(rng.uniform(5, 80)),
+                'priceToBook': float(rng.uniform(0.5, 40)),
+                'dividendYield': float(rng.choice([0.0, rng.uniform(0.001, 0.07)])),
+                'sector': str(rng.choice(SECTORS)),
+                'currentPrice': float(rng.uniform(5, 900)),
+                'longName': f"{t} Corporation",
+            },
+            'financials': {
+                'index': ['Net Income', 'Total Revenue'],
+                'columns': years,
+                'data': [income.tolist(), revenue.tolist()],
+            },
+            'balance_sheet': {
+                'index': ['Stockholders Equity', 'Total Assets'],
+                'columns': years,
+                'data': [equity.tolist(), assets.tolist()],
+            },
+            'calendar': {
+                'Earnings Date': [(today + timedelta(days=int(rng.integers(1, 60)))).isoformat()],
+            },
+        }
+        fixtures['finnhub'][t] = [
+            {'headline': f"{t} notícia {k}", 'datetime': 1700000000 + k, 'source': 'fixture'}
+            for k in range(int(rng.integers(0, 12)))
+        ]
+
+    return fixtures
+
+# Preços sintéticos: caminho aleatório determinístico por ticker a partir
+# de uma data fixa, para que downloads incrementais sejam consistentes
+PRICE_EPOCH = date(2015, 1, 2)
+
+def synthetic_prices(tickers, start=None, end=None):
+    """{'dates': [...], 'data': {ticker: {open, high, low, close, volume}}} (dias úteis)"""
+    days = pd.bdate_range(PRICE_EPOCH, end or date.today())
+    first = days.searchsorted(pd.Timestamp(start)) if start else 0
+    out = {'dates': [d.strftime('%Y-%m-%d') for d in days[first:]], 'data': {}}
+    for ticker in tickers:
+        rng = np.random.default_rng(zlib.crc32(str(ticker).encode()))
+        drift, vol = rng.uniform(-0.0002, 0.001), rng.uniform(0.01, 0.035)
+        close = rng.uniform(10, 500) * np.exp(np.cumsum(rng.normal(drift, vol, len(days))))
+        spread = np.abs(rng.normal(0, vol / 2, len(days)))
+        open_ = close * np.exp(rng.normal(0, vol / 3, len(days)))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = rng.lognormal(14, 0.6, len(days)).round()
+        out['data'][ticker] = {
+            'open': open_[first:].round(4).tolist(),
+            'high': high[first:].round(4).tolist(),
+            'low': low[first:].round(4).tolist(),
+            'close': close[first:].round(4).tolist(),
+            'volume': volume[first:].tolist(),
+        }
+    return out
+
+# Razões de BDR usadas pelas cotações sintéticas
+SYNTHETIC_RATIOS = (1, 2, 4, 5, 8, 10, 12, 20, 24, 40)
+
+def synthetic_bdr_quotes(symbols, usd_brl):
+    """
+    Cotações de BDR coerentes com synthetic_prices (prêmio de até ±3%),
+    com a razão de bdr_ratios.csv quando o par está na tabela
+    """
+    import premium
+    import screening
+
+    bases = {s: s[:-2] if s[-2:] in ('34', '35') else s for s in symbols}
+    underlying = {s: screening.TICKER_CORRECTIONS.get(b, b) for s, b in bases.items()}
+    start = (date.today() - timedelta(days=10)).isoformat()
+    last_close = {t: series['close'][-1] if series['close'] else None
+                  for t, series in synthetic_prices(sorted(set(underlying.values())), start)['data'].items()}
+
+    pairs = pd.DataFrame({'ticker_us': [underlying[s] for s in symbols], 'ticker_br': list(symbols)})
+    known = dict(zip(symbols, premium.lookup_ratios(pairs, premium.load_ratios())))
+
+    quotes = []
+    for symbol in symbols:
+        close = last_close.get(underlying[symbol])
+        if close is None:
+            continue
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        ratio = SYNTHETIC_RATIOS[int(rng.integers(len(SYNTHETIC_RATIOS)))]
+        if known[symbol] > 0:
+            ratio = known[symbol]
+        quotes.append({
+            'symbol': symbol,
+            'currency': 'BRL',
+            'regularMarketPrice': round(close * usd_brl / ratio * (1 + rng.uniform(-0.03, 0.03)), 2),
+            'regularMarketVolume': int(rng.lognormal(10, 1.0)),
+            'regularMarketChangePercent': round(float(rng.normal(0, 1.5)), 2),
+        })
+    return quotes
+
+# ============================================================
+# REPLAY
+# ============================================================
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+class FakeTicker:
+    """Imita a superfície de yf.Ticker usada pelo app"""
+
+    def __init__(self, payload):
+        self._payload = payload or {}
+
+    def get_info(self):
+        return dict(self._payload.get('info') or {})
+
+    @property
+    def info(self):
+        return self.get_info()
+
+    @property
+    def financials(self):
+        return _frame_from_json(self._payload.get('financials'))
+
+    @property
+    def balance_sheet(self):
+        return _frame_from_json(self._payload.get('balance_sheet'))
+
+    @property
+    def calendar(self):
+        return _calendar_from_json(self._payload.get('calendar'))
+
+class Replayer:
+    """
+    Responde requests.get / yf.Ticker a partir das fixtures
+    Universos maiores que o gravado reutilizam payloads em rodízio
+    """
+
+    def __init__(self, fixtures, latency_ms=0.0):
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000.0
+        self._yahoo_keys = sorted(fixtures.get('yahoo', {}))
+        self._news_keys = sorted(fixtures.get('finnhub', {}))
+        self.calls = {'brapi': 0, 'finnhub': 0, 'polymarket': 0, 'yahoo': 0}
+
+    def _pick(self, table, keys, ticker):
+        if ticker in table:
+            return table[ticker]
+        if not keys:
+            return None
+        return table[keys[zlib.crc32(str(ticker).encode()) % len(keys)]]
+
+    def yahoo_payload(self, symbol):
+        """Payload Yahoo gravado do ticker (ou o do rodízio); None sem fixtures"""
+        return self._pick(self.fixtures.get('yahoo', {}), self._yahoo_keys, symbol)
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(url)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        query.update(params or {})
+
+        if 'brapi.dev' in parsed.netloc and parsed.path.endswith('/quote/list'):
+            self.calls['brapi'] += 1
+            return FakeResponse(self.fixtures.get('brapi_list', {}))
+        if 'finnhub.io' in parsed.netloc and parsed.path.endswith('/company-news'):
+            self.calls['finnhub'] += 1
+            news = self._pick(self.fixtures.get('finnhub', {}), self._news_keys, query.get('symbol'))
+            return FakeResponse(news or [])
+        if 'polymarket.com' in parsed.netloc:
+            self.calls['polymarket'] += 1
+            return FakeResponse(self.fixtures.get('polymarket', {'data': []}))
+        return FakeResponse({'error': 'sem fixture'}, status_code=404)
+
+    def ticker(self, symbol, *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls['yahoo'] += 1
+        return FakeTicker(self.yahoo_payload(symbol))
+
+    @contextmanager
+    def active(self):
+        """Instala o replay em requests.get e yfinance.Ticker"""
+        import yfinance
+
+        with mock.patch('requests.get', self.get), mock.patch.object(yfinance, 'Ticker', self.ticker):
+            yield self
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Grava fixtures reais dos provedores")
+    parser.add_argument("--tickers", required=True, help="Lista separada por vírgula")
+    parser.add_argument("--out", default="benchmarks/fixtures.json.gz")
+    args = parser.parse_args()
+
+    record_fixtures(args.tickers.split(","), args.out)
+    print(f"✅ Fixtures gravadas em {args.out}")
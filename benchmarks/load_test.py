@@ -0,0 +1,222 @@
+"""
+TESTE DE CARGA: N SESSÕES SIMULTÂNEAS DO DASHBOARD
+Dirige N sessões headless do app.py (streamlit.testing AppTest) no mesmo
+processo — como numa réplica — contra o stand-in local dos provedores,
+e mede latência de rerun (p50/p90/p99), RSS por sessão, tamanho do
+estado de sessão e contenção de cache.
+
+Uso:
+    python benchmarks/load_test.py --sessions 10 --reruns 20
+    python benchmarks/load_test.py --sessions 25 --latency-scale 0.2 --out carga.json
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import random
+import socket
+import logging
+import statistics
+import threading
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Ações de uma sessão: (nome, função que altera um widget e roda)
+ACTIONS = (
+    ('alerta', lambda at, rng: at.slider(key='alert_score').set_value(rng.randint(50, 100)).run()),
+    ('filtro', lambda at, rng: at.sidebar.slider[0].set_value((rng.uniform(0, 20), 200.0)).run()),
+    ('graficos', lambda at, rng: at.checkbox(key='show_charts').set_value(rng.random() < 0.5).run()),
+    ('rerun', lambda at, rng: at.run()),
+)
+
+# ============================================================
+# MEDIÇÕES
+# ============================================================
+
+def rss_mb():
+    """RSS atual do processo (Linux: /proc; fallback: pico via resource)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        'n': len(ordered),
+        'p50_ms': round(pick(0.50) * 1000, 1),
+        'p90_ms': round(pick(0.90) * 1000, 1),
+        'p99_ms': round(pick(0.99) * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 1),
+    }
+
+def session_bytes(at):
+    """Tamanho serializado do estado pesado da sessão"""
+    total = 0
+    for key in ('dashboard_data', 'history'):
+        if key in at.session_state:
+            try:
+                total += len(pickle.dumps(at.session_state[key]))
+            except Exception:
+                pass
+    return total
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# ============================================================
+# SESSÕES
+# ============================================================
+
+def note_keys(at, record):
+    """Acumula a seleção corrente (muda quando o universo BRAPI chega)"""
+    if 'dashboard_data' in at.session_state:
+        record['tickers'].update(at.session_state['dashboard_data']['key'])
+
+def run_session(index, reruns, seed, results, barrier):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + index)
+    record = {'initial': None, 'reruns': [], 'errors': [], 'bytes': 0, 'tickers': set()}
+    results[index] = record
+    at = AppTest.from_file(APP_PATH, default_timeout=900)
+
+    barrier.wait()
+    t0 = time.perf_counter()
+    at.run()
+    record['initial'] = time.perf_counter() - t0
+    record['errors'].extend(str(e.value) for e in at.exception)
+    note_keys(at, record)
+
+    for _ in range(reruns):
+        name, action = rng.choice(ACTIONS)
+        t0 = time.perf_counter()
+        try:
+            action(at, rng)
+        except Exception as e:
+            record['errors'].append(f"{name}: {e}")
+            continue
+        record['reruns'].append((name, time.perf_counter() - t0))
+        record['errors'].extend(str(e.value) for e in at.exception)
+        note_keys(at, record)
+
+    record['bytes'] = session_bytes(at)
+    record['app'] = at  # mantém a sessão viva para a medição de RSS
+
+def run(sessions=10, reruns=20, latency_scale=1.0, seed=1, stub_config=None):
+    # O stand-in precisa estar configurado antes do primeiro import do screening
+    port = free_port()
+    os.environ['PROVIDER_STUB_URL'] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault('BDR_METRICS_PORT', '0')
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+
+    import provider_stub
+
+    if stub_config is None:
+        with open(provider_stub.CONFIG_PATH, encoding='utf-8') as f:
+            stub_config = json.load(f)
+    for spec in stub_config.get('endpoints', {}).values():
+        latency = spec.get('latency_ms') or {}
+        for key in ('ms', 'min', 'max', 'mean', 'std', 'median', 'slow_ms'):
+            if key in latency:
+                latency[key] *= latency_scale
+    server, stub = provider_stub.start(port=port, config=stub_config)
+
+    import instrumentation
+
+    rss_base = rss_mb()
+    results = [None] * sessions
+    barrier = threading.Barrier(sessions)
+    threads = [threading.Thread(target=run_session, args=(i, reruns, seed, results, barrier))
+               for i in range(sessions)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    rss_after = rss_mb()
+
+    rerun_times = [t for r in results for _, t in r['reruns']]
+    by_action = {}
+    for r in results:
+        for name, t in r['reruns']:
+            by_action.setdefault(name, []).append(t)
+
+    # Misses acima do nº de chaves distintas = mesma chave recomputada por
+    # sessões concorrentes (ou expirada); polymarket tem uma chave só. As
+    # chaves são todas as seleções vistas durante a sessão, não só a final:
+    # a seleção troca quando o universo BRAPI substitui o de fallback
+    tickers = set().union(*(r['tickers'] for r in results))
+    cache = instrumentation.METRICS.cache_summary()
+    for row in cache:
+        unique = 1 if row['cache'] == 'polymarket' else len(tickers)
+        row['misses'] = row['chamadas'] - row['hits']
+        row['chaves distintas'] = unique
+        row['misses duplicados'] = max(0, row['misses'] - unique)
+
+    with stub.stats_lock:
+        stub_stats = {k: dict(v) for k, v in stub.stats.items()}
+    server.shutdown()
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'sessions': sessions,
+        'reruns_per_session': reruns,
+        'latency_scale': latency_scale,
+        'wall_seconds': round(wall, 2),
+        'initial_run': percentiles([r['initial'] for r in results if r['initial'] is not None]),
+        'rerun': percentiles(rerun_times),
+        'rerun_by_action': {k: percentiles(v) for k, v in sorted(by_action.items())},
+        'memory': {
+            'rss_base_mb': round(rss_base, 1),
+            'rss_after_mb': round(rss_after, 1),
+            'rss_per_session_mb': round((rss_after - rss_base) / sessions, 2),
+            'session_state_kb_mean': round(statistics.mean(r['bytes'] for r in results) / 1024, 1),
+        },
+        'cache': cache,
+        'stages': instrumentation.METRICS.stage_summary(),
+        'providers': instrumentation.METRICS.provider_summary(),
+        'stub': stub_stats,
+        'errors': sorted({e for r in results for e in r['errors']})[:20],
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Teste de carga com N sessões do dashboard")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplica as latências do provider_stub.json (0 = sem latência)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    report = run(args.sessions, args.reruns, args.latency_scale, args.seed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
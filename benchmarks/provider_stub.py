@@ -0,0 +1,295 @@
+"""
+STAND-IN LOCAL DOS PROVEDORES (LATÊNCIA E FALHAS)
+Emula os endpoints usados pelo app para testes de carga sem gastar cota:
+
+    /brapi/quote/list                      BRAPI
+    /brapi/quote/A34,B34                   BRAPI (cotações em lote)
+    /brapi/v2/currency?currency=USD-BRL    BRAPI (câmbio)
+    /finnhub/company-news?symbol=X         Finnhub
+    /polymarket/markets                    Polymarket CLOB
+    /yahoo/<ticker>/<info|financials|balance_sheet|calendar>   superfície "Yahoo"
+    /yahoo/history?symbols=A,B&start=AAAA-MM-DD                OHLCV diário em lote
+    /stats                                 contadores por endpoint
+    POST /config                           altera latência/erros em tempo real
+    POST /webhook                          recebe alertas (GET /webhook lista os recebidos)
+
+Cada endpoint tem distribuição de latência, taxa de erro (5xx), limite de
+taxa (429 via token bucket) e escala de payload configuráveis
+(provider_stub.json). Para apontar o app para o stand-in:
+
+    python benchmarks/provider_stub.py --port 8600
+    PROVIDER_STUB_URL=http://127.0.0.1:8600 streamlit run app.py
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import defaultdict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures as fx
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "provider_stub.json")
+YAHOO_FIELDS = ('info', 'financials', 'balance_sheet', 'calendar')
+STUB_USD_BRL = 5.40
+
+# ============================================================
+# COMPORTAMENTO POR ENDPOINT
+# ============================================================
+
+def sample_latency(spec, rng):
+    """Latência (segundos) a partir da distribuição configurada"""
+    if not spec:
+        return 0.0
+    dist = spec.get('dist', 'constant')
+    if dist == 'uniform':
+        ms = rng.uniform(spec.get('min', 0), spec.get('max', 0))
+    elif dist == 'normal':
+        ms = max(0.0, rng.gauss(spec.get('mean', 0), spec.get('std', 0)))
+    elif dist == 'lognormal':
+        ms = spec.get('median', 0) * rng.lognormvariate(0, spec.get('sigma', 0.5))
+    else:
+        ms = spec.get('ms', 0)
+    # Cauda lenta opcional (timeouts, GC do provedor etc.)
+    if spec.get('slow_rate') and rng.random() < spec['slow_rate']:
+        ms = spec.get('slow_ms', ms)
+    return ms / 1000.0
+
+class TokenBucket:
+    def __init__(self, per_second, burst):
+        self.rate = per_second
+        self.capacity = burst or per_second
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class ProviderStub:
+    """Estado do stand-in: dados, configuração, buckets e contadores"""
+
+    def __init__(self, config):
+        self.rng = random.Random(config.get('seed'))
+        self.rng_lock = threading.Lock()
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.stats_lock = threading.Lock()
+        self.webhooks = deque(maxlen=1000)
+        self.apply_config(config)
+
+        if config.get('fixtures'):
+            self.fixtures = fx.load_fixtures(config['fixtures'])
+        else:
+            self.fixtures = fx.synthetic_fixtures(config.get('universe_size', 500), seed=config.get('seed', 42))
+        self.replayer = fx.Replayer(self.fixtures)
+
+    def apply_config(self, config):
+        self.config = config
+        self.buckets = {
+            name: TokenBucket(spec.get('rate_limit', {}).get('per_second', 0),
+                              spec.get('rate_limit', {}).get('burst', 0))
+            for name, spec in config.get('endpoints', {}).items()
+        }
+
+    def spec(self, endpoint):
+        return self.config.get('endpoints', {}).get(endpoint, {})
+
+    def count(self, endpoint, key, amount=1):
+        with self.stats_lock:
+            self.stats[endpoint][key] += amount
+
+    def decide(self, endpoint):
+        """(atraso, status) para uma requisição: 429, 5xx ou 200"""
+        spec = self.spec(endpoint)
+        with self.rng_lock:
+            delay = sample_latency(spec.get('latency_ms'), self.rng)
+            failed = self.rng.random() < spec.get('error_rate', 0.0)
+            throttled_random = self.rng.random() < spec.get('rate_limit_rate', 0.0)
+        bucket = self.buckets.get(endpoint)
+        if throttled_random or (bucket and not bucket.take()):
+            return delay, 429
+        if failed:
+            return delay, self.rng.choice((500, 502, 503))
+        return delay, 200
+
+    def payload(self, endpoint, path, query):
+        """Corpo da resposta (ou None se a rota não existe)"""
+        scale = max(1, int(self.spec(endpoint).get('payload_scale', 1)))
+
+        if endpoint == 'brapi_list':
+            return self.fixtures.get('brapi_list', {'stocks': []})
+        if endpoint == 'finnhub_news':
+            news = self.replayer.get('https://finnhub.io/api/v1/company-news',
+                                     params={'symbol': query.get('symbol', '')}).json()
+            return news * scale
+        if endpoint == 'polymarket_markets':
+            markets = self.fixtures.get('polymarket', {}).get('data', [])
+            return {'data': markets * scale}
+        if endpoint == 'brapi_quote':
+            symbols = [t for t in path.rsplit('/', 1)[-1].split(',') if t]
+            return {'results': fx.synthetic_bdr_quotes(symbols, STUB_USD_BRL)}
+        if endpoint == 'brapi_currency':
+            return {'currency': [{'fromCurrency': 'USD', 'toCurrency': 'BRL',
+                                  'bidPrice': f"{STUB_USD_BRL - 0.002:.4f}",
+                                  'askPrice': f"{STUB_USD_BRL + 0.002:.4f}"}]}
+        if endpoint == 'yahoo_history':
+            symbols = [t for t in query.get('symbols', '').split(',') if t]
+            return fx.synthetic_prices(symbols, query.get('start'), query.get('end'))
+        if endpoint == 'yahoo':
+            parts = path.strip('/').split('/')
+            if len(parts) != 3 or parts[2] not in YAHOO_FIELDS:
+                return None
+            payload = self.replayer.yahoo_payload(parts[1]) or {}
+            return payload.get(parts[2])
+        return None
+
+def route(path):
+    """Endpoint lógico a partir do caminho"""
+    if path.startswith('/brapi/quote/list'):
+        return 'brapi_list'
+    if path.startswith('/brapi/quote/'):
+        return 'brapi_quote'
+    if path.startswith('/brapi/v2/currency'):
+        return 'brapi_currency'
+    if path.startswith('/finnhub/company-news'):
+        return 'finnhub_news'
+    if path.startswith('/polymarket/markets'):
+        return 'polymarket_markets'
+    if path.startswith('/yahoo/history'):
+        return 'yahoo_history'
+    if path.startswith('/yahoo/'):
+        return 'yahoo'
+    return None
+
+# ============================================================
+# HTTP
+# ============================================================
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+            if parsed.path == '/webhook':
+                with stub.stats_lock:
+                    body = json.dumps(list(stub.webhooks), ensure_ascii=False)
+                return self._send(200, body.encode('utf-8'))
+
+            if parsed.path == '/stats':
+                with stub.stats_lock:
+                    body = json.dumps({k: dict(v) for k, v in stub.stats.items()})
+                return self._send(200, body.encode('utf-8'))
+
+            endpoint = route(parsed.path)
+            if endpoint is None:
+                return self._send(404, b'{"error": "not found"}')
+
+            delay, status = stub.decide(endpoint)
+            stub.count(endpoint, 'requests')
+            if delay:
+                time.sleep(delay)
+
+            if status == 429:
+                stub.count(endpoint, 'rate_limited')
+                return self._send(429, b'{"error": "Too Many Requests"}', {'Retry-After': '1'})
+            if status != 200:
+                stub.count(endpoint, 'errors')
+                return self._send(status, b'{"error": "upstream failure"}')
+
+            payload = stub.payload(endpoint, parsed.path, query)
+            if payload is None and endpoint == 'yahoo':
+                return self._send(404, b'{"error": "unknown field"}')
+            body = json.dumps(payload).encode('utf-8')
+            stub.count(endpoint, 'bytes', len(body))
+            self._send(200, body)
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path not in ('/config', '/webhook'):
+                return self._send(404, b'{"error": "not found"}')
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                update = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._send(400, b'{"error": "invalid JSON"}')
+            if path == '/webhook':
+                stub.count('webhook', 'requests')
+                with stub.stats_lock:
+                    stub.webhooks.append(update)
+                return self._send(200, b'{"ok": true}')
+            config = dict(stub.config)
+            endpoints = {k: dict(v) for k, v in config.get('endpoints', {}).items()}
+            for name, spec in update.get('endpoints', {}).items():
+                endpoints.setdefault(name, {}).update(spec)
+            config['endpoints'] = endpoints
+            stub.apply_config(config)
+            self._send(200, json.dumps(config).encode('utf-8'))
+
+        def _send(self, code, body, headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def start(port=8600, host="127.0.0.1", config=None):
+    """Sobe o stand-in numa thread (para testes de carga no mesmo processo)"""
+    if config is None:
+        with open(CONFIG_PATH, encoding="utf-8") as f:
+            config = json.load(f)
+    stub = ProviderStub(config)
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="provider-stub").start()
+    return server, stub
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stand-in local dos provedores")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--no-latency", action="store_true", help="Zera latências (só falhas)")
+    args = parser.parse_args()
+
+    with open(args.config, encoding="utf-8") as f:
+        cfg = json.load(f)
+    if args.no_latency:
+        for spec in cfg.get('endpoints', {}).values():
+            spec['latency_ms'] = None
+
+    stub = ProviderStub(cfg)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    server.daemon_threads = True
+    print(f"🧪 Stand-in em http://{args.host}:{args.port}  (PROVIDER_STUB_URL=http://{args.host}:{args.port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,200 @@
+"""
+EXPORTAÇÃO (CSV / EXCEL)
+Geração dos arquivos de download sem Streamlit; o app memoriza o
+resultado pelo hash do conteúdo dos DataFrames
+"""
+
+import os
+import hashlib
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# HASH DE CONTEÚDO
+# ============================================================
+
+def frame_hash(*frames):
+    """Hash estável do conteúdo (valores + colunas) de um ou mais DataFrames"""
+    h = hashlib.blake2b(digest_size=16)
+    for df in frames:
+        if df is None:
+            h.update(b"<none>")
+            continue
+        h.update("|".join(map(str, df.columns)).encode("utf-8"))
+        # Índice nomeado (ex.: ticker) faz parte do conteúdo
+        h.update(pd.util.hash_pandas_object(df, index=df.index.name is not None).values.tobytes())
+    return h.hexdigest()
+
+# ============================================================
+# GERADORES
+# ============================================================
+
+def _with_index(df):
+    """Índice nomeado (ex.: ticker) vira a primeira coluna"""
+    return df.reset_index() if df.index.name is not None else df
+
+def build_csv(df):
+    """CSV em UTF-8"""
+    return _with_index(df).to_csv(index=False).encode('utf-8')
+
+def _excel_value(value):
+    """Converte tipos numpy/pandas para valores aceitos pelo openpyxl"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+def build_excel(dfs_dict):
+    """
+    Excel com uma aba por DataFrame
+    Usa o modo write-only do openpyxl: as linhas são gravadas em streaming,
+    sem montar a planilha inteira em memória
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for sheet_name, df in dfs_dict.items():
+        df = _with_index(df)
+        ws = wb.create_sheet(title=str(sheet_name)[:31])
+        ws.append([str(c) for c in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            ws.append([_excel_value(v) for v in row])
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+# ============================================================
+# ARROW / PARQUET (SCHEMA ESTÁVEL)
+# ============================================================
+# Categorias fixas mantêm o dicionário estável entre exportações;
+# `setor` é categórico mas com categorias vindas dos dados.
+
+STATUS_CATEGORIES = ['🟢 Excelente', '🟡 Bom', '🟠 Atenção', '🔴 Fraco']
+PRIORITY_CATEGORIES = ['🔴 Urgente', '🟠 Alta', '🟡 Média']
+
+# (coluna, tipo) — 'category' vira dictionary<int32, string> no Arrow
+TABLE_COLUMNS = {
+    'fundamentals': [
+        ('ticker', 'string'), ('market_cap', 'float64'), ('pe', 'float64'),
+        ('pb', 'float64'), ('div_yield', 'float64'), ('roe', 'float64'),
+        ('status', 'category'), ('score', 'float64'), ('setor', 'category'),
+        ('price', 'float64'),
+    ],
+    'news': [
+        ('ticker', 'string'), ('bdr', 'string'), ('score', 'float64'),
+        ('priority', 'category'), ('events', 'string'),
+    ],
+    'bdrs': [
+        ('ticker_br', 'string'), ('ticker_us', 'string'), ('name', 'string'),
+        ('type', 'category'),
+    ],
+}
+
+FIXED_CATEGORIES = {
+    'status': STATUS_CATEGORIES,
+    'priority': PRIORITY_CATEGORIES,
+}
+
+def table_schema(kind):
+    """Schema Arrow estável de uma tabela ('fundamentals', 'news', 'bdrs')"""
+    import pyarrow as pa
+
+    types = {
+        'string': pa.string(),
+        'float64': pa.float64(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(name, types[dtype]) for name, dtype in TABLE_COLUMNS[kind]])
+
+def to_arrow_table(df, kind):
+    """Converte um DataFrame para o schema estável (colunas ausentes viram null)"""
+    import pyarrow as pa
+
+    df = _with_index(df)
+    columns = {}
+    for name, dtype in TABLE_COLUMNS[kind]:
+        col = df[name] if name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if dtype == 'category':
+            categories = FIXED_CATEGORIES.get(name)
+            col = col.astype(object).where(col.notna(), None)
+            if categories is None:
+                categories = sorted(col.dropna().unique().tolist())
+            col = pd.Categorical(col, categories=categories)
+        elif dtype == 'float64':
+            col = pd.to_numeric(col, errors='coerce').astype('float64')
+        else:
+            col = col.astype(object).where(col.notna(), None)
+        columns[name] = pd.Series(col).reset_index(drop=True)
+
+    return pa.Table.from_pandas(pd.DataFrame(columns), schema=table_schema(kind), preserve_index=False)
+
+def build_parquet(df, kind):
+    """Parquet (zstd) com schema estável"""
+    import pyarrow.parquet as pq
+
+    buffer = BytesIO()
+    pq.write_table(to_arrow_table(df, kind), buffer, compression='zstd')
+    return buffer.getvalue()
+
+def build_arrow(df, kind):
+    """Arrow IPC (formato arquivo, sem compressão: pode ser memory-mapped)"""
+    import pyarrow as pa
+
+    table = to_arrow_table(df, kind)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def read_table(path):
+    """Lê .arrow via memory map (zero-cópia) ou .parquet"""
+    import pyarrow as pa
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+# ============================================================
+# CAMINHO HEADLESS (SNAPSHOT -> TABELAS)
+# ============================================================
+
+SNAPSHOT_TABLES = ('fundamentals', 'news', 'bdrs')
+
+def write_snapshot_tables(snapshot, out_dir, formats=('arrow', 'parquet')):
+    """Grava as tabelas do snapshot em out_dir/<tabela>.<formato>"""
+    builders = {'arrow': build_arrow, 'parquet': build_parquet}
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for kind in SNAPSHOT_TABLES:
+        df = pd.DataFrame(snapshot.get(kind, []))
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{kind}.{fmt}")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(builders[fmt](df, kind))
+            os.replace(tmp_path, path)
+            written.append(path)
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    import snapshot as snap
+
+    parser = argparse.ArgumentParser(description="Exporta o snapshot em Arrow IPC / Parquet")
+    parser.add_argument("--snapshot", default=snap.SNAPSHOT_PATH)
+    parser.add_argument("--out", default=snap.SNAPSHOT_DIR)
+    parser.add_argument("--format", default="arrow,parquet", help="arrow, parquet ou ambos")
+    args = parser.parse_args()
+
+    data = snap.load_snapshot(args.snapshot)
+    if data is None:
+        raise SystemExit(f"Snapshot não encontrado: {args.snapshot} (rode python snapshot.py)")
+    for path in write_snapshot_tables(data, args.out, args.format.split(",")):
+        print(f"✅ {path}")
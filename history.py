@@ -0,0 +1,224 @@
+"""
+HISTÓRICO DE FUNDAMENTOS (COLUNAR, EM DISCO)
+Snapshots diários da tabela de fundamentos, append-only em Parquet:
+
+    history/date=2025-01-31/part-<hora>-<pid>.parquet   (um por gravação)
+    history/date=2025-01-31/day-<hora>.parquet          (após compactação)
+
+Compartilhado por todas as sessões e processos; cada sessão guarda só o
+caminho do part que gravou. A compactação junta os parts de um dia num
+arquivo só, mantendo a captura mais recente de cada ticker.
+
+Uso:
+    python history.py compact
+    python history.py show AAPL roe
+"""
+
+import os
+import time
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+import exports
+
+HISTORY_DIR = os.environ.get("BDR_HISTORY_DIR", "history")
+
+# Métricas consultáveis ao longo do tempo
+METRICS = ('market_cap', 'pe', 'pb', 'div_yield', 'roe', 'score', 'price')
+
+def history_schema():
+    """Schema dos fundamentos + data do snapshot e instante da captura"""
+    import pyarrow as pa
+
+    schema = exports.table_schema('fundamentals')
+    return (schema.append(pa.field('date', pa.date32()))
+                  .append(pa.field('captured_at', pa.timestamp('s'))))
+
+class HistoryStore:
+    """Armazém append-only particionado por dia"""
+
+    def __init__(self, root=HISTORY_DIR, compact_after=8):
+        self.root = root
+        self.compact_after = compact_after
+        self.lock = threading.Lock()
+        self._seen = set()  # (dia, hash) já gravados por este processo
+
+    # --------------------------------------------------------
+    # Escrita
+    # --------------------------------------------------------
+
+    def _day_dir(self, day):
+        return os.path.join(self.root, f"date={day.isoformat()}")
+
+    def append(self, records, when=None):
+        """
+        Grava um part com os fundamentos (lista de dicts ou DataFrame)
+        Retorna o caminho do part, ou None se vazio / idêntico a um já gravado
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        if df.empty:
+            return None
+        when = when or datetime.now()
+        day = when.date()
+
+        # Sessões que compartilham o cache produzem o mesmo conteúdo: grava uma vez
+        key = (day, exports.frame_hash(df))
+        with self.lock:
+            if key in self._seen:
+                return None
+            self._seen.add(key)
+
+        table = exports.to_arrow_table(df, 'fundamentals')
+        table = table.append_column('date', pa.array([day] * len(table), pa.date32()))
+        table = table.append_column(
+            'captured_at', pa.array([when.replace(microsecond=0)] * len(table), pa.timestamp('s')))
+
+        day_dir = self._day_dir(day)
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"part-{when.strftime('%H%M%S%f')}-{os.getpid()}.parquet")
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+        if len(self.parts(day)) > self.compact_after:
+            self.compact(day)
+        return path
+
+    def compact(self, day=None):
+        """Junta os arquivos de um dia (ou de todos) num só; devolve nº de arquivos removidos"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        removed = 0
+        for current in ([day] if day else self.days()):
+            files = self._files(current)
+            if len(files) <= 1:
+                continue
+            tables = []
+            for path in files:
+                try:
+                    tables.append(pq.read_table(path))
+                except FileNotFoundError:  # compactado por outro processo
+                    continue
+            if not tables:
+                continue
+            df = _latest_per_ticker(pa.concat_tables(tables, promote_options='permissive').to_pandas())
+
+            path = os.path.join(self._day_dir(current),
+                                f"day-{datetime.now().strftime('%H%M%S%f')}-{os.getpid()}.parquet")
+            tmp_path = f"{path}.tmp"
+            pq.write_table(_to_history_table(df), tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+            for old in files:
+                try:
+                    os.remove(old)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    # --------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------
+
+    def days(self):
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            if name.startswith("date="):
+                try:
+                    found.append(date.fromisoformat(name[5:]))
+                except ValueError:
+                    pass
+        return sorted(found)
+
+    def _files(self, day):
+        day_dir = self._day_dir(day)
+        if not os.path.isdir(day_dir):
+            return []
+        return sorted(os.path.join(day_dir, name) for name in os.listdir(day_dir)
+                      if name.endswith('.parquet'))
+
+    def parts(self, day):
+        """Parts ainda não compactados de um dia"""
+        return [p for p in self._files(day) if os.path.basename(p).startswith('part-')]
+
+    def read(self, tickers=None, columns=None, start=None, end=None):
+        """
+        Fundamentos históricos (um registro por ticker por dia)
+        Lê só as colunas e os dias pedidos; filtra tickers na leitura
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        wanted = None
+        if columns is not None:
+            wanted = list(dict.fromkeys(['ticker', 'date', 'captured_at', *columns]))
+        filters = [('ticker', 'in', list(tickers))] if tickers else None
+
+        tables = []
+        for day in self.days():
+            if (start and day < start) or (end and day > end):
+                continue
+            for path in self._files(day):
+                try:
+                    tables.append(pq.read_table(path, columns=wanted, filters=filters))
+                except FileNotFoundError:  # removido por uma compactação em curso
+                    continue
+        if not tables:
+            return pd.DataFrame(columns=wanted or history_schema().names)
+
+        df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+        return _latest_per_ticker(df)
+
+    def metric(self, ticker, metric, start=None, end=None):
+        """Série diária de uma métrica de um ticker (índice = data)"""
+        if metric not in METRICS:
+            raise ValueError(f"Métrica desconhecida: {metric} (use {', '.join(METRICS)})")
+        df = self.read([ticker], [metric], start, end)
+        series = df.set_index('date')[metric].astype('float64')
+        series.index = pd.to_datetime(series.index)
+        series.name = metric
+        return series
+
+def _latest_per_ticker(df):
+    """Mantém a captura mais recente de cada (dia, ticker)"""
+    if df.empty:
+        return df
+    df = df.sort_values('captured_at', kind='stable')
+    return df.drop_duplicates(['date', 'ticker'], keep='last').sort_values(['date', 'ticker'])\
+             .reset_index(drop=True)
+
+def _to_history_table(df):
+    import pyarrow as pa
+
+    table = exports.to_arrow_table(df, 'fundamentals')
+    table = table.append_column('date', pa.array(df['date'].tolist(), pa.date32()))
+    return table.append_column(
+        'captured_at', pa.array(pd.to_datetime(df['captured_at']).tolist(), pa.timestamp('s')))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Histórico de fundamentos")
+    parser.add_argument("--root", default=HISTORY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="Compacta os parts de cada dia")
+    show = sub.add_parser("show", help="Métrica de um ticker ao longo do tempo")
+    show.add_argument("ticker")
+    show.add_argument("metric", choices=METRICS)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.root)
+    if args.command == "compact":
+        t0 = time.perf_counter()
+        removed = store.compact()
+        print(f"✅ {removed} arquivos compactados em {time.perf_counter() - t0:.2f}s")
+    else:
+        print(store.metric(args.ticker.upper(), args.metric).to_string())
@@ -0,0 +1,312 @@
+"""
+INSTRUMENTAÇÃO (PROVEDORES, CACHE E ETAPAS)
+Registro em memória, compartilhado pelo processo, com latência (histograma),
+chamadas, erros, retries, bytes por provedor, hit ratio dos caches, tempo
+por etapa do dashboard e erros das threads em segundo plano. Exportável em
+formato texto do Prometheus.
+"""
+
+import os
+import time
+import bisect
+import functools
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+# Limites dos buckets (segundos)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_PORT = int(os.environ.get("BDR_METRICS_PORT", "9108"))
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+
+    def quantile(self, q):
+        """Estimativa pelo limite superior do bucket (como o Prometheus)"""
+        if not self.n:
+            return 0.0
+        target = q * self.n
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else float('inf')
+        return float('inf')
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.latency = defaultdict(Histogram)           # provider -> hist
+            self.requests = defaultdict(int)                # (provider, status) -> n
+            self.retries = defaultdict(int)                 # provider -> n
+            self.bytes = defaultdict(int)                   # provider -> bytes
+            self.cache_calls = defaultdict(int)             # função -> chamadas
+            self.cache_misses = defaultdict(int)            # função -> execuções reais
+            self.stages = defaultdict(Histogram)            # etapa -> hist
+            self.errors = defaultdict(int)                  # (componente, exceção) -> n
+            self.last_errors = {}                           # componente -> última mensagem
+
+    def observe_request(self, provider, seconds, status, nbytes=0):
+        with self.lock:
+            self.latency[provider].observe(seconds)
+            self.requests[(provider, str(status))] += 1
+            self.bytes[provider] += nbytes
+
+    def observe_retry(self, provider):
+        with self.lock:
+            self.retries[provider] += 1
+
+    def observe_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name].observe(seconds)
+
+    def observe_error(self, component, error):
+        """Erro engolido por uma thread em segundo plano (agendador, alertas...)"""
+        with self.lock:
+            self.errors[(component, type(error).__name__)] += 1
+            self.last_errors[component] = str(error)[:200]
+
+    def count_cache(self, name, miss=False):
+        with self.lock:
+            if miss:
+                self.cache_misses[name] += 1
+            else:
+                self.cache_calls[name] += 1
+
+    # --------------------------------------------------------
+    # Resumos
+    # --------------------------------------------------------
+
+    def provider_summary(self):
+        """Linhas por provedor para a tabela do expander"""
+        with self.lock:
+            rows = []
+            for provider, hist in sorted(self.latency.items()):
+                statuses = {s: n for (p, s), n in self.requests.items() if p == provider}
+                errors = sum(n for s, n in statuses.items() if s != '200')
+                rows.append({
+                    'provedor': provider,
+                    'chamadas': hist.n,
+                    'erros': errors,
+                    '429': statuses.get('429', 0),
+                    'retries': self.retries.get(provider, 0),
+                    'média (ms)': round(hist.total / hist.n * 1000, 1) if hist.n else 0.0,
+                    'p50 (ms)': hist.quantile(0.5) * 1000,
+                    'p95 (ms)': hist.quantile(0.95) * 1000,
+                    'KB': round(self.bytes.get(provider, 0) / 1024, 1),
+                })
+            return rows
+
+    def cache_summary(self):
+        with self.lock:
+            rows = []
+            for name, calls in sorted(self.cache_calls.items()):
+                misses = min(self.cache_misses.get(name, 0), calls)
+                rows.append({
+                    'cache': name,
+                    'chamadas': calls,
+                    'hits': calls - misses,
+                    'hit ratio': round((calls - misses) / calls, 3) if calls else 0.0,
+                })
+            return rows
+
+    def error_summary(self):
+        with self.lock:
+            return [{
+                'componente': component,
+                'erro': kind,
+                'ocorrências': n,
+                'última': self.last_errors.get(component, ''),
+            } for (component, kind), n in sorted(self.errors.items())]
+
+    def stage_summary(self):
+        with self.lock:
+            return [{
+                'etapa': name,
+                'execuções': hist.n,
+                'média (ms)': round(hist.total / hist.n * 1000, 1) if hist.n else 0.0,
+                'p95 (ms)': hist.quantile(0.95) * 1000,
+            } for name, hist in sorted(self.stages.items())]
+
+    # --------------------------------------------------------
+    # Prometheus
+    # --------------------------------------------------------
+
+    def render_prometheus(self):
+        lines = []
+
+        def histogram(name, help_text, label, items):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in items:
+                running = 0
+                for bound, count in zip(BUCKETS, hist.counts):
+                    running += count
+                    lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {running}')
+                lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {hist.n}')
+                lines.append(f'{name}_sum{{{label}="{key}"}} {hist.total:.6f}')
+                lines.append(f'{name}_count{{{label}="{key}"}} {hist.n}')
+
+        def counter(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{rendered}}} {value}")
+
+        with self.lock:
+            histogram("bdr_provider_request_seconds", "Latência das chamadas aos provedores",
+                      "provider", sorted(self.latency.items()))
+            counter("bdr_provider_requests_total", "Chamadas aos provedores por status",
+                    [({'provider': p, 'status': s}, n) for (p, s), n in sorted(self.requests.items())])
+            counter("bdr_provider_retries_total", "Retries por provedor",
+                    [({'provider': p}, n) for p, n in sorted(self.retries.items())])
+            counter("bdr_provider_bytes_total", "Bytes recebidos por provedor",
+                    [({'provider': p}, n) for p, n in sorted(self.bytes.items())])
+            counter("bdr_cache_requests_total", "Chamadas às funções cacheadas",
+                    [({'cache': c, 'result': 'hit'}, n - min(self.cache_misses.get(c, 0), n))
+                     for c, n in sorted(self.cache_calls.items())] +
+                    [({'cache': c, 'result': 'miss'}, min(self.cache_misses.get(c, 0), n))
+                     for c, n in sorted(self.cache_calls.items())])
+            histogram("bdr_stage_seconds", "Duração das etapas do dashboard",
+                      "stage", sorted(self.stages.items()))
+            counter("bdr_background_errors_total", "Erros das threads em segundo plano",
+                    [({'component': c, 'error': e}, n) for (c, e), n in sorted(self.errors.items())])
+
+        return "\n".join(lines) + "\n"
+
+METRICS = Registry()
+
+# ============================================================
+# PONTOS DE INSTRUMENTAÇÃO
+# ============================================================
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def http_get(provider, url, retries=0, backoff=0.5, acquire=None, **kwargs):
+    """
+    requests.get medido; com retries > 0, repete em 429/5xx/erro de rede
+    `acquire` é chamado antes de cada tentativa (ex.: token de um limite de taxa)
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            METRICS.observe_retry(provider)
+            time.sleep(backoff * attempt)
+        if acquire is not None:
+            acquire()
+        t0 = time.perf_counter()
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.RequestException:
+            METRICS.observe_request(provider, time.perf_counter() - t0, 'error')
+            if attempt == retries:
+                raise
+            continue
+        METRICS.observe_request(provider, time.perf_counter() - t0,
+                                response.status_code, len(response.content or b''))
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+    return response
+
+class InstrumentedTicker:
+    """Mede as chamadas de um yf.Ticker (cada atributo acessado é uma busca)"""
+
+    FETCHES = ('get_info', 'info', 'financials', 'balance_sheet', 'calendar')
+
+    def __init__(self, ticker, provider='yahoo'):
+        self._ticker = ticker
+        self._provider = provider
+
+    def __getattr__(self, name):
+        if name not in self.FETCHES:
+            return getattr(self._ticker, name)
+        if name == 'get_info':
+            return lambda: self._measure(self._ticker.get_info)
+        return self._measure(lambda: getattr(self._ticker, name))
+
+    def _measure(self, fetch):
+        t0 = time.perf_counter()
+        try:
+            value = fetch()
+        except Exception:
+            METRICS.observe_request(self._provider, time.perf_counter() - t0, 'error')
+            raise
+        METRICS.observe_request(self._provider, time.perf_counter() - t0, 200)
+        return value
+
+@contextmanager
+def stage(name):
+    """Cronometra uma etapa do dashboard"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe_stage(name, time.perf_counter() - t0)
+
+def count_misses(name, fn):
+    """Envolve a função real: só executa (e conta) em cache miss"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        METRICS.count_cache(name, miss=True)
+        return fn(*args, **kwargs)
+    return wrapper
+
+def count_calls(name, cached_fn):
+    """Envolve a função cacheada: conta todas as chamadas"""
+    @functools.wraps(cached_fn)
+    def wrapper(*args, **kwargs):
+        METRICS.count_cache(name)
+        return cached_fn(*args, **kwargs)
+    return wrapper
+
+# ============================================================
+# ENDPOINT /metrics
+# ============================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = METRICS.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Sobe /metrics numa thread; None se desativado (porta 0) ou ocupada"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,183 @@
+"""
+PRÊMIO / DESCONTO DAS BDRs (EM BRL)
+Compara a cotação de cada BDR na B3 com o valor justo do ativo-objeto:
+
+    valor justo (R$) = preço US × USD/BRL ÷ razão (BDRs por ação-objeto)
+    prêmio (%)       = preço BDR ÷ valor justo − 1
+
+Cotações BDR vêm em lote da BRAPI (quotes.py), o
+USD/BRL da BRAPI e o preço US do armazém local (prices.py) ou da tabela
+de fundamentos. O cálculo é uma única passada vetorizada.
+
+Razões: bdr_ratios.csv (ticker_us, ticker_br, ratio; frações aceitas),
+cobrindo o universo distribuído; a busca é por ticker_br e, sem ele, por
+ticker_us. Sem linha na tabela, a razão é estimada arredondando a razão implícita para o padrão de
+BDR mais próximo e a linha sai marcada como 'estimado'. Como a estimativa
+parte do próprio preço, o prêmio dessas linhas seria ~0 por construção:
+elas ficam sem prêmio/spread e fora do z-score (só valor justo indicativo).
+
+Uso:
+    python premium.py AAPL MSFT NVDA
+    python premium.py --check      # falha se o universo tiver BDR sem razão
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+RATIOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bdr_ratios.csv")
+
+# Razões usuais de BDRs na B3 (BDRs por ação-objeto), usadas só na estimativa
+STANDARD_RATIOS = np.array([
+    1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 16, 20, 24, 25, 30, 32, 40, 48, 50,
+    60, 64, 80, 96, 100, 120, 150, 160, 200, 240, 300, 400, 500, 600, 800, 1000,
+], dtype=np.float64)
+
+# ============================================================
+# DADOS
+# ============================================================
+
+def load_ratios(path=RATIOS_PATH):
+    """Tabela ticker_us, ticker_br, ratio (BDRs por ação-objeto)"""
+    try:
+        table = pd.read_csv(path, comment='#', dtype={'ticker_us': str, 'ticker_br': str})
+    except (OSError, ValueError):
+        table = pd.DataFrame(columns=['ticker_us', 'ticker_br'])
+    return table.assign(ratio=pd.to_numeric(table.get('ratio'), errors='coerce'))
+
+def lookup_ratios(pairs, ratios):
+    """
+    Razão de cada par (NaN se desconhecida): por ticker_br e, sem ele, por
+    ticker_us. `ratios` pode ser a tabela de load_ratios ou uma Série
+    ticker_br -> razão
+    """
+    if isinstance(ratios, pd.Series):
+        return ratios.reindex(pairs['ticker_br'].to_numpy()).to_numpy(dtype=np.float64)
+    by_br = ratios.dropna(subset=['ticker_br']).drop_duplicates('ticker_br').set_index('ticker_br')['ratio']
+    by_us = ratios.dropna(subset=['ticker_us']).drop_duplicates('ticker_us').set_index('ticker_us')['ratio']
+    known = by_br.reindex(pairs['ticker_br'].to_numpy()).to_numpy(dtype=np.float64)
+    return np.where(np.isnan(known), by_us.reindex(pairs['ticker_us'].to_numpy()).to_numpy(dtype=np.float64),
+                    known)
+
+def missing_ratios(mapping, ratios=None):
+    """Pares ticker_us -> ticker_br do mapeamento sem razão válida na tabela"""
+    ratios = load_ratios() if ratios is None else ratios
+    pairs = pd.DataFrame({'ticker_us': list(mapping), 'ticker_br': list(mapping.values())})
+    known = lookup_ratios(pairs, ratios)
+    bad = np.isnan(known) | (known <= 0)
+    return dict(zip(pairs['ticker_us'][bad], pairs['ticker_br'][bad]))
+
+def fetch_bdr_quotes(symbols):
+    """Cotações BRL em lote (quotes.py): DataFrame (índice = ticker_br)"""
+    import quotes
+    return quotes.get_quotes(symbols)
+
+def fetch_usd_brl():
+    """Cotação USD/BRL (BRAPI v2/currency); NaN se indisponível"""
+    import screening
+    from instrumentation import http_get
+
+    try:
+        response = http_get('brapi', f"{screening.BRAPI_BASE_URL}/v2/currency",
+                            params={'currency': 'USD-BRL', 'token': screening.BRAPI_API_TOKEN},
+                            retries=2, timeout=15)
+        rate = response.json()['currency'][0]
+        bid, ask = float(rate['bidPrice']), float(rate.get('askPrice') or rate['bidPrice'])
+        return (bid + ask) / 2
+    except Exception:
+        return float('nan')
+
+def us_prices(tickers, fallback=None):
+    """Último fechamento do armazém local; completa com `fallback` (Series)"""
+    prices_us = pd.Series(np.nan, index=pd.Index(tickers, name='ticker_us'), dtype='float64')
+    try:
+        import prices
+        store = prices.PriceStore()
+        if store.tickers:
+            close = prices._ffill(np.asarray(store.field('close')[-10:], dtype=np.float64))[-1]
+            prices_us = prices_us.fillna(pd.Series(close, index=store.tickers))
+    except Exception:
+        pass
+    if fallback is not None:
+        prices_us = prices_us.fillna(fallback.reindex(prices_us.index))
+    return prices_us
+
+# ============================================================
+# CÁLCULO (VETORIZADO)
+# ============================================================
+
+def nearest_ratio(implied):
+    """Arredonda razões implícitas para o padrão mais próximo (escala log)"""
+    implied = np.asarray(implied, dtype=np.float64)
+    log_std = np.log(STANDARD_RATIOS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = np.abs(np.log(implied)[:, None] - log_std[None, :])
+    best = STANDARD_RATIOS[np.argmin(np.where(np.isnan(distance), np.inf, distance), axis=1)]
+    return np.where(np.isfinite(implied) & (implied > 0), best, np.nan)
+
+def compute(pairs, bdr_quotes, prices_us, usd_brl, ratios=None):
+    """
+    pairs: DataFrame com ticker_br e ticker_us
+    Retorna uma linha por BDR: preço BDR, preço US, razão, valor justo,
+    prêmio (%), z-score do prêmio e spread (R$); prêmio, z-score e spread
+    só para razões da tabela
+    """
+    ratios = load_ratios() if ratios is None else ratios
+    ticker_br = pairs['ticker_br'].to_numpy()
+    bdr_price = bdr_quotes['price'].reindex(ticker_br).to_numpy(dtype=np.float64)
+    us_price = prices_us.reindex(pairs['ticker_us'].to_numpy()).to_numpy(dtype=np.float64)
+    known = lookup_ratios(pairs, ratios)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        underlying_brl = us_price * usd_brl
+        implied = underlying_brl / bdr_price
+        ratio = np.where(np.isnan(known), nearest_ratio(implied), known)
+        fair = underlying_brl / ratio
+        premium = np.where(np.isnan(known), np.nan, (bdr_price / fair - 1) * 100)
+        premium[~np.isfinite(premium)] = np.nan
+        spread = np.where(np.isnan(known), np.nan, bdr_price - fair)
+        # z-score entre as BDRs com razão conhecida
+        valid = ~np.isnan(premium)
+        std = premium[valid].std(ddof=1) if valid.sum() > 1 else np.nan
+        zscore = (premium - premium[valid].mean()) / std if std > 0 else np.full_like(premium, np.nan)
+
+    frame = pd.DataFrame({
+        'ticker_us': pairs['ticker_us'].to_numpy(),
+        'preco_bdr': bdr_price,
+        'preco_us': us_price,
+        'usd_brl': usd_brl,
+        'razao': ratio,
+        'razao_fonte': np.where(np.isnan(known), np.where(np.isnan(ratio), None, 'estimado'), 'tabela'),
+        'valor_justo': fair,
+        'premio_pct': premium,
+        'premio_z': zscore,
+        'spread_brl': spread,
+        'volume': bdr_quotes['volume'].reindex(ticker_br).to_numpy(dtype=np.float64),
+    }, index=pd.Index(ticker_br, name='ticker_br'))
+    return frame.replace([np.inf, -np.inf], np.nan)
+
+def premium_table(mapping, fallback_prices=None, ratios=None):
+    """Busca tudo (cotações em lote + câmbio) e calcula o universo mapeado"""
+    pairs = pd.DataFrame({'ticker_us': list(mapping), 'ticker_br': list(mapping.values())})
+    quotes = fetch_bdr_quotes(pairs['ticker_br'].tolist())
+    return compute(pairs, quotes, us_prices(pairs['ticker_us'], fallback_prices), fetch_usd_brl(), ratios)
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['--check']:
+        import screening
+
+        universe = screening.fallback_universe()[1]
+        missing = missing_ratios(universe)
+        for ticker_us, ticker_br in missing.items():
+            print(f"  sem razão: {ticker_us} ({ticker_br})")
+        print(f"{'❌' if missing else '✅'} {len(universe) - len(missing)}/{len(universe)} BDRs do universo "
+              f"com razão em {RATIOS_PATH}")
+        sys.exit(1 if missing else 0)
+
+    symbols = [s.upper() for s in sys.argv[1:]] or ['AAPL', 'MSFT', 'NVDA']
+    table = premium_table({t: f"{t}34" for t in symbols})
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(table.round(3).to_string())
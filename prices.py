@@ -0,0 +1,400 @@
+"""
+HISTÓRICO DE PREÇOS (OHLCV) DO UNIVERSO
+Download diário em lote (vários tickers por chamada) e armazenamento em
+arrays memory-mapped, uma coluna por ticker:
+
+    prices/meta.json          tickers, nº de dias, campos, cobertura por ticker
+    prices/dates.i4           dias desde 1970-01-01 (int32)
+    prices/<campo>.f4         float32 (dias × tickers), linhas acrescentadas ao fim
+
+Atualizações só acrescentam os dias novos e só pregões encerrados (a barra
+parcial do dia não é gravada). A cobertura é por ticker: se o lote de um
+ticker falha, ele não avança e a próxima atualização baixa de novo a partir
+do último dia coberto, preenchendo os buracos. Retorno, volatilidade,
+drawdown e momentum saem vetorizados para o universo inteiro, sem rede.
+
+Uso:
+    python prices.py update                 # universo BRAPI (ou lista curada)
+    python prices.py update --tickers AAPL,MSFT --days 400
+    python prices.py metrics
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+PRICES_DIR = os.environ.get("BDR_PRICES_DIR", "prices")
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+BATCH_SIZE = 100
+HISTORY_DAYS = 400
+
+# Pregão de referência (ativos-objeto nos EUA): a barra do dia só é final
+# depois do fechamento + margem para o provedor consolidar
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_CLOSED_AT = (16, 30)
+
+# Janelas em dias úteis
+WINDOWS = {'1m': 21, '3m': 63, '6m': 126, '12m': 252}
+
+# ============================================================
+# DOWNLOAD EM LOTE
+# ============================================================
+
+def _download_http(base_url, tickers, start):
+    """Stand-in / superfície HTTP: /history?symbols=A,B&start="""
+    from instrumentation import http_get
+
+    response = http_get('yahoo', f"{base_url}/history",
+                        params={'symbols': ",".join(tickers), 'start': start.isoformat()},
+                        retries=2, timeout=30)
+    response.raise_for_status()
+    payload = response.json()
+    dates = pd.to_datetime(payload.get('dates', []))
+    return {
+        field: pd.DataFrame({t: series[field] for t, series in payload.get('data', {}).items()},
+                            index=dates, dtype='float64')
+        for field in FIELDS
+    }
+
+def _download_yfinance(tickers, start):
+    """yf.download multi-ticker (uma chamada por lote)"""
+    import yfinance as yf
+
+    raw = yf.download(tickers, start=start.isoformat(), auto_adjust=True, progress=False,
+                      threads=True, group_by='column')
+    if raw is None or raw.empty:
+        return {field: pd.DataFrame() for field in FIELDS}
+    frames = {}
+    for field in FIELDS:
+        frame = raw[field.capitalize()]
+        if isinstance(frame, pd.Series):  # lote de um ticker só
+            frame = frame.to_frame(tickers[0])
+        frames[field] = frame.astype('float64')
+    return frames
+
+def last_closed_session(now=None):
+    """Último dia cujo pregão já encerrou (no fuso da bolsa)"""
+    now = now or datetime.now(MARKET_TZ)
+    today = now.date()
+    return today if (now.hour, now.minute) >= SESSION_CLOSED_AT else today - timedelta(days=1)
+
+def download(tickers, start, batch_size=BATCH_SIZE):
+    """
+    {campo: DataFrame (datas × tickers)} para todos os tickers, em lotes
+    Tickers de lotes que falharam ficam fora das colunas (erro contado na
+    instrumentação, componente 'prices')
+    """
+    import screening
+
+    parts = {field: [] for field in FIELDS}
+    for i in range(0, len(tickers), batch_size):
+        batch = list(tickers[i:i + batch_size])
+        try:
+            if screening.YAHOO_BASE_URL:
+                frames = _download_http(screening.YAHOO_BASE_URL, batch, start)
+            else:
+                frames = _download_yfinance(batch, start)
+        except Exception as e:
+            from instrumentation import METRICS
+            METRICS.observe_error('prices', e)
+            continue
+        for field in FIELDS:
+            parts[field].append(frames[field])
+    return {field: (pd.concat(parts[field], axis=1) if parts[field] else pd.DataFrame())
+            for field in FIELDS}
+
+# ============================================================
+# ARMAZENAMENTO (MEMORY-MAPPED)
+# ============================================================
+
+def _day_numbers(index):
+    """Datas -> dias desde 1970-01-01 (int32)"""
+    return index.values.astype('datetime64[D]').astype(np.int64).astype(np.int32)
+
+class PriceStore:
+    """Arrays (dias × tickers) em disco, lidos via np.memmap"""
+
+    def __init__(self, root=PRICES_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def meta(self):
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'tickers': [], 'days': 0, 'fields': list(FIELDS), 'covered': {}}
+
+    def coverage(self):
+        """{ticker: último dia coberto por um download bem-sucedido}"""
+        meta = self.meta()
+        if not meta['days']:
+            return {}
+        covered = meta.get('covered')
+        if covered is None:
+            # Armazém anterior à cobertura por ticker: todos até o último dia
+            last = self.dates()[-1].date()
+            return {t: last for t in meta['tickers']}
+        return {t: date.fromordinal(date(1970, 1, 1).toordinal() + d) for t, d in covered.items()}
+
+    def _write_meta(self, meta):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    @property
+    def tickers(self):
+        return self.meta()['tickers']
+
+    def dates(self):
+        meta = self.meta()
+        if not meta['days']:
+            return pd.DatetimeIndex([])
+        days = np.memmap(self._path("dates.i4"), dtype=np.int32, mode='r', shape=(meta['days'],))
+        return pd.to_datetime(np.asarray(days, dtype='int64'), unit='D')
+
+    def field(self, name):
+        """Array (dias × tickers) memory-mapped, somente leitura"""
+        meta = self.meta()
+        shape = (meta['days'], len(meta['tickers']))
+        if not shape[0] or not shape[1]:
+            return np.empty(shape, dtype=np.float32)
+        return np.memmap(self._path(f"{name}.f4"), dtype=np.float32, mode='r', shape=shape)
+
+    def frame(self, name, last=None):
+        """DataFrame (datas × tickers) de um campo; `last` = só os últimos N dias"""
+        values = self.field(name)
+        dates = self.dates()
+        if last:
+            values, dates = values[-last:], dates[-last:]
+        return pd.DataFrame(values, index=dates, columns=self.tickers)
+
+    def append(self, frames):
+        """
+        Acrescenta os dias posteriores ao último armazenado e preenche, nos
+        dias já armazenados, os buracos (NaN) dos tickers recebidos
+        Tickers novos (ou armazém vazio) reescrevem os arquivos: as colunas mudam
+        """
+        close = frames.get('close')
+        if close is None or close.empty:
+            return 0
+
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            meta = self.meta()
+            tickers = list(meta['tickers'])
+            new_tickers = [t for t in close.columns if t not in tickers]
+            covered = self._covered(meta, close)
+
+            if new_tickers or not meta['days']:
+                tickers += new_tickers
+                old = {f: self.frame(f) for f in FIELDS}
+                merged = {f: frames[f].reindex(columns=tickers).combine_first(old[f].reindex(columns=tickers))
+                          for f in FIELDS}
+                return self._rewrite(merged, tickers, covered) - meta['days']
+
+            dates = self.dates()
+            rows = close.index.normalize()
+            fresh = np.asarray(rows > dates[-1])
+            self._fill_holes(frames, rows[~fresh], ~fresh, dates, tickers)
+            meta['covered'] = covered
+            if not fresh.any():
+                self._write_meta(meta)
+                return 0
+            index = rows[fresh]
+            order = np.argsort(index.values)
+
+            # Descarta sobras de uma gravação interrompida antes de acrescentar
+            self._truncate(meta['days'], len(tickers))
+            with open(self._path("dates.i4"), "ab") as f:
+                f.write(_day_numbers(index[order]).tobytes())
+            for field in FIELDS:
+                block = frames[field].reindex(columns=tickers)[fresh].iloc[order]
+                with open(self._path(f"{field}.f4"), "ab") as f:
+                    f.write(np.ascontiguousarray(block.to_numpy(dtype=np.float32)).tobytes())
+
+            meta.update({'days': meta['days'] + len(index), 'fields': list(FIELDS)})
+            self._write_meta(meta)
+            return len(index)
+
+    def _covered(self, meta, close):
+        """
+        Cobertura (dia nº) atualizada com o último dia com dado de cada ticker
+        em `close`; colunas só com NaN (falha do ticker no lote) não avançam
+        """
+        covered = {t: int(d) for t, d in (meta.get('covered') or {}).items()}
+        if meta['days'] and meta.get('covered') is None:
+            last = int(_day_numbers(self.dates()[-1:])[0])
+            covered = dict.fromkeys(meta['tickers'], last)
+        days = _day_numbers(close.index.normalize())
+        last_valid = np.where(close.notna().to_numpy(), days[:, None], -1).max(axis=0, initial=-1)
+        for ticker, last in zip(close.columns, last_valid.tolist()):
+            if last >= 0:
+                covered[ticker] = max(covered.get(ticker, last), last)
+        return covered
+
+    def _fill_holes(self, frames, rows, mask, dates, tickers):
+        """Preenche NaN dos dias já armazenados com os valores recebidos (in place)"""
+        if not len(rows):
+            return
+        stored = _day_numbers(dates)
+        days = _day_numbers(rows)
+        pos = np.searchsorted(stored, days)
+        found = (pos < len(stored)) & (stored[np.minimum(pos, len(stored) - 1)] == days)
+        if not found.any():
+            return
+        pos = pos[found]
+        shape = (len(stored), len(tickers))
+        for field in FIELDS:
+            block = frames[field].reindex(columns=tickers)[mask].to_numpy(dtype=np.float32)[found]
+            values = np.memmap(self._path(f"{field}.f4"), dtype=np.float32, mode='r+', shape=shape)
+            current = values[pos]
+            values[pos] = np.where(np.isnan(current), block, current)
+            values.flush()
+            del values
+
+    def _truncate(self, days, n_tickers):
+        os.truncate(self._path("dates.i4"), days * 4)
+        for field in FIELDS:
+            os.truncate(self._path(f"{field}.f4"), days * n_tickers * 4)
+
+    def _rewrite(self, frames, tickers, covered):
+        index = frames['close'].index
+        tmp = {}
+        tmp["dates.i4"] = _day_numbers(index).tobytes()
+        for field in FIELDS:
+            tmp[f"{field}.f4"] = np.ascontiguousarray(
+                frames[field].reindex(columns=tickers).to_numpy(dtype=np.float32)).tobytes()
+        for name, data in tmp.items():
+            with open(self._path(f"{name}.tmp"), "wb") as f:
+                f.write(data)
+            os.replace(self._path(f"{name}.tmp"), self._path(name))
+        self._write_meta({'tickers': tickers, 'days': len(index), 'fields': list(FIELDS),
+                          'covered': covered})
+        return len(index)
+
+    def update(self, tickers, history_days=HISTORY_DAYS, batch_size=BATCH_SIZE):
+        """
+        Baixa só o que falta (dias novos; histórico completo p/ tickers novos),
+        até o último pregão encerrado; tickers atrasados (lote ou ticker que
+        falhou) são baixados à parte, do dia seguinte à sua cobertura
+        """
+        tickers = list(dict.fromkeys(tickers))
+        closed = last_closed_session()
+        covered = self.coverage()
+        new = [t for t in tickers if t not in covered]
+        earliest = closed - timedelta(days=history_days)
+        starts = {}
+        for ticker in tickers:
+            if ticker in covered:
+                starts.setdefault(max(covered[ticker] + timedelta(days=1), earliest), []).append(ticker)
+
+        # Primeiro os dias novos dos conhecidos (um download por início), depois
+        # o histórico dos novos
+        added = 0
+        for start, old in sorted(starts.items(), reverse=True):
+            if start <= closed:
+                added += self.append(_until(download(old, start, batch_size), closed))
+        if new:
+            start = closed - timedelta(days=history_days)
+            added += self.append(_until(download(new, start, batch_size), closed))
+        return added
+
+def _until(frames, last_day):
+    """Descarta linhas posteriores a `last_day` (pregão ainda aberto)"""
+    return {field: frame[frame.index.normalize() <= pd.Timestamp(last_day)] if len(frame) else frame
+            for field, frame in frames.items()}
+
+# ============================================================
+# MÉTRICAS (VETORIZADAS)
+# ============================================================
+
+def _ffill(values):
+    """Forward-fill por coluna (NaN herdam o último valor válido)"""
+    mask = np.isnan(values)
+    idx = np.where(~mask, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = values[idx, np.arange(values.shape[1])[None, :]]
+    return filled
+
+def compute_metrics(close, tickers):
+    """
+    close: (dias × tickers). Retorna uma linha por ticker com retornos por
+    janela, volatilidade anualizada (63d), drawdown máximo (252d),
+    momentum 12-1 e distância da máxima de 52 semanas (%)
+    """
+    close = _ffill(np.asarray(close, dtype=np.float64))
+    n_days = len(close)
+    out = {}
+
+    def back(k):
+        return close[-1 - k] if n_days > k else np.full(close.shape[1], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        last = close[-1] if n_days else np.full(close.shape[1], np.nan)
+        for name, k in WINDOWS.items():
+            out[f'ret_{name}'] = (last / back(k) - 1) * 100
+
+        log_ret = np.diff(np.log(close[-64:]), axis=0)
+        out['vol_3m'] = np.nanstd(log_ret, axis=0, ddof=1) * np.sqrt(252) * 100 \
+            if len(log_ret) > 1 else np.full(close.shape[1], np.nan)
+
+        window = close[-252:]
+        peak = np.fmax.accumulate(window, axis=0)
+        out['drawdown_12m'] = np.nanmin(window / peak - 1, axis=0) * 100 \
+            if len(window) else np.full(close.shape[1], np.nan)
+        out['momentum_12_1'] = (back(21) / back(252) - 1) * 100
+        out['dist_high_52w'] = (last / np.nanmax(window, axis=0) - 1) * 100 \
+            if len(window) else np.full(close.shape[1], np.nan)
+
+    frame = pd.DataFrame(out, index=pd.Index(tickers, name='ticker'))
+    return frame.replace([np.inf, -np.inf], np.nan).astype('float32')
+
+def metrics(store=None):
+    """Métricas de preço do armazém local (sem rede)"""
+    store = store or PriceStore()
+    if not store.tickers:
+        return compute_metrics(np.empty((0, 0)), [])
+    return compute_metrics(store.field('close')[-260:], store.tickers)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Histórico de preços do universo")
+    parser.add_argument("--root", default=PRICES_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    upd = sub.add_parser("update", help="Baixa os dias que faltam")
+    upd.add_argument("--tickers", help="Lista separada por vírgula (padrão: universo BRAPI)")
+    upd.add_argument("--days", type=int, default=HISTORY_DAYS, help="Histórico inicial de tickers novos")
+    upd.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    sub.add_parser("metrics", help="Mostra as métricas calculadas")
+    args = parser.parse_args()
+
+    store = PriceStore(args.root)
+    if args.command == "update":
+        if args.tickers:
+            symbols = [t.strip().upper() for t in args.tickers.split(",")]
+        else:
+            import screening
+            symbols = screening.get_all_bdrs_from_brapi()[0]
+        t0 = time.perf_counter()
+        added = store.update(symbols, args.days, args.batch_size)
+        print(f"✅ {added} dias acrescentados para {len(symbols)} tickers em {time.perf_counter() - t0:.1f}s")
+        from instrumentation import METRICS
+        for error in METRICS.error_summary():
+            if error['componente'] == 'prices':
+                print(f"⚠️ {error['ocorrências']} lote(s) com {error['erro']}: {error['última']}")
+    else:
+        with pd.option_context('display.width', 160, 'display.max_columns', 20):
+            print(metrics(store).round(2).to_string())
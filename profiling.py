@@ -0,0 +1,154 @@
+"""
+PERFIL SOB DEMANDA DE UMA EXECUÇÃO
+cProfile (estatísticas exatas por função) + amostrador de pilhas
+(flame graph no formato speedscope) para uma execução do script.
+Só é instanciado quando pedido: desligado não custa nada.
+"""
+
+import sys
+import json
+import time
+import marshal
+import pstats
+import cProfile
+import threading
+
+# Esperas bloqueantes (rede, sleep, select) pelo nome da função no pstats
+BLOCKING_MARKERS = ('socket', '_ssl', 'select', 'poll', 'getaddrinfo', 'time.sleep',
+                    'acquire', 'wait')
+
+# ============================================================
+# AMOSTRADOR
+# ============================================================
+
+class StackSampler(threading.Thread):
+    """Amostra a pilha de uma thread a cada `interval` segundos"""
+
+    def __init__(self, thread_id, interval=0.005):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._stop_event = threading.Event()
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        idx = self.frame_index.get(key)
+        if idx is None:
+            idx = len(self.frames)
+            self.frame_index[key] = idx
+            self.frames.append({'name': code.co_name, 'file': code.co_filename,
+                                'line': code.co_firstlineno})
+        return idx
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def speedscope(self, name):
+        """Perfil 'sampled' do speedscope (https://www.speedscope.app)"""
+        total = sum(self.weights)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': total,
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+            'name': name,
+            'exporter': 'analise_fundamentalista2',
+        }
+
+# ============================================================
+# PERFIL DE UMA EXECUÇÃO
+# ============================================================
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+def _rows(stats, keys, limit):
+    rows = []
+    for func in keys[:limit]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        rows.append({
+            'função': _label(func),
+            'chamadas': nc,
+            'tempo próprio (ms)': round(tt * 1000, 2),
+            'tempo acumulado (ms)': round(ct * 1000, 2),
+        })
+    return rows
+
+class RunProfiler:
+    """Liga cProfile + amostrador na thread atual até stop()"""
+
+    def __init__(self, name="execução", sample_interval=0.005):
+        self.name = name
+        self.sample_interval = sample_interval
+        self.profile = cProfile.Profile()
+        self.sampler = None
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    def abort(self):
+        """Encerra sem montar o resumo (execução interrompida: st.stop, st.rerun, exceção)"""
+        self.profile.disable()
+        self.sampler.stop()
+
+    def stop(self, limit=25):
+        """Encerra e devolve o resumo + arquivos para download"""
+        self.profile.disable()
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self.started
+
+        stats = pstats.Stats(self.profile)
+        by_cumulative = sorted(stats.stats, key=lambda f: stats.stats[f][3], reverse=True)
+        by_own = sorted(stats.stats, key=lambda f: stats.stats[f][2], reverse=True)
+
+        pandas_ops = [f for f in by_cumulative
+                      if '/pandas/' in f[0] and '/_libs/' not in f[0] and not f[2].startswith('_')]
+        blocking = [f for f in by_own
+                    if f[0] == '~' and any(m in f[2] for m in BLOCKING_MARKERS)]
+
+        return {
+            'name': self.name,
+            'seconds': elapsed,
+            'hot': _rows(stats, by_own, limit),
+            'cumulative': _rows(stats, by_cumulative, limit),
+            'pandas': _rows(stats, pandas_ops, 15),
+            'blocking': _rows(stats, blocking, 15),
+            'pstats': marshal.dumps(stats.stats),
+            'speedscope': json.dumps(self.sampler.speedscope(self.name)).encode('utf-8'),
+        }
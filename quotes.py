@@ -0,0 +1,175 @@
+"""
+COTAÇÕES BRAPI EM LOTE
+Cliente de quote/A34,B34,... que agrupa símbolos no tamanho máximo
+aceito por chamada, roda os lotes em paralelo sob o limite de taxa do
+token (token bucket; cada tentativa, inclusive as repetidas, consome um
+token) e guarda cada símbolo em cache com TTL curto.
+Atualizar o universo inteiro custa poucas requisições.
+
+Configuração (variáveis de ambiente):
+    BRAPI_QUOTE_CHUNK      símbolos por chamada (padrão 20)
+    BRAPI_RATE_PER_SECOND  chamadas por segundo do token (padrão 5)
+    BRAPI_QUOTE_TTL        segundos de validade de cada cotação (padrão 60)
+    BRAPI_QUOTE_MISS_TTL   segundos em que um símbolo sem cotação não é
+                           pedido de novo (padrão 900)
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+QUOTE_CHUNK = int(os.environ.get("BRAPI_QUOTE_CHUNK", "20"))
+RATE_PER_SECOND = float(os.environ.get("BRAPI_RATE_PER_SECOND", "5"))
+QUOTE_TTL = float(os.environ.get("BRAPI_QUOTE_TTL", "60"))
+MISS_TTL = float(os.environ.get("BRAPI_QUOTE_MISS_TTL", "900"))
+MAX_WORKERS = 4
+
+QUOTE_COLUMNS = ['price', 'volume', 'change', 'liquidity']
+
+# ============================================================
+# LIMITE DE TAXA
+# ============================================================
+
+class RateLimiter:
+    """Token bucket bloqueante (compartilhado pelas threads do cliente)"""
+
+    def __init__(self, per_second, burst=None):
+        self.rate = per_second
+        self.capacity = burst or max(1.0, per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# ============================================================
+# CLIENTE
+# ============================================================
+
+class QuoteClient:
+    def __init__(self, chunk_size=QUOTE_CHUNK, rate_per_second=RATE_PER_SECOND,
+                 ttl=QUOTE_TTL, max_workers=MAX_WORKERS, miss_ttl=MISS_TTL):
+        self.chunk_size = max(1, chunk_size)
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate_per_second)
+        self.lock = threading.Lock()
+        self._cache = {}  # símbolo -> (expira em, cotação ou None = sem cotação)
+        self.requests = 0
+
+    def _acquire(self):
+        """Um token do limite de taxa por requisição (inclusive as repetidas)"""
+        self.limiter.acquire()
+        with self.lock:
+            self.requests += 1
+
+    def _fetch_chunk(self, symbols):
+        """{símbolo: cotação}; None se a chamada falhou (nada a concluir sobre os símbolos)"""
+        import screening
+        from instrumentation import http_get
+
+        try:
+            response = http_get('brapi', f"{screening.BRAPI_BASE_URL}/quote/{','.join(symbols)}",
+                                params={'token': screening.BRAPI_API_TOKEN}, retries=2, timeout=15,
+                                acquire=self._acquire)
+            if response.status_code != 200:
+                return None
+            results = response.json().get('results', [])
+        except Exception:
+            return None
+
+        quotes = {}
+        for quote in results:
+            symbol = quote.get('symbol')
+            if not symbol:
+                continue
+            price = quote.get('regularMarketPrice')
+            volume = quote.get('regularMarketVolume')
+            quotes[symbol] = {
+                'price': price,
+                'volume': volume,
+                'change': quote.get('regularMarketChangePercent'),
+                # Volume financeiro (R$) do pregão
+                'liquidity': price * volume if price is not None and volume is not None else None,
+            }
+        return quotes
+
+    def get(self, symbols):
+        """
+        {símbolo: cotação} — do cache se ainda válida, senão em lotes paralelos
+        Símbolos que o provedor não devolveu ficam fora por MISS_TTL (cache
+        negativo); lotes que falharam são tentados de novo na chamada seguinte
+        """
+        now = time.monotonic()
+        symbols = list(dict.fromkeys(symbols))
+        with self.lock:
+            known = {s: q for s, (expires, q) in ((s, self._cache[s]) for s in symbols if s in self._cache)
+                     if expires > now}
+        fresh = {s: q for s, q in known.items() if q is not None}
+        missing = [s for s in symbols if s not in known]
+
+        chunks = [missing[i:i + self.chunk_size] for i in range(0, len(missing), self.chunk_size)]
+        if len(chunks) == 1:
+            results = [self._fetch_chunk(chunks[0])]
+        elif chunks:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                results = list(pool.map(self._fetch_chunk, chunks))
+        else:
+            results = []
+
+        now = time.monotonic()
+        with self.lock:
+            for chunk, quotes in zip(chunks, results):
+                if quotes is None:
+                    continue
+                for symbol, quote in quotes.items():
+                    self._cache[symbol] = (now + self.ttl, quote)
+                    fresh[symbol] = quote
+                for symbol in chunk:
+                    if symbol not in quotes:
+                        self._cache[symbol] = (now + self.miss_ttl, None)
+        return fresh
+
+    def frame(self, symbols):
+        """DataFrame (índice = símbolo) com price, volume, change e liquidity"""
+        quotes = self.get(symbols)
+        frame = pd.DataFrame.from_dict(quotes, orient='index', columns=QUOTE_COLUMNS)
+        frame.index.name = 'ticker_br'
+        return frame.astype('float64')
+
+    def clear(self):
+        with self.lock:
+            self._cache.clear()
+
+# Cliente do processo: o cache e o limite de taxa valem para todas as sessões
+CLIENT = QuoteClient()
+
+def get_quotes(symbols):
+    return CLIENT.frame(symbols)
+
+if __name__ == "__main__":
+    import sys
+    import screening
+
+    symbols = [s.upper() for s in sys.argv[1:]] or list(screening.get_all_bdrs_from_brapi()[1].values())
+    t0 = time.perf_counter()
+    table = get_quotes(symbols)
+    print(table.sort_values('liquidity', ascending=False).head(30).to_string())
+    print(f"\n✅ {len(table)}/{len(symbols)} cotações em {CLIENT.requests} requisições "
+          f"({time.perf_counter() - t0:.2f}s)")
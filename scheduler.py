@@ -0,0 +1,245 @@
+"""
+AGENDADOR DE BUSCAS POR PRIORIDADE
+Uma fila de prioridade (heap) de tickers a buscar, comum às sessões e
+atendida por poucas threads em segundo plano. Cada interação de cada
+sessão declara faixas de prioridade:
+
+    0  visíveis   seleção atual / tabela / comparador
+    1  top N      primeiros do universo (Top 100)
+    2  cauda      resto do universo (atualização completa em segundo plano)
+
+A prioridade efetiva de um ticker é a melhor entre as sessões ativas; a
+cada interação a fila é reordenada (entradas antigas do heap são
+descartadas na retirada), então os tickers que o usuário está olhando
+passam na frente mesmo com uma atualização do universo inteiro em curso.
+Resultados ficam em memória por FETCH_TTL. Com `name`, cada ticker
+entregue por wait() conta como chamada do cache de mesmo nome na
+instrumentação, e a primeira entrega de cada busca conta como miss:
+buscas que ninguém usou (top N, cauda) não entram no hit ratio.
+
+Configuração (variáveis de ambiente):
+    BDR_FETCH_WORKERS     threads de busca (padrão 2)
+    BDR_FETCH_TTL         segundos de validade de um resultado (padrão 3600)
+    BDR_FETCH_UNIVERSE    1 liga a cauda em segundo plano (padrão 0)
+
+Uso:
+    python scheduler.py AAPL MSFT       # tempo até os "visíveis" com a cauda na fila
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+from collections import Counter
+
+from instrumentation import METRICS
+
+FETCH_WORKERS = int(os.environ.get("BDR_FETCH_WORKERS", "2"))
+FETCH_TTL = float(os.environ.get("BDR_FETCH_TTL", "3600"))
+FETCH_UNIVERSE = os.environ.get("BDR_FETCH_UNIVERSE", "0") == "1"
+
+PRIORITY_VISIBLE, PRIORITY_TOP, PRIORITY_TAIL = 0, 1, 2
+
+# Sessões sem interação há mais que isso deixam de contar
+SESSION_TTL = 600
+
+# Pausa entre buscas de uma thread (mesmo ritmo do antigo laço sequencial)
+FETCH_PAUSE = 0.05
+
+class FetchScheduler:
+    def __init__(self, fetch, workers=FETCH_WORKERS, ttl=FETCH_TTL, pause=FETCH_PAUSE, name=None):
+        self.fetch = fetch
+        self.name = name
+        self.workers = workers
+        self.ttl = ttl
+        self.pause = pause
+        self.cond = threading.Condition()
+        self.heap = []          # (prioridade, seq, ticker); entradas antigas são puladas
+        self.queued = {}        # ticker -> prioridade da entrada válida no heap
+        self.claims = {}        # sessão -> (instante, {ticker: prioridade})
+        self.pinned = Counter()  # tickers aguardados por wait() (prioridade 0)
+        self.results = {}       # ticker -> (instante, dados)
+        self.inflight = set()
+        self.unserved = set()   # buscados e ainda não entregues por wait()
+        self.fetched = 0
+        self._seq = itertools.count()
+        self._threads = []
+
+    # --------------------------------------------------------
+    # Prioridades
+    # --------------------------------------------------------
+
+    def prioritize(self, session, tiers):
+        """
+        Declara as faixas de uma sessão (lista de listas de tickers, da mais
+        para a menos urgente) e reordena a fila
+        """
+        claim = {}
+        for priority, tickers in enumerate(tiers):
+            for ticker in tickers:
+                claim.setdefault(ticker, priority)
+        now = time.monotonic()
+        with self.cond:
+            self.claims[session] = (now, claim)
+            for other, (seen, _) in list(self.claims.items()):
+                if now - seen > SESSION_TTL:
+                    del self.claims[other]
+            self._reschedule()
+        self._start()
+
+    def _fresh(self, ticker):
+        result = self.results.get(ticker)
+        return result is not None and time.monotonic() - result[0] < self.ttl
+
+    def _reschedule(self):
+        """Recalcula a prioridade efetiva e empilha só o que mudou (com o lock)"""
+        effective = {}
+        for _, claim in self.claims.values():
+            for ticker, priority in claim.items():
+                if priority < effective.get(ticker, priority + 1):
+                    effective[ticker] = priority
+        for ticker in self.pinned:
+            effective[ticker] = PRIORITY_VISIBLE
+
+        for ticker in [t for t in self.queued if t not in effective]:
+            del self.queued[ticker]
+        pushed = False
+        for ticker, priority in effective.items():
+            if self.queued.get(ticker) == priority or ticker in self.inflight or self._fresh(ticker):
+                continue
+            self.queued[ticker] = priority
+            heapq.heappush(self.heap, (priority, next(self._seq), ticker))
+            pushed = True
+        # Heap cheio de entradas antigas: recompacta
+        if len(self.heap) > 4 * max(len(self.queued), 64):
+            self.heap = [entry for entry in self.heap if self.queued.get(entry[2]) == entry[0]]
+            heapq.heapify(self.heap)
+        if pushed:
+            self.cond.notify_all()
+
+    def _pop(self):
+        while self.heap:
+            priority, _, ticker = heapq.heappop(self.heap)
+            if self.queued.get(ticker) != priority:
+                continue
+            del self.queued[ticker]
+            if not self._fresh(ticker):
+                return ticker
+        return None
+
+    # --------------------------------------------------------
+    # Threads de busca
+    # --------------------------------------------------------
+
+    def _start(self):
+        with self.cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, daemon=True, name=f"fetch-scheduler-{i}")
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                ticker = self._pop()
+                while ticker is None:
+                    self.cond.wait()
+                    ticker = self._pop()
+                self.inflight.add(ticker)
+            try:
+                data = self.fetch(ticker)
+            except Exception as e:
+                METRICS.observe_error('scheduler', e)
+                data = None
+            with self.cond:
+                self.results[ticker] = (time.monotonic(), data)
+                self.inflight.discard(ticker)
+                self.unserved.add(ticker)
+                self.fetched += 1
+                self.cond.notify_all()
+            if self.pause:
+                time.sleep(self.pause)
+
+    # --------------------------------------------------------
+    # Consulta
+    # --------------------------------------------------------
+
+    def wait(self, tickers, timeout=None):
+        """
+        Gera (ticker, dados) na ordem em que ficam prontos; os tickers
+        aguardados ficam com prioridade máxima enquanto isso
+        """
+        pending = list(dict.fromkeys(tickers))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            self.pinned.update(pending)
+            self._reschedule()
+        self._start()
+        try:
+            while pending:
+                with self.cond:
+                    ready = [t for t in pending if self._fresh(t)]
+                    if not ready:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return
+                        self.cond.wait(remaining)
+                        continue
+                    done = set(ready)
+                    pending = [t for t in pending if t not in done]
+                    out = [(t, self.results[t][1]) for t in ready]
+                    missed = done & self.unserved
+                    self.unserved -= missed
+                if self.name:
+                    for ticker, _ in out:
+                        METRICS.count_cache(self.name)
+                        if ticker in missed:
+                            METRICS.count_cache(self.name, miss=True)
+                yield from out
+        finally:
+            with self.cond:
+                self.pinned.subtract(dict.fromkeys(tickers, 1))
+                self.pinned = +self.pinned
+                self._reschedule()
+
+    def invalidate(self):
+        """Descarta os resultados; as faixas declaradas voltam para a fila"""
+        with self.cond:
+            self.results.clear()
+            self.unserved.clear()
+            self._reschedule()
+
+    def status(self):
+        with self.cond:
+            by_priority = Counter(self.queued.values())
+            return {
+                'fila': len(self.queued),
+                'fila_visiveis': by_priority.get(PRIORITY_VISIBLE, 0),
+                'em_andamento': len(self.inflight),
+                'prontos': sum(1 for t in self.results if self._fresh(t)),
+                'buscados': self.fetched,
+                'sessoes': len(self.claims),
+            }
+
+if __name__ == "__main__":
+    import sys
+
+    import screening
+
+    us_tickers, _, _ = screening.get_all_bdrs_from_brapi()
+    visible = [t.upper() for t in sys.argv[1:]] or us_tickers[-3:]
+    scheduler = FetchScheduler(screening.get_fundamental_data)
+
+    # Universo inteiro na cauda; os "visíveis" chegam depois, com a fila cheia
+    scheduler.prioritize('cli', [[], us_tickers[:100], us_tickers])
+    time.sleep(1)
+    t0 = time.perf_counter()
+    scheduler.prioritize('cli', [visible, us_tickers[:100], us_tickers])
+    for ticker, data in scheduler.wait(visible):
+        print(f"  {ticker:<6} {(time.perf_counter() - t0) * 1000:7.0f} ms  {'ok' if data else 'sem dados'}")
+    status = scheduler.status()
+    print(f"✅ {len(visible)} visíveis prontos com {status['fila']} na fila "
+          f"({status['buscados']} buscados)")
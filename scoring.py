@@ -0,0 +1,178 @@
+"""
+MODELOS DE SCORE DECLARATIVOS
+Cada modelo é dado (scoring_models.json ou BDR_SCORING_PATH), não código:
+
+    "padrao": {
+        "descricao": "ROE médio de 3 anos + ajustes de DY e P/E",
+        "base": {"metric": "roe",
+                 "bands": [[30, 95, "🟢 Excelente"], [20, 85, "🟢 Excelente"], ...],
+                 "default": [40, "🔴 Fraco"]},
+        "adjustments": [{"metric": "div_yield", "op": ">", "value": 4, "points": 5}, ...],
+        "clip": [0, 100]
+    }
+
+base: faixas "a partir de" (valor >= limite) -> pontos e status; NaN cai
+no default. adjustments: pontos somados quando a condição vale (NaN não
+vale). Cada modelo é compilado uma vez em arrays (limites, pontos,
+rótulos) e avaliado em bloco sobre a tabela de fundamentos já em cache:
+trocar de modelo não busca nada.
+
+Uso:
+    python scoring.py                   # valida e lista os modelos
+"""
+
+import os
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from exports import STATUS_CATEGORIES
+from screens import OPERATORS
+
+SCORING_PATH = os.environ.get(
+    "BDR_SCORING_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_models.json"))
+
+DEFAULT_MODEL = "padrao"
+
+# Modelo original de get_fundamental_data (usado se o arquivo não existir)
+DEFAULT_MODELS = {
+    DEFAULT_MODEL: {
+        'descricao': 'ROE médio de 3 anos + ajustes de DY e P/E',
+        'base': {'metric': 'roe',
+                 'bands': [[30, 95, '🟢 Excelente'], [20, 85, '🟢 Excelente'],
+                           [15, 70, '🟡 Bom'], [10, 55, '🟠 Atenção']],
+                 'default': [40, '🔴 Fraco']},
+        'adjustments': [{'metric': 'div_yield', 'op': '>', 'value': 4, 'points': 5},
+                        {'metric': 'pe', 'op': '>', 'value': 50, 'points': -5}],
+        'clip': [0, 100],
+    },
+}
+
+# ============================================================
+# COMPILAÇÃO
+# ============================================================
+
+class ScoringModel:
+    """Modelo compilado: faixas em arrays ordenados + ajustes vetorizados"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.description = spec.get('descricao', '')
+        base = spec['base']
+        self.metric = base['metric']
+        bands = sorted(base.get('bands', []), key=lambda band: band[0])
+        default_points, default_status = base['default']
+        for status in [*(band[2] for band in bands), default_status]:
+            if status not in STATUS_CATEGORIES:
+                raise ValueError(f"{name}: status desconhecido {status!r}")
+
+        # Índice da faixa = nº de limites <= valor; 0 = default
+        self.thresholds = np.array([band[0] for band in bands], dtype=np.float64)
+        self.points = np.array([default_points, *(band[1] for band in bands)], dtype=np.float64)
+        self.codes = np.array([STATUS_CATEGORIES.index(s)
+                               for s in (default_status, *(band[2] for band in bands))], dtype=np.int8)
+
+        self.adjustments = []
+        for adj in spec.get('adjustments', []):
+            if adj['op'] not in OPERATORS:
+                raise ValueError(f"{name}: operador desconhecido {adj['op']!r}")
+            self.adjustments.append((adj['metric'], OPERATORS[adj['op']],
+                                     float(adj['value']), float(adj['points'])))
+        self.clip = spec.get('clip', [0, 100])
+
+    @property
+    def metrics(self):
+        return list(dict.fromkeys([self.metric, *(adj[0] for adj in self.adjustments)]))
+
+    def evaluate(self, columns):
+        """{métrica: array} -> (scores float64, códigos de status em STATUS_CATEGORIES)"""
+        base = columns[self.metric]
+        band = np.searchsorted(self.thresholds, base, side='right')
+        band[np.isnan(base)] = 0
+        scores = self.points[band]
+        with np.errstate(invalid='ignore'):
+            for metric, op, value, points in self.adjustments:
+                scores += np.where(op(columns[metric], value), points, 0.0)
+        return np.clip(scores, *self.clip), self.codes[band]
+
+    def score(self, df):
+        """Scores e status de uma tabela (métricas ausentes contam como NaN)"""
+        nan = np.full(len(df), np.nan)
+        columns = {m: df[m].to_numpy(dtype=np.float64, na_value=np.nan) if m in df.columns else nan
+                   for m in self.metrics}
+        scores, codes = self.evaluate(columns)
+        return scores, pd.Categorical.from_codes(codes, categories=STATUS_CATEGORIES)
+
+    def score_record(self, record):
+        """(status, score) de um único registro (dict)"""
+        columns = {m: np.array([np.nan if record.get(m) is None else record[m]], dtype=np.float64)
+                   for m in self.metrics}
+        scores, codes = self.evaluate(columns)
+        return STATUS_CATEGORIES[codes[0]], float(scores[0])
+
+class ModelSet:
+    def __init__(self, specs, version=None):
+        self.models = {name: ScoringModel(name, spec) for name, spec in specs.items()}
+        self.version = version
+
+    @property
+    def names(self):
+        return list(self.models)
+
+    def apply(self, frame, primary=DEFAULT_MODEL):
+        """
+        Nova tabela com uma coluna score_<modelo> por modelo; o modelo
+        primário também define score/status e a ordem das linhas
+        """
+        out = frame.copy(deep=False)
+        for name, model in self.models.items():
+            scores, status = model.score(frame)
+            out[f'score_{name}'] = scores.astype(np.float32)
+            if name == primary:
+                out['score'] = scores.astype(np.float32)
+                out['status'] = status
+        return out.sort_values('score', ascending=False, kind='stable')
+
+# ============================================================
+# CARGA (ARQUIVO DE CONFIGURAÇÃO)
+# ============================================================
+
+def load_models(path=SCORING_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)['models']
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_MODELS
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def get_models(path=SCORING_PATH):
+    """ModelSet do arquivo, recompilado só quando o arquivo muda"""
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        stamp = None
+    with _compiled_lock:
+        cached = _compiled.get(path)
+        if cached is None or cached.version != stamp:
+            cached = ModelSet(load_models(path), stamp)
+            _compiled[path] = cached
+        return cached
+
+def score_record(record, model=DEFAULT_MODEL):
+    """(status, score) de um registro de get_fundamental_data"""
+    models = get_models().models
+    return (models.get(model) or ScoringModel(DEFAULT_MODEL, DEFAULT_MODELS[DEFAULT_MODEL])).score_record(record)
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else SCORING_PATH
+    models = get_models(path)
+    print(f"✅ {len(models.models)} modelos")
+    for name, model in models.models.items():
+        print(f"  {name}: {model.description} (métricas: {', '.join(model.metrics)})")
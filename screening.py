@@ -0,0 +1,478 @@
+"""
+PIPELINE DE TRIAGEM DE BDRs (SEM STREAMLIT)
+Busca de dados, pontuação e recomendações usados pelo dashboard,
+pelo snapshot e pela API JSON
+"""
+
+import os
+import threading
+import time
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+
+import screens
+import scoring
+import statements
+from exports import STATUS_CATEGORIES
+from instrumentation import http_get, InstrumentedTicker
+
+# ============================================================
+# MAPEAMENTO CORRETO DE BDRs
+# ============================================================
+
+# Mapeamento manual dos principais BDRs com códigos especiais
+TICKER_CORRECTIONS = {
+    'GOGL': 'GOOGL',  # Google
+    'AMZO': 'AMZN',   # Amazon
+    'M1TA': 'META',   # Meta
+    'NVDC': 'NVDA',   # Nvidia
+    'MSCD': 'MSFT',   # Microsoft (alternativo)
+    'T1SL': 'TSLA',   # Tesla (alternativo)
+    'NTFL': 'NFLX',   # Netflix (alternativo)
+    'APPL': 'AAPL',   # Apple (alternativo)
+}
+
+# Tickers conhecidos e válidos (lista curada)
+KNOWN_VALID_TICKERS = [
+    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', 'TSLA', 'NFLX',
+    'AVGO', 'ASML', 'INTC', 'QCOM', 'ADBE', 'CSCO', 'ORCL', 'CRM',
+    'V', 'MA', 'PYPL', 'JPM', 'BAC', 'GS', 'C', 'WFC', 'MS',
+    'BABA', 'MELI', 'SHOP', 'DIS', 'SPOT', 'UBER', 'LYFT',
+    'PFE', 'ABBV', 'JNJ', 'AMGN', 'MRNA', 'LLY', 'BMY',
+    'NKE', 'SBUX', 'KO', 'PEP', 'WMT', 'COST', 'TGT', 'HD',
+    'XOM', 'CVX', 'BP', 'SHEL', 'T', 'VZ', 'CMCSA',
+    'BA', 'CAT', 'DE', 'HON', 'MMM', 'GE', 'LMT',
+    'COIN', 'SQ', 'ABNB', 'DASH', 'SNOW', 'ZM', 'DOCU',
+    'AMD', 'MU', 'LRCX', 'AMAT', 'KLAC', 'SNPS', 'CDNS',
+    'NXPI', 'TXN', 'MRVL', 'QRVO', 'SWKS',
+    'NOW', 'WDAY', 'PANW', 'CRWD', 'ZS', 'DDOG',
+    'UNH', 'CVS', 'CI', 'HUM', 'ANTM', 'MCK', 'ABC',
+    'AXP', 'BLK', 'SCHW', 'CME', 'ICE', 'SPGI', 'MCO',
+    'NEE', 'DUK', 'SO', 'D', 'EXC', 'SRE', 'AEP',
+    'UPS', 'FDX', 'NSC', 'UNP', 'CSX', 'JBHT',
+    'MCD', 'CMG', 'YUM', 'QSR', 'DPZ', 'SBUX',
+    'PG', 'UL', 'CL', 'KMB', 'CLX', 'CHD',
+    'PM', 'MO', 'BTI',
+    'MDLZ', 'KHC', 'GIS', 'K', 'CPB',
+    'LOW', 'DHI', 'LEN', 'NVR', 'PHM',
+    'F', 'GM', 'RIVN', 'LCID',
+    'AAL', 'DAL', 'UAL', 'LUV', 'ALK',
+    'MAR', 'HLT', 'IHG', 'H', 'WH',
+    'BKNG', 'EXPE', 'TCOM', 'TRIP',
+]
+
+# API Keys (o app.py sobrescreve com st.secrets quando disponível)
+FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY", "d4uouchr01qnm7pnasq0d4uouchr01qnm7pnasqg")
+BRAPI_API_TOKEN = os.environ.get("BRAPI_API_TOKEN", "iExnKM1xcbQcYL3cNPhPQ3")
+
+# Endpoints dos provedores
+# PROVIDER_STUB_URL aponta todos para o stand-in local (benchmarks/provider_stub.py)
+PROVIDER_STUB_URL = os.environ.get("PROVIDER_STUB_URL", "").rstrip("/")
+
+def _provider_url(env_name, stub_path, default):
+    if os.environ.get(env_name):
+        return os.environ[env_name].rstrip("/")
+    if PROVIDER_STUB_URL:
+        return f"{PROVIDER_STUB_URL}/{stub_path}"
+    return default
+
+BRAPI_BASE_URL = _provider_url("BRAPI_BASE_URL", "brapi", "https://brapi.dev/api")
+FINNHUB_BASE_URL = _provider_url("FINNHUB_BASE_URL", "finnhub", "https://finnhub.io/api/v1")
+POLYMARKET_BASE_URL = _provider_url("POLYMARKET_BASE_URL", "polymarket", "https://clob.polymarket.com")
+# Vazio = yfinance real; preenchido = superfície HTTP no formato do stand-in
+YAHOO_BASE_URL = _provider_url("YAHOO_BASE_URL", "yahoo", "")
+
+# Limites usados no dashboard (evitar timeout)
+NEWS_LIMIT = 30
+FUND_LIMIT = 50
+
+# ============================================================
+# FUNÇÃO MELHORADA PARA BUSCAR BDRs
+# ============================================================
+
+def get_all_bdrs_from_brapi():
+    """
+    Busca BDRs da B3 e valida tickers
+    """
+    try:
+        url = f"{BRAPI_BASE_URL}/quote/list?token={BRAPI_API_TOKEN}"
+        response = http_get('brapi', url, retries=2, timeout=30)
+
+        if response.status_code != 200:
+            # Fallback para lista conhecida
+            return KNOWN_VALID_TICKERS, {}, []
+
+        data = response.json()
+        stocks = data.get('stocks', [])
+
+        bdrs = []
+        mapping = {}
+        us_tickers = []
+
+        for stock in stocks:
+            ticker_br = stock.get('stock', '')
+            name = stock.get('name', '')
+
+            if ticker_br.endswith('34') or ticker_br.endswith('35'):
+                # Extrair ticker base
+                ticker_base = ticker_br[:-2]
+
+                # Aplicar correções conhecidas
+                ticker_us = TICKER_CORRECTIONS.get(ticker_base, ticker_base)
+
+                # Validar se ticker parece válido (formato US)
+                # Tickers US geralmente são 1-5 letras maiúsculas
+                if (len(ticker_us) >= 1 and
+                    len(ticker_us) <= 5 and
+                    ticker_us.isalpha() and
+                    ticker_us.isupper()):
+
+                    # Se não está na lista conhecida, apenas adicionar se for comum
+                    if ticker_us in KNOWN_VALID_TICKERS or len(ticker_us) <= 4:
+                        bdrs.append({
+                            'ticker_br': ticker_br,
+                            'ticker_us': ticker_us,
+                            'name': name,
+                            'type': stock.get('type', 'stock')
+                        })
+
+                        mapping[ticker_us] = ticker_br
+                        us_tickers.append(ticker_us)
+
+        # Remover duplicatas e ordenar
+        us_tickers = sorted(list(set(us_tickers)))
+
+        # Se encontrou poucos, usar lista conhecida
+        if len(us_tickers) < 50:
+            us_tickers = KNOWN_VALID_TICKERS
+            mapping = {t: f"{t}34" for t in us_tickers}
+
+        return us_tickers, mapping, bdrs
+
+    except Exception as e:
+        # Em caso de erro, usar lista conhecida
+        return KNOWN_VALID_TICKERS, {t: f"{t}34" for t in KNOWN_VALID_TICKERS}, []
+
+def fallback_universe():
+    """Universo padrão (lista curada) usado enquanto a BRAPI não responde"""
+    return KNOWN_VALID_TICKERS, {t: f"{t}34" for t in KNOWN_VALID_TICKERS}, []
+
+class UniverseLoader:
+    """
+    Carrega o universo da BRAPI em background
+    Enquanto não termina, result() devolve a lista curada
+    """
+
+    def __init__(self, loader=None, ttl=86400):
+        self.loader = loader or get_all_bdrs_from_brapi
+        self.ttl = ttl
+        self.loaded_at = None
+        self._result = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="universe-loader")
+            self._thread.start()
+
+    def _run(self):
+        try:
+            result = self.loader()
+        except Exception:
+            result = fallback_universe()
+        self._result = result
+        self.loaded_at = time.monotonic()
+
+    @property
+    def ready(self):
+        return self._result is not None
+
+    def result(self):
+        """Universo carregado (ou fallback); dispara recarga se expirado"""
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at > self.ttl:
+            self.start()
+        return self._result if self._result is not None else fallback_universe()
+
+    def reload(self):
+        self.start()
+
+# ============================================================
+# YAHOO (yfinance ou stand-in HTTP)
+# ============================================================
+
+class HttpTicker:
+    """
+    Mesma superfície de yf.Ticker usada aqui (info, financials,
+    balance_sheet, calendar), lida de YAHOO_BASE_URL/<ticker>/<campo>
+    """
+
+    def __init__(self, symbol, base_url=None):
+        self.symbol = symbol
+        self.base_url = base_url or YAHOO_BASE_URL
+
+    def payload(self, field):
+        """JSON bruto de um campo (DataFrames no formato 'split')"""
+        response = http_get('yahoo', f"{self.base_url}/{self.symbol}/{field}", retries=2, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def get_info(self):
+        return self.payload('info')
+
+    @property
+    def info(self):
+        return self.get_info()
+
+    def _frame(self, field):
+        return statements.frame_from_payload(self.payload(field))
+
+    @property
+    def financials(self):
+        return self._frame('financials')
+
+    @property
+    def balance_sheet(self):
+        return self._frame('balance_sheet')
+
+    @property
+    def calendar(self):
+        calendar = self.payload('calendar') or {}
+        if 'Earnings Date' in calendar:
+            calendar['Earnings Date'] = [datetime.fromisoformat(d).date() for d in calendar['Earnings Date']]
+        return calendar
+
+def get_ticker(symbol):
+    """yf.Ticker ou HttpTicker, conforme YAHOO_BASE_URL"""
+    if YAHOO_BASE_URL:
+        return HttpTicker(symbol)
+
+    import yfinance as yf  # import tardio: só carrega quando há busca
+    return InstrumentedTicker(yf.Ticker(symbol))
+
+# ============================================================
+# FUNÇÕES DE BUSCA
+# ============================================================
+
+def get_news_data(ticker):
+    """Busca notícias via Finnhub"""
+    from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    to_date = datetime.now().strftime('%Y-%m-%d')
+    url = f'{FINNHUB_BASE_URL}/company-news?symbol={ticker}&from={from_date}&to={to_date}&token={FINNHUB_API_KEY}'
+
+    try:
+        response = http_get('finnhub', url, retries=2, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+    except:
+        pass
+    return []
+
+def get_fundamental_data(ticker, roe_medio=None):
+    """
+    Busca dados fundamentalistas com validação rigorosa
+    roe_medio: ROE já calculado em lote (statements.load_universe); sem ele,
+    os demonstrativos do ticker são baixados aqui
+    """
+    try:
+        acao = get_ticker(ticker)
+        info = acao.get_info()
+
+        # Validação inicial
+        if not info or len(info) < 5:
+            return None
+
+        market_cap = info.get('marketCap', 0)
+        if not market_cap or market_cap <= 0:
+            return None
+
+        pe_ratio = info.get('forwardPE') or info.get('trailingPE')
+        pb_ratio = info.get('priceToBook')
+        div_yield = info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
+
+        # ROE (média dos últimos 3 exercícios, alinhados por ano)
+        if roe_medio is None:
+            try:
+                dre = acao.financials
+                balanco = acao.balance_sheet
+
+                if dre.empty or balanco.empty:
+                    return None
+
+                roe_medio = statements.roe_medio(dre, balanco, years=3)
+            except:
+                return None
+        if pd.isna(roe_medio):
+            return None
+
+        # Classificação (modelo padrão de scoring_models.json)
+        status, score = scoring.score_record({'roe': roe_medio, 'div_yield': div_yield,
+                                              'pe': pe_ratio, 'pb': pb_ratio})
+
+        return {
+            'ticker': ticker,
+            'market_cap': market_cap / 1e9,
+            'pe': pe_ratio if pd.notna(pe_ratio) else np.nan,
+            'pb': pb_ratio if pd.notna(pb_ratio) else np.nan,
+            'div_yield': div_yield,
+            'roe': roe_medio,
+            'status': status,
+            'score': score,
+            'setor': info.get('sector', 'N/A'),
+            'price': info.get('currentPrice', 0)
+        }
+    except Exception as e:
+        return None
+
+def get_polymarket_data():
+    """Busca dados do Polymarket"""
+    try:
+        response = http_get(
+            'polymarket',
+            f"{POLYMARKET_BASE_URL}/markets",
+            params={"limit": 2000, "closed": "false"},
+            retries=2,
+            timeout=15
+        )
+        data = response.json().get("data", [])
+        return pd.DataFrame(data)
+    except:
+        return pd.DataFrame()
+
+# ============================================================
+# ANÁLISE
+# ============================================================
+
+def get_news_opportunity(ticker, news, mapping):
+    """Pontua notícias/eventos de um ticker (None se irrelevante)"""
+    if not news:
+        return None
+
+    try:
+        stock = get_ticker(ticker)
+        info = stock.info
+
+        score = 50
+        events = []
+        priority = "🟡 Média"
+
+        # Earnings
+        try:
+            calendar = stock.calendar
+            if calendar is not None and 'Earnings Date' in calendar:
+                earnings_date = calendar['Earnings Date']
+                if isinstance(earnings_date, list) and len(earnings_date) > 0:
+                    date_obj = earnings_date[0]
+                    days_until = (datetime(date_obj.year, date_obj.month, date_obj.day) - datetime.now()).days
+
+                    if 0 < days_until <= 3:
+                        score += 40
+                        events.append(f"⚡ Earnings em {days_until} dias")
+                        priority = "🔴 Urgente"
+                    elif days_until <= 7:
+                        score += 30
+                        events.append(f"Earnings em {days_until} dias")
+                        priority = "🔴 Urgente"
+                    elif days_until <= 14:
+                        score += 20
+                        events.append(f"Earnings em {days_until} dias")
+                        priority = "🟠 Alta"
+        except:
+            pass
+
+        # Dividendos
+        if info.get('dividendYield') and info.get('dividendYield') > 0:
+            div_yield = info.get('dividendYield') * 100
+            score += 15
+            events.append(f"Div: {div_yield:.2f}%")
+
+        if len(news) > 5:
+            score += 10
+            events.append(f"{len(news)} notícias")
+
+        if events or score > 60:
+            return {
+                'ticker': ticker,
+                'bdr': mapping.get(ticker, f"{ticker}34"),
+                'score': score,
+                'priority': priority,
+                'events': ', '.join(events) if events else 'Notícias'
+            }
+    except:
+        pass
+    return None
+
+# ============================================================
+# TABELA CANÔNICA DE FUNDAMENTOS
+# ============================================================
+# Construída uma vez por coleta e compartilhada (somente leitura) entre
+# views e sessões: índice = ticker, já ordenada por score, status/setor
+# categóricos e métricas em float32.
+
+FUND_METRICS = ('market_cap', 'pe', 'pb', 'div_yield', 'roe', 'score', 'price')
+
+def fundamentals_frame(records, price_metrics=None):
+    """
+    DataFrame compacto a partir dos dicts de get_fundamental_data
+    price_metrics (prices.metrics(), índice = ticker) entra como colunas extras
+    """
+    df = pd.DataFrame.from_records(list(records), columns=['ticker', *FUND_METRICS, 'status', 'setor'])
+    df = df.drop_duplicates('ticker').set_index('ticker')
+    for column in FUND_METRICS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+    df['status'] = pd.Categorical(df['status'], categories=STATUS_CATEGORIES)
+    df['setor'] = df['setor'].astype('category')
+    if price_metrics is not None and not price_metrics.empty:
+        df = df.join(price_metrics.astype('float32'), how='left')
+    # Ordem estável por score: a tabela e os "top N" não precisam reordenar
+    return df.sort_values('score', ascending=False, kind='stable')
+
+def filter_fundamentals(frame, roe_range, pe_range, div_yield_min, market_cap_min,
+                        max_volatility=None, min_momentum=None):
+    """
+    Máscara vetorizada dos filtros fundamentais do sidebar (NaN não passa)
+    Filtros de preço só se aplicam a quem tem histórico (NaN passa)
+    """
+    mask = (frame['roe'].between(*roe_range) &
+            frame['pe'].between(*pe_range) &
+            (frame['div_yield'] >= div_yield_min) &
+            (frame['market_cap'] >= market_cap_min))
+    if max_volatility is not None and 'vol_3m' in frame.columns:
+        mask &= ~(frame['vol_3m'] > max_volatility)
+    if min_momentum is not None and 'momentum_12_1' in frame.columns:
+        mask &= ~(frame['momentum_12_1'] < min_momentum)
+    return mask
+
+def get_recommendations(df, screen_set=None):
+    """
+    Gera recomendações (df = fundamentals_frame, índice = ticker)
+    Uma por tela de screens.json com ao menos um ticker, todas numa passada
+    """
+    return (screen_set or screens.get_screen_set()).evaluate(df)
+
+def run_screening(tickers, mapping, news_limit=NEWS_LIMIT, fund_limit=FUND_LIMIT, workers=None):
+    """
+    Executa notícias + fundamentos para uma lista de tickers (sem filtros)
+    Usado pelo snapshot; o dashboard faz o mesmo laço com barra de progresso.
+    Os demonstrativos vêm em lote antes do laço (disco + parse em processos
+    a partir de statements.POOL_MIN_TICKERS tickers; `workers` = processos)
+    """
+    news_opps = []
+    for ticker in tickers[:news_limit]:
+        opp = get_news_opportunity(ticker, get_news_data(ticker), mapping)
+        if opp:
+            news_opps.append(opp)
+
+    fund_tickers = tickers[:fund_limit]
+    roe = statements.roe_by_ticker(statements.load_universe(fund_tickers, workers=workers))
+    fund_data = []
+    for ticker in fund_tickers:
+        data = get_fundamental_data(ticker, roe_medio=roe.get(ticker, np.nan))
+        if data:
+            fund_data.append(data)
+
+    return news_opps, fund_data
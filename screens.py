@@ -0,0 +1,207 @@
+"""
+TELAS (SCREENS) DECLARATIVAS
+Cada tela é um conjunto de condições (coluna, operador, valor) + ranking
+top-K, definida em screens.json (ou BDR_SCREENS_PATH):
+
+    {"tipo": "💎 Value", "razao": "Alto ROE com P/E atrativo", "cor": "success",
+     "filters": [["roe", ">", 20], ["pe", "<", 20]], "rank": "roe", "top": 3}
+
+Compilação: condições iguais em telas diferentes viram uma só linha de
+uma matriz booleana (condições × tickers), avaliada uma vez por tabela; a
+máscara de cada tela é o AND das suas linhas (conjuntos repetidos também
+são compartilhados). O top-K sai de um partition por métrica de
+ranking, para todas as telas dessa métrica de uma vez. Avaliar dezenas de
+telas custa pouco mais que avaliar uma.
+
+Uso:
+    python screens.py                   # valida e lista as telas do arquivo
+    python screens.py minhas_telas.json
+"""
+
+import os
+import json
+import threading
+
+import numpy as np
+
+SCREENS_PATH = os.environ.get(
+    "BDR_SCREENS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "screens.json"))
+
+OPERATORS = {
+    '>': np.greater, '>=': np.greater_equal,
+    '<': np.less, '<=': np.less_equal,
+    '==': np.equal, '!=': np.not_equal,
+}
+
+# Telas de get_recommendations (usadas se o arquivo não existir)
+DEFAULT_SCREENS = [
+    {'tipo': '💎 Value', 'razao': 'Alto ROE com P/E atrativo', 'cor': 'success',
+     'filters': [['roe', '>', 20], ['pe', '<', 20]], 'rank': 'roe', 'top': 3},
+    {'tipo': '💰 Dividendos', 'razao': 'Dividend Yield > 4%', 'cor': 'info',
+     'filters': [['div_yield', '>', 4]], 'rank': 'div_yield', 'top': 3},
+    {'tipo': '🚀 Growth', 'razao': 'Alto crescimento', 'cor': 'warning',
+     'filters': [['roe', '>', 25], ['pe', '>', 30]], 'rank': 'roe', 'top': 3},
+]
+
+# ============================================================
+# COMPILAÇÃO
+# ============================================================
+
+def _condition(spec):
+    """[coluna, operador, valor] -> chave hashable; 'in' aceita lista de valores"""
+    column, op, value = spec
+    if op == 'in':
+        return (column, op, tuple(value))
+    if op not in OPERATORS:
+        raise ValueError(f"Operador desconhecido: {op}")
+    return (column, op, float(value))
+
+class ScreenSet:
+    """Telas compiladas: condições únicas, máscaras compartilhadas e grupos de ranking"""
+
+    def __init__(self, screens):
+        self.screens = list(screens)
+        self.conditions = []
+        index = {}
+        mask_ids = {}
+        self.mask_of = []  # tela -> máscara (conjunto de condições)
+        self.masks = []    # máscara -> índices das condições
+        for screen in self.screens:
+            ids = []
+            for spec in screen.get('filters', []):
+                key = _condition(spec)
+                if key not in index:
+                    index[key] = len(self.conditions)
+                    self.conditions.append(key)
+                ids.append(index[key])
+            combo = tuple(sorted(set(ids)))
+            if combo not in mask_ids:
+                mask_ids[combo] = len(self.masks)
+                self.masks.append(np.array(combo, dtype=np.intp))
+            self.mask_of.append(mask_ids[combo])
+        self.mask_of = np.array(self.mask_of, dtype=np.intp)
+
+        # Telas agrupadas por (métrica de ranking, ordem)
+        self.groups = {}
+        for i, screen in enumerate(self.screens):
+            key = (screen.get('rank', 'score'), bool(screen.get('ascending', False)))
+            self.groups.setdefault(key, []).append(i)
+
+    def _conditions(self, df):
+        """
+        Matriz booleana (condições × tickers); NaN e colunas ausentes não
+        passam em nenhuma condição
+        """
+        out = np.empty((len(self.conditions), len(df)), dtype=bool)
+        columns = {}
+        for row, (column, op, value) in enumerate(self.conditions):
+            if column not in df.columns:
+                out[row] = False
+                continue
+            if op == 'in':
+                out[row] = df[column].isin(value).to_numpy()
+                continue
+            if column not in columns:
+                columns[column] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            with np.errstate(invalid='ignore'):
+                OPERATORS[op](columns[column], value, out=out[row])
+        return out
+
+    def filters(self, i):
+        """Condições compiladas (coluna, operador, valor) da tela i"""
+        return [self.conditions[c] for c in self.masks[self.mask_of[i]]]
+
+    def evaluate_masks(self, df):
+        """Matriz booleana (telas × tickers)"""
+        conditions = self._conditions(df)
+        masks = np.empty((len(self.masks), len(df)), dtype=bool)
+        for m, ids in enumerate(self.masks):
+            if len(ids):
+                np.logical_and.reduce(conditions[ids], axis=0, out=masks[m])
+            else:
+                masks[m] = True
+        return masks[self.mask_of]
+
+    def select(self, df):
+        """Posições (ordenadas pelo ranking) escolhidas por cada tela"""
+        masks = self.evaluate_masks(df)
+        picks = [np.empty(0, dtype=np.intp)] * len(self.screens)
+        n = len(df)
+        if not n:
+            return picks
+
+        for (rank, ascending), members in self.groups.items():
+            if rank not in df.columns:
+                continue
+            values = df[rank].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values if ascending else -values
+            # Chave crescente: inf fica fora (máscara falsa ou NaN)
+            key = np.where(masks[members] & ~np.isnan(values), values, np.inf)
+            k = min(n, max(self.screens[i].get('top', 3) for i in members))
+            chosen = np.isfinite(key)
+            if k < n:
+                # k-ésimo valor de cada tela; empates nele ficam com as primeiras
+                # posições da tabela (mesmo critério de nlargest)
+                kth = np.partition(key, k - 1, axis=1)[:, k - 1:k]
+                below = key < kth
+                tied = key == kth
+                room = k - below.sum(axis=1, keepdims=True)
+                chosen &= below | (tied & (np.cumsum(tied, axis=1) <= room))
+            for row, i in enumerate(members):
+                positions = np.flatnonzero(chosen[row])
+                positions = positions[np.argsort(key[row, positions], kind='stable')]
+                picks[i] = positions[:self.screens[i].get('top', 3)]
+        return picks
+
+    def evaluate(self, df):
+        """Lista de recomendações (telas com ao menos um ticker), na ordem do arquivo"""
+        tickers = df.index.to_numpy()
+        results = []
+        for screen, chosen in zip(self.screens, self.select(df)):
+            if len(chosen):
+                results.append({
+                    'tipo': screen['tipo'],
+                    'tickers': tickers[chosen].tolist(),
+                    'razao': screen.get('razao', ''),
+                    'cor': screen.get('cor', 'info'),
+                })
+        return results
+
+# ============================================================
+# CARGA (ARQUIVO DE CONFIGURAÇÃO)
+# ============================================================
+
+def load_screens(path=SCREENS_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)['screens']
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_SCREENS
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def get_screen_set(path=SCREENS_PATH):
+    """ScreenSet do arquivo, recompilado só quando o arquivo muda"""
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        stamp = None
+    with _compiled_lock:
+        cached = _compiled.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, ScreenSet(load_screens(path)))
+            _compiled[path] = cached
+        return cached[1]
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else SCREENS_PATH
+    screen_set = get_screen_set(path)
+    print(f"✅ {len(screen_set.screens)} telas, {len(screen_set.conditions)} condições únicas, "
+          f"{len(screen_set.masks)} máscaras, {len(screen_set.groups)} rankings")
+    for screen in screen_set.screens:
+        filters = " e ".join(f"{c} {op} {v}" for c, op, v in screen.get('filters', [])) or "todos"
+        print(f"  {screen['tipo']}: {filters} → top {screen.get('top', 3)} por {screen.get('rank', 'score')}")
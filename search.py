@@ -0,0 +1,130 @@
+"""
+BUSCA APROXIMADA NO UNIVERSO DE BDRs
+Índice de trigramas sobre ticker_us, ticker_br e nome (sem acentos, sem
+pontuação), montado uma vez por universo. Uma consulta soma as listas de
+postagem dos seus trigramas (np.bincount), pega os melhores candidatos e
+reordena com bônus para ticker exato, prefixo de ticker e prefixo de
+palavra do nome. "coca cola", "Coca-Cola", "nubank" e "KO34" encontram o
+mesmo tipo de resultado; erros de digitação custam só alguns trigramas.
+
+Uso:
+    python search.py nubank "coca cola" msft
+"""
+
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+# Sufixos de razão social que não ajudam a distinguir empresas
+NAME_NOISE = {'drn', 'dr1', 'dr2', 'dr3', 'ed', 'inc', 'corp', 'corporation', 'co', 'ltd',
+              'plc', 'sa', 'nv', 'ag', 'the', 'class', 'cl', 'holdings', 'group'}
+
+MAX_CANDIDATES = 64
+
+def normalize(text):
+    """Minúsculas, sem acentos; pontuação vira espaço"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    def __init__(self, entries):
+        """entries: dicts com ticker_us, ticker_br e name (name/ticker_br opcionais)"""
+        self.entries = []
+        seen = set()
+        for entry in entries:
+            ticker = entry.get('ticker_us')
+            if not ticker or ticker in seen:
+                continue
+            seen.add(ticker)
+            self.entries.append({'ticker_us': ticker, 'ticker_br': entry.get('ticker_br', ''),
+                                 'name': entry.get('name', '')})
+
+        self.tickers = np.array([normalize(e['ticker_us']) for e in self.entries], dtype=object)
+        self.tickers_br = np.array([normalize(e['ticker_br']) for e in self.entries], dtype=object)
+        self.lookup = {e['ticker_us']: e for e in self.entries}
+        self.words = []
+        self.gram_counts = np.zeros(len(self.entries), dtype=np.float64)
+        postings = {}
+        for i, entry in enumerate(self.entries):
+            words = [w for w in normalize(entry['name']).split() if w not in NAME_NOISE]
+            self.words.append(words)
+            grams = trigrams(" ".join([self.tickers[i], self.tickers_br[i], *words]))
+            self.gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=20):
+        """Lista de (ticker_us, pontuação) da melhor para a pior"""
+        q = normalize(query)
+        if not q or not self.entries:
+            return []
+        query_grams = trigrams(q)
+        grams = [self.postings[g] for g in query_grams if g in self.postings]
+        if not grams:
+            return []
+        hits = np.bincount(np.concatenate(grams), minlength=len(self.entries)).astype(np.float64)
+        n_grams = len(query_grams)
+        k = min(MAX_CANDIDATES, len(hits))
+        candidates = np.argpartition(-hits, k - 1)[:k]
+        candidates = candidates[hits[candidates] > 0]
+
+        # Sobreposição de trigramas (Dice) + bônus por tipo de casamento
+        scores = 2 * hits[candidates] / (n_grams + self.gram_counts[candidates]) * 100
+        compact = q.replace(" ", "")
+        for pos, i in enumerate(candidates):
+            ticker, ticker_br = self.tickers[i], self.tickers_br[i]
+            if compact in (ticker, ticker_br):
+                scores[pos] += 1000
+            elif ticker.startswith(compact) or ticker_br.startswith(compact):
+                scores[pos] += 400 - len(ticker)
+            words = self.words[i]
+            if words and " ".join(words).startswith(q):
+                scores[pos] += 300
+            elif any(w.startswith(part) for part in q.split() for w in words):
+                scores[pos] += 100
+
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(self.entries[candidates[j]]['ticker_us'], float(scores[j])) for j in order]
+
+    def label(self, ticker):
+        """'AAPL · AAPL34 · Apple Inc' (para a lista de opções)"""
+        entry = self.lookup.get(ticker)
+        if entry is None:
+            return ticker
+        return " · ".join(p for p in (entry['ticker_us'], entry['ticker_br'], entry['name']) if p)
+
+def build(tickers, mapping=None, bdrs_info=()):
+    """
+    Índice do universo (ALL_US_TICKERS, TICKER_MAPPING, ALL_BDRS_INFO)
+    Só entram os tickers do universo; nomes vêm de ALL_BDRS_INFO quando há
+    """
+    mapping = mapping or {}
+    names = {b['ticker_us']: b.get('name', '') for b in bdrs_info if b.get('ticker_us')}
+    return SearchIndex([{'ticker_us': t, 'ticker_br': mapping.get(t, f"{t}34"), 'name': names.get(t, '')}
+                        for t in tickers])
+
+if __name__ == "__main__":
+    import sys
+    import screening
+
+    universe = screening.get_all_bdrs_from_brapi()
+    t0 = time.perf_counter()
+    index = build(*universe)
+    print(f"✅ {len(index)} BDRs indexadas em {(time.perf_counter() - t0) * 1000:.1f} ms")
+    for query in sys.argv[1:] or ["apple", "coca cola", "nubank"]:
+        t0 = time.perf_counter()
+        results = index.search(query, limit=5)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"\n🔎 {query!r} ({elapsed:.3f} ms)")
+        for ticker, score in results:
+            print(f"  {score:7.1f}  {index.label(ticker)}")
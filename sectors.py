@@ -0,0 +1,234 @@
+"""
+ÍNDICE SETORIAL (PERCENTIS E Z-SCORES)
+Posição de cada ticker entre os pares do mesmo setor, para todas as
+métricas, materializada uma vez por atualização de dados:
+
+    pct_<métrica>   percentil no setor (0-100, empates pela média)
+    z_<métrica>     z-score no setor
+
+O índice é do processo e acumula todos os tickers já vistos (os pares de
+um setor não dependem do recorte de uma sessão). refresh() recebe a
+tabela nova, acha os tickers que mudaram e recalcula só os setores
+tocados; lookup() é O(1) por ticker.
+
+Uso:
+    python sectors.py AAPL MSFT         # posições no último snapshot do histórico
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+SECTOR_METRICS = ('roe', 'pe', 'pb', 'div_yield', 'market_cap')
+
+# Acima desta fração de tickers alterados, recalcula tudo de uma vez
+REBUILD_FRACTION = 0.25
+
+def sector_columns(metrics=SECTOR_METRICS):
+    return [f'pct_{m}' for m in metrics] + [f'z_{m}' for m in metrics]
+
+class _Sector:
+    """Bloco de um setor: valores (n × métricas) e posições calculadas"""
+
+    def __init__(self, n_metrics):
+        self.tickers = []
+        self.values = np.empty((0, n_metrics))
+        self.positions = np.empty((0, 2 * n_metrics), dtype=np.float32)
+        self.medians = np.full(n_metrics, np.nan)
+
+    def upsert(self, row, ticker, values):
+        if row is None:
+            self.tickers.append(ticker)
+            self.values = np.vstack([self.values, values])
+            return len(self.tickers) - 1
+        self.values[row] = values
+        return row
+
+    def remove(self, row):
+        """Remove a linha; devolve o ticker que passou a ocupá-la (ou None)"""
+        last = len(self.tickers) - 1
+        moved = None
+        if row != last:
+            self.tickers[row] = self.tickers[last]
+            self.values[row] = self.values[last]
+            moved = self.tickers[row]
+        self.tickers.pop()
+        self.values = self.values[:last]
+        return moved
+
+    def recompute(self):
+        """Percentis e z-scores de todas as métricas do setor (vetorizado por coluna)"""
+        values = self.values
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        ordered = np.sort(values, axis=0)  # NaN vão para o fim
+        pct = np.full(values.shape, np.nan)
+        # Mediana a partir da mesma ordenação (NaN ficam fora da contagem)
+        if len(values):
+            lo = np.take_along_axis(ordered, np.maximum(count - 1, 0)[None, :] // 2, axis=0)[0]
+            hi = np.take_along_axis(ordered, count[None, :] // 2 - (count[None, :] == 0), axis=0)[0]
+            self.medians = np.where(count > 0, (lo + hi) / 2, np.nan)
+        else:
+            self.medians = np.full(values.shape[1], np.nan)
+        for j in range(values.shape[1]):
+            column = ordered[:count[j], j]
+            left = np.searchsorted(column, values[:, j], side='left')
+            right = np.searchsorted(column, values[:, j], side='right')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pct[:, j] = np.where(valid[:, j], (left + right + 1) / 2 / count[j] * 100, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.nanmean(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+            std = np.nanstd(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+            z = np.where(std > 0, (values - mean) / std, 0.0)
+        z[~valid] = np.nan
+        self.positions = np.hstack([pct, z]).astype(np.float32)
+
+class SectorIndex:
+    def __init__(self, metrics=SECTOR_METRICS):
+        self.metrics = list(metrics)
+        self.columns = sector_columns(self.metrics)
+        self.lock = threading.Lock()
+        self.sectors = {}
+        self.where = {}  # ticker -> (setor, linha)
+        self.version = 0
+
+    def __len__(self):
+        return len(self.where)
+
+    # --------------------------------------------------------
+    # Atualização
+    # --------------------------------------------------------
+
+    def refresh(self, frame):
+        """
+        Incorpora uma tabela de fundamentos (índice = ticker, coluna setor)
+        Recalcula só os setores com tickers novos ou alterados; devolve o nº
+        de tickers alterados
+        """
+        if frame is None or frame.empty:
+            return 0
+        values = frame.reindex(columns=self.metrics).to_numpy(dtype=np.float64, na_value=np.nan)
+        sectors = frame['setor'].astype(object).fillna('N/A').to_numpy()
+
+        with self.lock:
+            changed = []
+            for i, ticker in enumerate(frame.index):
+                current = self.where.get(ticker)
+                if current is not None:
+                    sector, row = current
+                    old = self.sectors[sector].values[row]
+                    if sector == sectors[i] and \
+                            np.array_equal(old, values[i], equal_nan=True):
+                        continue
+                changed.append(i)
+            if not changed:
+                return 0
+
+            if not self.where or len(changed) > REBUILD_FRACTION * len(self.where):
+                self._rebuild(frame.index, sectors, values)
+            else:
+                dirty = set()
+                for i in changed:
+                    dirty |= self._upsert(frame.index[i], sectors[i], values[i])
+                for sector in dirty:
+                    self.sectors[sector].recompute()
+            self.version += 1
+            return len(changed)
+
+    def _upsert(self, ticker, sector, values):
+        dirty = {sector}
+        row = None
+        current = self.where.get(ticker)
+        if current is not None:
+            old_sector, old_row = current
+            if old_sector == sector:
+                row = old_row
+            else:
+                moved = self.sectors[old_sector].remove(old_row)
+                if moved is not None:
+                    self.where[moved] = (old_sector, old_row)
+                dirty.add(old_sector)
+        block = self.sectors.setdefault(sector, _Sector(len(self.metrics)))
+        self.where[ticker] = (sector, block.upsert(row, ticker, values))
+        return dirty
+
+    def _rebuild(self, tickers, sectors, values):
+        """Junta o estado atual com a tabela nova e recalcula todos os setores"""
+        merged = {}
+        for sector, block in self.sectors.items():
+            for row, ticker in enumerate(block.tickers):
+                merged[ticker] = (sector, block.values[row])
+        for i, ticker in enumerate(tickers):
+            merged[ticker] = (sectors[i], values[i])
+
+        self.sectors, self.where = {}, {}
+        grouped = {}
+        for ticker, (sector, row) in merged.items():
+            grouped.setdefault(sector, []).append((ticker, row))
+        for sector, members in grouped.items():
+            block = _Sector(len(self.metrics))
+            block.tickers = [t for t, _ in members]
+            block.values = np.array([row for _, row in members], dtype=np.float64)
+            block.recompute()
+            self.sectors[sector] = block
+            for row, ticker in enumerate(block.tickers):
+                self.where[ticker] = (sector, row)
+
+    # --------------------------------------------------------
+    # Consulta (O(1) por ticker)
+    # --------------------------------------------------------
+
+    def lookup(self, ticker):
+        """{pct_<m>: ..., z_<m>: ..., 'pares': n} ou None"""
+        with self.lock:
+            current = self.where.get(ticker)
+            if current is None:
+                return None
+            sector, row = current
+            block = self.sectors[sector]
+            out = dict(zip(self.columns, block.positions[row].tolist()))
+        out['pares'] = len(block.tickers)
+        return out
+
+    def medians(self, sector):
+        """{métrica: mediana do setor, 'pares': n} (materializadas a cada recálculo)"""
+        with self.lock:
+            block = self.sectors.get(sector)
+            if block is None:
+                return None
+            out = dict(zip(self.metrics, block.medians.tolist()))
+            out['pares'] = len(block.tickers)
+        return out
+
+    def frame(self, tickers):
+        """DataFrame (índice = ticker) com as posições dos tickers pedidos"""
+        out = np.full((len(tickers), len(self.columns)), np.nan, dtype=np.float32)
+        with self.lock:
+            for i, ticker in enumerate(tickers):
+                current = self.where.get(ticker)
+                if current is not None:
+                    sector, row = current
+                    out[i] = self.sectors[sector].positions[row]
+        return pd.DataFrame(out, index=pd.Index(tickers, name='ticker'), columns=self.columns)
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import history
+
+    store = history.HistoryStore()
+    days = store.days()
+    if not days:
+        raise SystemExit("❌ Histórico vazio: rode o dashboard ou snapshot.py --history")
+    snapshot = store.read(start=days[-1], end=days[-1]).set_index('ticker')
+
+    index = SectorIndex()
+    t0 = time.perf_counter()
+    index.refresh(snapshot)
+    print(f"✅ {len(index)} tickers em {len(index.sectors)} setores ({days[-1]}) "
+          f"em {(time.perf_counter() - t0) * 1000:.1f} ms")
+    tickers = [t.upper() for t in sys.argv[1:]] or snapshot.index[:10].tolist()
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(index.frame(tickers).round(2).to_string())
@@ -0,0 +1,132 @@
+"""
+SNAPSHOT PRÉ-CALCULADO DA TRIAGEM
+Gera e persiste os mesmos resultados do dashboard (df_fund/df_news)
+para consumo pela API sem buscas upstream por requisição
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import screening
+from instrumentation import METRICS
+
+SNAPSHOT_DIR = os.environ.get("BDR_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "latest.json")
+
+# ============================================================
+# GERAÇÃO / LEITURA
+# ============================================================
+
+def build_snapshot(tickers=None, news_limit=screening.NEWS_LIMIT, fund_limit=screening.FUND_LIMIT,
+                   workers=None):
+    """
+    Executa a triagem completa e devolve um dict serializável
+    fund_limit >= statements.POOL_MIN_TICKERS (e mais de uma CPU) faz o
+    parse dos demonstrativos no pool de processos
+    """
+    us_tickers, mapping, bdrs = screening.get_all_bdrs_from_brapi()
+    if not mapping:
+        mapping = {t: f"{t}34" for t in us_tickers}
+
+    tickers = list(tickers) if tickers else us_tickers
+    news_opps, fund_data = screening.run_screening(tickers, mapping, news_limit, fund_limit, workers)
+
+    recommendations = screening.get_recommendations(screening.fundamentals_frame(fund_data)) if fund_data else []
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'universe': {
+            'total': len(us_tickers),
+            'analisadas': len(tickers),
+            'mapping': mapping,
+        },
+        'fundamentals': json.loads(pd.DataFrame(fund_data).to_json(orient='records')) if fund_data else [],
+        'news': sorted(news_opps, key=lambda x: x['score'], reverse=True),
+        'bdrs': bdrs,
+        'recommendations': recommendations,
+    }
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """Grava o snapshot de forma atômica (tmp + rename)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Lê o snapshot (None se ainda não existe)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# ============================================================
+# ATUALIZAÇÃO PERIÓDICA
+# ============================================================
+
+class SnapshotRefresher(threading.Thread):
+    """Thread que regera o snapshot a cada `interval` segundos"""
+
+    def __init__(self, interval=3600, path=SNAPSHOT_PATH, tickers=None, on_refresh=None,
+                 fund_limit=screening.FUND_LIMIT, workers=None):
+        super().__init__(daemon=True, name="snapshot-refresher")
+        self.interval = interval
+        self.path = path
+        self.tickers = tickers
+        self.on_refresh = on_refresh
+        self.fund_limit = fund_limit
+        self.workers = workers
+        self._stop_event = threading.Event()
+
+    def refresh_once(self):
+        snapshot = build_snapshot(self.tickers, fund_limit=self.fund_limit, workers=self.workers)
+        save_snapshot(snapshot, self.path)
+        if self.on_refresh:
+            self.on_refresh(snapshot)
+        return snapshot
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                METRICS.observe_error('snapshot', e)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera o snapshot da triagem de BDRs")
+    parser.add_argument("--out", default=SNAPSHOT_PATH)
+    parser.add_argument("--tickers", help="Lista separada por vírgula (padrão: universo BRAPI)")
+    parser.add_argument("--fund-limit", type=int, default=screening.FUND_LIMIT,
+                        help="Tickers com fundamentos (padrão 50; >= 64 usa o pool de processos)")
+    parser.add_argument("--workers", type=int, help="Processos para o parse dos demonstrativos")
+    parser.add_argument("--tables", help="Também grava tabelas colunares: arrow, parquet ou ambos")
+    parser.add_argument("--history", action="store_true", help="Também acrescenta os fundamentos ao histórico")
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(",") if args.tickers else None
+    snap = build_snapshot(tickers, fund_limit=args.fund_limit, workers=args.workers)
+    save_snapshot(snap, args.out)
+    print(f"✅ Snapshot salvo em {args.out}: {len(snap['fundamentals'])} fundamentos, {len(snap['news'])} notícias")
+
+    if args.tables:
+        import exports
+        for path in exports.write_snapshot_tables(snap, os.path.dirname(args.out) or ".", args.tables.split(",")):
+            print(f"✅ {path}")
+
+    if args.history:
+        import history
+        part = history.HistoryStore().append(snap['fundamentals'])
+        print(f"✅ Histórico: {part or 'sem alterações'}")
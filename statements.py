@@ -0,0 +1,416 @@
+"""
+DEMONSTRATIVOS EMPILHADOS (ROE / DUPONT)
+Normaliza DRE + balanço de cada ticker em arrays numéricos e empilha o
+universo num cubo (ticker × ano × linha). ROE, ROE sobre patrimônio
+médio, DuPont (margem × giro × alavancagem) e crescimento saem de uma
+única passada vetorizada, sem laço por ticker.
+
+Eixo de anos relativo: 0 = último exercício do ticker, 1 = anterior...
+(lacunas de exercício ficam como NaN, não "puxam" o ano seguinte). Os
+exercícios são alinhados pela data de encerramento comum à DRE e ao
+balanço, e a distância ao último é medida em anos de ~365 dias: anos
+fiscais de 52/53 semanas (encerrando entre 28/dez e 3/jan) não colapsam.
+
+A normalização dos payloads brutos (JSON do Yahoo / stand-in) pode rodar
+num pool de processos: cada worker grava direto no cubo em memória
+compartilhada, sem devolver DataFrames pelo pickle. Os payloads ficam em
+disco (PayloadStore) por STATEMENTS_TTL: uma atualização do snapshot com
+o disco quente só lê bytes e faz o parse no pool.
+
+Configuração (variáveis de ambiente):
+    BDR_STATEMENTS_DIR       diretório dos payloads (padrão statements_cache)
+    BDR_STATEMENTS_TTL       segundos de validade de um payload (padrão 86400)
+    BDR_STATEMENTS_POOL_MIN  tickers a partir dos quais o parse usa o pool (padrão 64)
+
+Uso:
+    python statements.py AAPL MSFT NVDA
+    python statements.py --workers 4 AAPL MSFT NVDA
+"""
+
+import os
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Linhas usadas (rótulos do Yahoo)
+INCOME_ITEMS = ('Net Income', 'Total Revenue')
+BALANCE_ITEMS = ('Stockholders Equity', 'Total Assets')
+LINE_ITEMS = INCOME_ITEMS + BALANCE_ITEMS
+NET_INCOME, REVENUE, EQUITY, ASSETS = range(len(LINE_ITEMS))
+
+MAX_YEARS = 10
+
+STATEMENTS_DIR = os.environ.get("BDR_STATEMENTS_DIR", "statements_cache")
+STATEMENTS_TTL = float(os.environ.get("BDR_STATEMENTS_TTL", "86400"))
+
+# Faixa de ROE (%) considerada válida na média plurianual
+ROE_VALID = (-100, 500)
+
+# ============================================================
+# NORMALIZAÇÃO (POR TICKER)
+# ============================================================
+
+# Exercícios encerrados até esta data de janeiro levam o nome do ano anterior
+FISCAL_YEAR_CUTOFF = pd.Timedelta(days=7)
+
+def fiscal_year(end):
+    """Ano fiscal de uma data de encerramento (3/jan/2021 -> 2020)"""
+    return (pd.Timestamp(end) - FISCAL_YEAR_CUTOFF).year
+
+def normalize(financials, balance_sheet):
+    """
+    DRE + balanço (linhas × datas) -> (anos, valores)
+    anos: int32 (n,) ano fiscal, do mais recente ao mais antigo
+    valores: float64 (n, len(LINE_ITEMS)), NaN onde a linha falta
+    """
+    parts = [df.reindex(list(items))
+             for df, items in ((financials, INCOME_ITEMS), (balance_sheet, BALANCE_ITEMS))
+             if df is not None and not df.empty]
+    if not parts:
+        return np.empty(0, dtype=np.int32), np.empty((0, len(LINE_ITEMS)))
+
+    # DRE e balanço compartilham as datas de encerramento: alinha por data
+    by_date = pd.concat(parts, sort=False).T.reindex(columns=list(LINE_ITEMS))
+    by_date.index = pd.to_datetime(by_date.index)
+    by_date = by_date.sort_index(ascending=False)
+    ends = by_date.index.values.astype('datetime64[D]')
+
+    # Exercícios contados pela distância ao último encerramento (52/53 semanas
+    # = 1 ano); datas quase iguais (DRE e balanço defasados) viram um só,
+    # com o valor mais recente de cada linha
+    lag = np.rint((ends[0] - ends).astype(np.int64) / 365.2425).astype(np.int32)
+    by_lag = by_date.groupby(lag, sort=True).first()
+    years = (fiscal_year(ends[0]) - by_lag.index.to_numpy()).astype(np.int32)
+    return years, by_lag.to_numpy(dtype='float64')
+
+def frame_from_payload(payload):
+    """Payload 'split' ({index, columns, data}, JSON ou bytes) -> DataFrame"""
+    if isinstance(payload, (bytes, str)):
+        payload = json.loads(payload)
+    if not payload:
+        return pd.DataFrame()
+    return pd.DataFrame(payload['data'], index=payload['index'],
+                        columns=pd.to_datetime(payload['columns'])).astype('float64')
+
+def frame_to_payload(df):
+    """DataFrame de demonstrativo -> payload 'split' (para o pool)"""
+    if df is None or df.empty:
+        return None
+    return {
+        'index': [str(i) for i in df.index],
+        'columns': [c.strftime('%Y-%m-%d') if hasattr(c, 'strftime') else str(c) for c in df.columns],
+        'data': df.astype('float64').where(df.notna(), None).values.tolist(),
+    }
+
+# ============================================================
+# CUBO DO UNIVERSO
+# ============================================================
+
+class StatementCube:
+    """values[ticker, ano relativo, linha]; years[ticker, ano relativo] = exercício"""
+
+    def __init__(self, tickers, values, years):
+        self.tickers = list(tickers)
+        self.values = values
+        self.years = years
+
+    def item(self, index):
+        return self.values[:, :, index]
+
+def stack(normalized, max_years=MAX_YEARS):
+    """{ticker: (anos, valores)} -> StatementCube, sem laço no cálculo"""
+    tickers = list(normalized)
+    n_items = len(LINE_ITEMS)
+    values = np.full((len(tickers), max_years, n_items), np.nan)
+    years = np.zeros((len(tickers), max_years), dtype=np.int32)
+    if not tickers:
+        return StatementCube(tickers, values, years)
+
+    lengths = np.array([len(normalized[t][0]) for t in tickers])
+    if not lengths.sum():
+        return StatementCube(tickers, values, years)
+    all_years = np.concatenate([normalized[t][0] for t in tickers])
+    all_values = np.concatenate([normalized[t][1].reshape(-1, n_items) for t in tickers])
+
+    owner = np.repeat(np.arange(len(tickers)), lengths)
+    latest = np.zeros(len(tickers), dtype=np.int32)
+    nonempty = lengths > 0
+    latest[nonempty] = np.maximum.reduceat(all_years, np.cumsum(lengths)[nonempty] - lengths[nonempty])
+
+    lag = latest[owner] - all_years
+    keep = (lag >= 0) & (lag < max_years)
+    values[owner[keep], lag[keep]] = all_values[keep]
+    years[:] = latest[:, None] - np.arange(max_years)[None, :]
+    years[~nonempty] = 0
+    return StatementCube(tickers, values, years)
+
+def _place(values, years, row, normalized, max_years):
+    """Grava os exercícios de um ticker na linha `row` do cubo"""
+    ticker_years, ticker_values = normalized
+    if not len(ticker_years):
+        return
+    latest = int(ticker_years.max())
+    lag = latest - ticker_years
+    keep = lag < max_years
+    values[row, lag[keep]] = ticker_values[keep]
+    years[row] = latest - np.arange(max_years)
+
+# ============================================================
+# PARSE EM PROCESSOS (MEMÓRIA COMPARTILHADA)
+# ============================================================
+
+# Abaixo disso o custo de subir o pool não compensa
+POOL_MIN_TICKERS = int(os.environ.get("BDR_STATEMENTS_POOL_MIN", "64"))
+
+def _parse_chunk(values_name, years_name, shape, start, payloads):
+    """Worker: normaliza um bloco de tickers direto no cubo compartilhado"""
+    from multiprocessing import shared_memory
+
+    values_shm = shared_memory.SharedMemory(name=values_name)
+    years_shm = shared_memory.SharedMemory(name=years_name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+        years = np.ndarray(shape[:2], dtype=np.int32, buffer=years_shm.buf)
+        for offset, (financials, balance_sheet) in enumerate(payloads):
+            try:
+                normalized = normalize(frame_from_payload(financials), frame_from_payload(balance_sheet))
+            except Exception:
+                continue
+            _place(values, years, start + offset, normalized, shape[1])
+        del values, years
+    finally:
+        values_shm.close()
+        years_shm.close()
+    return len(payloads)
+
+def parse_universe(payloads, max_years=MAX_YEARS, workers=None, chunk_size=32):
+    """
+    {ticker: (payload DRE, payload balanço)} -> StatementCube
+    Com workers > 1 (padrão e teto: nº de CPUs) e universo grande, normaliza
+    em processos que escrevem no cubo via shared_memory; com uma CPU o pool
+    só custa (processos disputando o mesmo núcleo) e o parse é serial
+    """
+    tickers = list(payloads)
+    shape = (len(tickers), max_years, len(LINE_ITEMS))
+    cpus = os.cpu_count() or 1
+    workers = min(workers or cpus, cpus)
+
+    if workers <= 1 or len(tickers) < POOL_MIN_TICKERS:
+        values = np.full(shape, np.nan)
+        years = np.zeros(shape[:2], dtype=np.int32)
+        for row, ticker in enumerate(tickers):
+            financials, balance_sheet = payloads[ticker]
+            try:
+                normalized = normalize(frame_from_payload(financials), frame_from_payload(balance_sheet))
+            except Exception:
+                continue
+            _place(values, years, row, normalized, max_years)
+        return StatementCube(tickers, values, years)
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    values_shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    years_shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+        years = np.ndarray(shape[:2], dtype=np.int32, buffer=years_shm.buf)
+        values.fill(np.nan)
+        years.fill(0)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_parse_chunk, values_shm.name, years_shm.name, shape, start,
+                            [payloads[t] for t in tickers[start:start + chunk_size]])
+                for start in range(0, len(tickers), chunk_size)
+            ]
+            for future in futures:
+                future.result()
+
+        # Cópia para memória própria: o bloco compartilhado é liberado aqui
+        cube = StatementCube(tickers, values.copy(), years.copy())
+        del values, years
+        return cube
+    finally:
+        values_shm.close()
+        values_shm.unlink()
+        years_shm.close()
+        years_shm.unlink()
+
+# ============================================================
+# MÉTRICAS (VETORIZADAS)
+# ============================================================
+
+def _ratio(num, den):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = num / den
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+def _previous(arr):
+    """Valor do exercício anterior (ano relativo + 1)"""
+    out = np.full_like(arr, np.nan)
+    out[:, :-1] = arr[:, 1:]
+    return out
+
+def _growth(arr):
+    """Variação (%) sobre o exercício anterior; base negativa usa o módulo"""
+    prev = _previous(arr)
+    return _ratio(arr - prev, np.abs(prev)) * 100
+
+def dupont(cube):
+    """Arrays (ticker × ano relativo) de ROE, DuPont e crescimento"""
+    ni = cube.item(NET_INCOME)
+    revenue = cube.item(REVENUE)
+    equity = cube.item(EQUITY)
+    assets = cube.item(ASSETS)
+
+    avg_equity = (equity + _previous(equity)) / 2
+
+    return {
+        'roe': _ratio(ni, equity) * 100,
+        'roe_avg_equity': _ratio(ni, avg_equity) * 100,
+        'margin': _ratio(ni, revenue) * 100,
+        'turnover': _ratio(revenue, assets),
+        'leverage': _ratio(assets, equity),
+        'revenue_growth': _growth(revenue),
+        'earnings_growth': _growth(ni),
+    }
+
+def multi_year_mean(values, years=3, valid=None):
+    """Média dos últimos `years` exercícios (ignora NaN e valores fora de `valid`)"""
+    window = values[:, :years].copy()
+    if valid is not None:
+        window[(window <= valid[0]) | (window >= valid[1])] = np.nan
+    counts = np.sum(~np.isnan(window), axis=1)
+    totals = np.nansum(window, axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+def cagr(values, years=3):
+    """Crescimento anual composto entre o ano relativo `years` e o último"""
+    start = values[:, years] if values.shape[1] > years else np.full(values.shape[0], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = (values[:, 0] / start) ** (1 / years) - 1
+    out[~np.isfinite(out) | (start <= 0) | (values[:, 0] <= 0)] = np.nan
+    return out * 100
+
+def summary(cube, years=3):
+    """Uma linha por ticker: último exercício + médias plurianuais"""
+    metrics = dupont(cube)
+    frame = pd.DataFrame({
+        'ano': np.where(cube.years[:, 0] > 0, cube.years[:, 0], np.nan),
+        'roe': metrics['roe'][:, 0],
+        'roe_medio': multi_year_mean(metrics['roe'], years, ROE_VALID),
+        'roe_avg_equity': metrics['roe_avg_equity'][:, 0],
+        'margin': metrics['margin'][:, 0],
+        'turnover': metrics['turnover'][:, 0],
+        'leverage': metrics['leverage'][:, 0],
+        'revenue_growth': metrics['revenue_growth'][:, 0],
+        'earnings_growth': metrics['earnings_growth'][:, 0],
+        'revenue_cagr': cagr(cube.item(REVENUE), years),
+    }, index=pd.Index(cube.tickers, name='ticker'))
+    return frame
+
+# ============================================================
+# ATALHOS
+# ============================================================
+
+def roe_medio(financials, balance_sheet, years=3):
+    """ROE médio (%) dos últimos exercícios de um ticker, ou NaN"""
+    cube = stack({'_': normalize(financials, balance_sheet)}, max_years=max(years, 1))
+    return float(multi_year_mean(dupont(cube)['roe'], years, ROE_VALID)[0])
+
+# ============================================================
+# PAYLOADS EM DISCO
+# ============================================================
+
+PAYLOAD_FIELDS = ('financials', 'balance_sheet')
+
+def fetch_payloads(ticker):
+    """
+    Baixa DRE e balanço de um ticker como payloads 'split'
+    HttpTicker devolve o JSON sem parse; yf.Ticker já vem em DataFrame
+    """
+    import screening
+
+    acao = screening.get_ticker(ticker)
+    if isinstance(acao, screening.HttpTicker):
+        return tuple(acao.payload(field) for field in PAYLOAD_FIELDS)
+    return frame_to_payload(acao.financials), frame_to_payload(acao.balance_sheet)
+
+class PayloadStore:
+    """Payloads brutos por ticker (<root>/<ticker>.<campo>.json), válidos por `ttl`"""
+
+    def __init__(self, root=STATEMENTS_DIR, ttl=STATEMENTS_TTL):
+        self.root = root
+        self.ttl = ttl
+
+    def _path(self, ticker, field):
+        return os.path.join(self.root, f"{ticker}.{field}.json")
+
+    def read(self, ticker):
+        """(bytes DRE, bytes balanço) se ainda válidos, senão None"""
+        try:
+            paths = [self._path(ticker, field) for field in PAYLOAD_FIELDS]
+            if min(os.path.getmtime(path) for path in paths) < time.time() - self.ttl:
+                return None
+            out = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    out.append(f.read())
+            return tuple(out)
+        except OSError:
+            return None
+
+    def write(self, ticker, payloads):
+        """Grava os payloads de forma atômica (tmp + rename)"""
+        os.makedirs(self.root, exist_ok=True)
+        for field, payload in zip(PAYLOAD_FIELDS, payloads):
+            path = self._path(ticker, field)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(f"{path}.tmp", path)
+
+    def get(self, ticker):
+        """Payloads do disco ou baixados (e gravados); exceções de rede sobem"""
+        cached = self.read(ticker)
+        if cached is not None:
+            return cached
+        payloads = fetch_payloads(ticker)
+        self.write(ticker, payloads)
+        return payloads
+
+def download_payloads(tickers, store=None):
+    """{ticker: (payload DRE, payload balanço)}; falhas viram (None, None) e não são gravadas"""
+    store = store or PayloadStore()
+    payloads = {}
+    for ticker in tickers:
+        try:
+            payloads[ticker] = store.get(ticker)
+        except Exception:
+            payloads[ticker] = (None, None)
+    return payloads
+
+def load_universe(tickers, max_years=MAX_YEARS, workers=None, store=None):
+    """Payloads (disco ou rede) -> cubo do universo (parse em processos se valer a pena)"""
+    return parse_universe(download_payloads(tickers, store), max_years, workers)
+
+def roe_by_ticker(cube, years=3):
+    """{ticker: ROE médio (%)} do cubo, mesmo critério de roe_medio"""
+    roe = multi_year_mean(dupont(cube)['roe'], years, ROE_VALID)
+    return dict(zip(cube.tickers, roe.tolist()))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ROE / DuPont a partir dos demonstrativos")
+    parser.add_argument("tickers", nargs="*", default=['AAPL', 'MSFT', 'NVDA'])
+    parser.add_argument("--workers", type=int, help="Processos para o parse (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    cube = load_universe([t.upper() for t in args.tickers], workers=args.workers)
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(summary(cube).round(2).to_string())